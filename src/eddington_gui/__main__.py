@@ -1,5 +1,13 @@
 """Main module."""
-from eddington_gui.app import main
+import sys
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        # Imported here, so batch processing doesn't start the app or need a display
+        from eddington_gui.batch.batch_processing import main as batch_main
+
+        sys.exit(batch_main(sys.argv[2:]))
+
+    from eddington_gui.app import main
+
     main().main_loop()
@@ -2,7 +2,7 @@
 import logging
 import sys
 import webbrowser
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, List, Optional
 
 import requests
 import toga
@@ -25,6 +25,7 @@
     FontSize,
 )
 from eddington_gui.logging import LoggerStream, create_logger
+from eddington_gui.readers.data_cache import DataCache
 
 
 class EddingtonGUI(toga.App):  # pylint: disable=too-many-instance-attributes
@@ -37,6 +38,7 @@ class EddingtonGUI(toga.App):  # pylint: disable=too-many-instance-attributes
     plot_boxes: Dict[str, PlotConfigurationBox]
     can_plot_map: Dict[str, Callable[[], bool]]
     app_data: AppData
+    figure_boxes: List[FigureBox]
 
     __font_size: Optional[FontSize] = None
     __has_newer_version: bool = False
@@ -50,6 +52,7 @@ def startup(self):
         show the main window.
         """
         self.app_data = AppData(self.name)
+        self.figure_boxes = []
         self.logger = create_logger(
             name="eddington_gui.app", log_file=self.app_data.log_path
         )
@@ -61,7 +64,9 @@ def startup(self):
         )
         self.on_exit = self.save_style
         self.welcome_box = WelcomeBox(on_start=self.on_start)
-        self.main_box = MainBox(on_back=self.on_back)
+        self.main_box = MainBox(
+            on_back=self.on_back, data_cache=DataCache(self.app_data.cache_dir)
+        )
         self.main_window.content = self.welcome_box
 
         self.check_latest_version()
@@ -189,9 +194,24 @@ def show_figure_window(self, on_draw, title):
         figure_box.add(SaveFigureButton("save", on_draw=on_draw))
         figure_window.content = figure_box
         figure_window.app = self.app
+        figure_window.on_close = lambda window, **kwargs: self.on_figure_window_close(
+            figure_box
+        )
         figure_window.content.set_font_size(self.__font_size)
+        self.figure_boxes.append(figure_box)
         figure_window.show()
 
+    def on_figure_window_close(self, figure_box: FigureBox):
+        """Stop refreshing the figure of a window once it is closed."""
+        if figure_box in self.figure_boxes:
+            self.figure_boxes.remove(figure_box)
+        return True
+
+    def refresh_figures(self):
+        """Redraw all open figures, for example when data has been appended."""
+        for figure_box in self.figure_boxes:
+            figure_box.draw()
+
     def update_content_font(self):
         """Update the font of the content widget."""
         self.main_window.content.set_font_size(self.__font_size)
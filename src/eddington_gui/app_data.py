@@ -28,6 +28,13 @@ def style_data_path(self) -> Path:
         """Path where style is saved."""
         return self.data_dir / "style.json"
 
+    @property
+    def cache_dir(self) -> Path:
+        """Directory where parsed input files are cached."""
+        cache_dir = self.data_dir / "cache"
+        cache_dir.mkdir(exist_ok=True, parents=True)
+        return cache_dir
+
     @property
     def log_dir(self) -> Path:
         """Directory where all logs are saved."""
@@ -0,0 +1 @@
+"""Processing many data files without the GUI."""
@@ -0,0 +1,133 @@
+"""Configuration of the processing of data files, which can be saved as json."""
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+from eddington import EddingtonException
+from eddington.fitting_data import Columns
+
+from eddington_gui.consts import ENCODING
+from eddington_gui.fitting.fitting_function_spec import FittingFunctionSpec
+from eddington_gui.plotting.plot_settings import PlotSettings
+
+PLOT_NAMES = ["Data", "Initial guess", "Fit", "Residuals"]
+
+
+@dataclass
+class BatchConfiguration:  # pylint: disable=too-many-instance-attributes
+    """
+    Everything needed in order to process a data file the way the GUI does.
+
+    :param function: the fitting function
+    :param columns: columns to use as x, x error, y and y error. If none are
+        given, the first four columns of each file are used.
+    :param a0: initial guess of the fit, if any
+    :param sheet: sheet to read from excel files. If None, reads the first sheet.
+    :param selection_rule: rule choosing which records to fit, if any
+    :param module_paths: user modules in which fitting functions are defined
+    :param timeout: seconds after which a fit is stopped, if any
+    :param plots: settings of each plot, by the name of its tab in the GUI
+    """
+
+    function: FittingFunctionSpec
+    columns: Columns = field(default_factory=Columns)
+    a0: Optional[np.ndarray] = None
+    sheet: Optional[str] = None
+    selection_rule: Optional[str] = None
+    module_paths: List[str] = field(default_factory=list)
+    timeout: Optional[float] = None
+    plots: Dict[str, PlotSettings] = field(default_factory=dict)
+
+    def plot_settings(self, plot_name: str) -> PlotSettings:
+        """Settings of a plot, or the default settings if none were given."""
+        return self.plots.get(plot_name, PlotSettings())
+
+    @classmethod
+    def from_dict(cls, configuration: Dict[str, Any]) -> "BatchConfiguration":
+        """
+        Build configuration from a dictionary, as saved by :meth:`to_dict`.
+
+        :param configuration: the configuration
+        :type configuration: Dict[str, Any]
+        :return: batch configuration
+        :rtype: BatchConfiguration
+        :raises EddingtonException: Raised when the configuration is invalid.
+        """
+        if "function" not in configuration:
+            raise EddingtonException("Configuration has no fitting function")
+        function = configuration["function"]
+        plots = configuration.get("plots", {})
+        unknown_plots = sorted(set(plots.keys()) - set(PLOT_NAMES))
+        if len(unknown_plots) != 0:
+            raise EddingtonException(f"Unknown plots: {', '.join(unknown_plots)}")
+        a0 = configuration.get("a0", None)
+        return BatchConfiguration(
+            function=FittingFunctionSpec(
+                name=function["name"], degree=function.get("degree", None)
+            ),
+            columns=Columns(**configuration.get("columns", {})),
+            a0=None if a0 is None else np.array(a0, dtype=float),
+            sheet=configuration.get("sheet", None),
+            selection_rule=configuration.get("selection_rule", None),
+            module_paths=list(configuration.get("module_paths", [])),
+            timeout=configuration.get("timeout", None),
+            plots={
+                name: PlotSettings.from_dict(settings)
+                for name, settings in plots.items()
+            },
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Configuration as a dictionary which can be saved as json."""
+        function: Dict[str, Any] = {"name": self.function.name}
+        if self.function.degree is not None:
+            function["degree"] = self.function.degree
+        return {
+            "function": function,
+            "columns": dict(self.columns.items()),
+            "a0": None if self.a0 is None else [float(value) for value in self.a0],
+            "sheet": self.sheet,
+            "selection_rule": self.selection_rule,
+            "module_paths": list(self.module_paths),
+            "timeout": self.timeout,
+            "plots": {
+                name: settings.to_dict() for name, settings in self.plots.items()
+            },
+        }
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "BatchConfiguration":
+        """
+        Load configuration from a json file.
+
+        :param path: path of the json file
+        :type path: Union[str, Path]
+        :return: batch configuration
+        :rtype: BatchConfiguration
+        :raises EddingtonException: Raised when the configuration is invalid.
+        """
+        try:
+            with open(path, mode="r", encoding=ENCODING) as configuration_file:
+                configuration = json.load(configuration_file)
+        except json.JSONDecodeError as error:
+            raise EddingtonException(
+                f'Configuration file "{path}" is not a valid json: {error}'
+            ) from error
+        try:
+            return cls.from_dict(configuration)
+        except (KeyError, TypeError, ValueError) as error:
+            raise EddingtonException(
+                f'Configuration file "{path}" is invalid: {error}'
+            ) from error
+
+    def save(self, path: Union[str, Path]):
+        """
+        Save configuration as a json file.
+
+        :param path: path of the json file
+        :type path: Union[str, Path]
+        """
+        with open(path, mode="w", encoding=ENCODING) as configuration_file:
+            json.dump(self.to_dict(), configuration_file, indent=2)
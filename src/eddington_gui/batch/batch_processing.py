@@ -0,0 +1,419 @@
+"""Processing data files in parallel worker processes, without a display."""
+import argparse
+import csv
+import glob
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Union
+
+from eddington import (
+    EddingtonException,
+    FittingData,
+    FittingFunction,
+    FittingResult,
+    show_or_export,
+)
+from eddington.plot.figure import Figure
+
+from eddington_gui.batch.batch_configuration import BatchConfiguration
+from eddington_gui.consts import ENCODING
+from eddington_gui.fitting.fit_job import FitJob
+from eddington_gui.fitting.fit_statistics import save_fitting_result_json
+from eddington_gui.plotting.plot_instructions import (
+    add_data_instructions,
+    add_function_instructions,
+    add_residuals_instructions,
+)
+from eddington_gui.plotting.plot_settings import plot_file_name
+from eddington_gui.readers.column_source import (
+    ColumnSource,
+    CsvColumnSource,
+    ExcelColumnSource,
+    is_columnar_file,
+    open_column_source,
+)
+from eddington_gui.readers.compression import is_compressed, uncompressed_suffix
+from eddington_gui.readers.excel_reader import ExcelReader
+from eddington_gui.records.selection_rules import SelectionRule
+from eddington_gui.util import load_user_module
+
+SUMMARY_FILE_NAME = "summary.csv"
+_EXCEL_SUFFIXES = [".xlsx", ".xls"]
+_PLOT_SUFFIXES = OrderedDict(
+    [
+        ("Data", "Data"),
+        ("Initial guess", "Initial Guess"),
+        ("Fit", "Fitting"),
+        ("Residuals", "Residuals"),
+    ]
+)
+
+
+@dataclass
+class BatchResult:
+    """
+    Outcome of processing a single data file.
+
+    :param input_path: the processed file
+    :param output_directory: directory to which the outputs were written
+    :param fitting_result: result of the fit, None if processing has failed
+    :param error: the reason processing has failed, if it has
+    """
+
+    input_path: Path
+    output_directory: Path
+    fitting_result: Optional[FittingResult] = None
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether the file has been processed successfully."""
+        return self.error is None
+
+
+def is_data_file(path: Union[str, Path]) -> bool:
+    """
+    Check whether a file can be read as fitting data.
+
+    :param path: path of the file
+    :type path: Union[str, Path]
+    :return: True for csv, excel and columnar files, which may be compressed.
+    :rtype: bool
+    """
+    path = Path(path)
+    if not path.is_file():
+        return False
+    if is_columnar_file(path):
+        return True
+    suffix = uncompressed_suffix(path)
+    return suffix == ".csv" or (suffix in _EXCEL_SUFFIXES and not is_compressed(path))
+
+
+def find_data_files(inputs: Iterable[str]) -> List[Path]:
+    """
+    Find the data files given as directories, glob patterns or file paths.
+
+    :param inputs: directories, glob patterns or file paths
+    :type inputs: Iterable[str]
+    :return: sorted data files, without duplicates
+    :rtype: List[Path]
+    """
+    paths: Set[Path] = set()
+    for pattern in inputs:
+        for match in glob.glob(pattern, recursive=True) or [pattern]:
+            match_path = Path(match)
+            candidates = (
+                match_path.iterdir() if match_path.is_dir() else iter([match_path])
+            )
+            paths.update(path for path in candidates if is_data_file(path))
+    return sorted(paths)
+
+
+def process_file(
+    input_path: Union[str, Path],
+    configuration: BatchConfiguration,
+    output_directory: Union[str, Path],
+) -> BatchResult:
+    """
+    Process a data file the same way as the GUI does when saving its outputs.
+
+    The data is read, fitted and plotted, and the plots and the fit result are
+    written to the output directory. Plots which cannot be drawn, such as the
+    initial guess when no initial guess was given, are skipped.
+
+    :param input_path: the data file
+    :type input_path: Union[str, Path]
+    :param configuration: how to process the file
+    :type configuration: BatchConfiguration
+    :param output_directory: directory to write the outputs to
+    :type output_directory: Union[str, Path]
+    :return: the outcome of processing the file
+    :rtype: BatchResult
+    """
+    input_path, output_directory = Path(input_path), Path(output_directory)
+    try:
+        func = configuration.function.load()
+        data = read_data_file(input_path, configuration)
+        job = FitJob(data, func, a0=configuration.a0, timeout=configuration.timeout)
+        fitting_result = job.run()
+        output_directory.mkdir(parents=True, exist_ok=True)
+        save_plots(data, func, fitting_result, configuration, output_directory)
+        fitting_result.save_txt(output_directory / f"{func.name}_result.txt")
+        save_fitting_result_json(
+            fitting_result,
+            output_directory / f"{func.name}_result.json",
+            statistics=job.statistics,
+        )
+    # A file which fails, such as a corrupt workbook, should not stop the others
+    except Exception as error:  # pylint: disable=broad-except
+        return BatchResult(input_path, output_directory, error=_error_message(error))
+    return BatchResult(input_path, output_directory, fitting_result=fitting_result)
+
+
+def read_data_file(input_path: Path, configuration: BatchConfiguration) -> FittingData:
+    """
+    Read the fitting data of a file, keeping the records matching the rule.
+
+    :param input_path: the data file
+    :type input_path: Path
+    :param configuration: columns, sheet and selection rule to use
+    :type configuration: BatchConfiguration
+    :return: fitting data
+    :rtype: FittingData
+    """
+    if is_columnar_file(input_path):
+        return _build_fitting_data(open_column_source(input_path), configuration)
+    if uncompressed_suffix(input_path) in _EXCEL_SUFFIXES:
+        with ExcelReader(input_path) as excel_reader:
+            sheet = (
+                excel_reader.sheetnames[0]
+                if configuration.sheet is None
+                else configuration.sheet
+            )
+            return _build_fitting_data(
+                ExcelColumnSource(excel_reader, sheet),
+                configuration,
+            )
+    return _build_fitting_data(CsvColumnSource(input_path), configuration)
+
+
+def save_plots(
+    data: FittingData,
+    func: FittingFunction,
+    fitting_result: FittingResult,
+    configuration: BatchConfiguration,
+    output_directory: Path,
+):
+    """
+    Draw the plots of the GUI and save them as images.
+
+    :param data: the fitted data
+    :type data: FittingData
+    :param func: the fitting function
+    :type func: FittingFunction
+    :param fitting_result: the fit result
+    :type fitting_result: FittingResult
+    :param configuration: settings of the plots
+    :type configuration: BatchConfiguration
+    :param output_directory: directory to save the images in
+    :type output_directory: Path
+    """
+    instructions = {
+        "Data": lambda builder, interval: add_data_instructions(builder, data),
+        "Fit": lambda builder, interval: add_function_instructions(
+            builder, interval, data, func, a=fitting_result.a, label="Fitting"
+        ),
+        "Residuals": lambda builder, interval: add_residuals_instructions(
+            builder, interval, data, func, a=fitting_result.a
+        ),
+    }
+    a0 = configuration.a0
+    if a0 is not None:
+        instructions["Initial guess"] = lambda builder, interval: (
+            add_function_instructions(
+                builder, interval, data, func, a=a0, label="Initial Guess"
+            )
+        )
+    for plot_name, suffix in _PLOT_SUFFIXES.items():
+        if plot_name not in instructions:
+            continue
+        settings = configuration.plot_settings(plot_name)
+        figure_builder = settings.build_figure_builder(
+            title=settings.plot_title(suffix, base_name=func.title_name),
+            xlabel=settings.xlabel or data.x_column,
+            ylabel=settings.ylabel or data.y_column,
+            additional_instructions=instructions[plot_name],
+        )
+        with Figure() as figure:
+            figure_builder.build(figure)
+            settings.set_scale(figure)
+            show_or_export(
+                figure, output_directory / plot_file_name(suffix, func.title_name)
+            )
+
+
+def run_batch(
+    input_paths: Sequence[Path],
+    configuration: BatchConfiguration,
+    output_directory: Union[str, Path],
+    max_workers: Optional[int] = None,
+) -> List[BatchResult]:
+    """
+    Process data files in parallel worker processes.
+
+    The outputs of each file are written to a directory named after it, inside
+    the output directory, and a summary of all fits is written next to them.
+
+    :param input_paths: the data files
+    :type input_paths: Sequence[Path]
+    :param configuration: how to process the files
+    :type configuration: BatchConfiguration
+    :param output_directory: directory to write the outputs to
+    :type output_directory: Union[str, Path]
+    :param max_workers: Optional. Number of worker processes. Defaults to the
+        number of cores.
+    :type max_workers: Optional[int]
+    :return: the outcome of processing each file, in the order of the files
+    :rtype: List[BatchResult]
+    """
+    output_directory = Path(output_directory)
+    output_directory.mkdir(parents=True, exist_ok=True)
+    file_directories = _output_directories(input_paths, output_directory)
+    with ProcessPoolExecutor(
+        max_workers=max(1, min(len(input_paths), max_workers or os.cpu_count() or 1)),
+        initializer=_initialize_worker,
+        initargs=(configuration.module_paths,),
+    ) as executor:
+        futures = OrderedDict(
+            (
+                executor.submit(
+                    process_file, input_path, configuration, file_directory
+                ),
+                (Path(input_path), file_directory),
+            )
+            for input_path, file_directory in zip(input_paths, file_directories)
+        )
+        results_by_future: Dict[Future, BatchResult] = {}
+        for future in as_completed(futures):
+            result = _batch_result(future, *futures[future])
+            results_by_future[future] = result
+            status = "done" if result.succeeded else f"failed: {result.error}"
+            print(f"{result.input_path}: {status}", flush=True)
+    results = [results_by_future[future] for future in futures]
+    write_summary(results, output_directory / SUMMARY_FILE_NAME)
+    return results
+
+
+def write_summary(results: Sequence[BatchResult], path: Path):
+    """
+    Write a csv table of the fit results of all files.
+
+    :param results: outcomes of processing the files
+    :type results: Sequence[BatchResult]
+    :param path: path of the csv file
+    :type path: Path
+    """
+    number_of_parameters = max(
+        (
+            len(result.fitting_result.a)
+            for result in results
+            if result.fitting_result is not None
+        ),
+        default=0,
+    )
+    headers = ["file", "status", "chi2", "degrees_of_freedom", "chi2_reduced"]
+    for i in range(number_of_parameters):
+        headers.extend([f"a[{i}]", f"a[{i}] error"])
+    headers.append("error")
+    with open(path, mode="w", encoding=ENCODING, newline="") as summary_file:
+        writer = csv.writer(summary_file)
+        writer.writerow(headers)
+        for result in results:
+            fitting_result = result.fitting_result
+            if fitting_result is None:
+                writer.writerow(
+                    [str(result.input_path), "failed"]
+                    + [""] * (len(headers) - 3)  # noqa: W503
+                    + [result.error]  # noqa: W503
+                )
+                continue
+            row = [
+                str(result.input_path),
+                "ok",
+                fitting_result.chi2,
+                fitting_result.degrees_of_freedom,
+                fitting_result.chi2_reduced,
+            ]
+            for value, error in zip(fitting_result.a, fitting_result.aerr):
+                row.extend([value, error])
+            writer.writerow(row + [""] * (len(headers) - len(row)))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Command line entry point of batch processing.
+
+    :param argv: Optional. Command line arguments, without the program name.
+    :type argv: Optional[Sequence[str]]
+    :return: exit code, 0 if all files were processed successfully
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        prog="eddington_gui batch",
+        description="Fit and plot data files without opening the GUI.",
+    )
+    parser.add_argument(
+        "configuration", help="json configuration, as saved from the GUI"
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="data files, directories or glob patterns"
+    )
+    parser.add_argument(
+        "-o", "--output", required=True, help="directory to write the outputs to"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="number of worker processes"
+    )
+    args = parser.parse_args(argv)
+    try:
+        configuration = BatchConfiguration.load(args.configuration)
+    except (EddingtonException, OSError) as error:
+        print(error, file=sys.stderr)
+        return 2
+    input_paths = find_data_files(args.inputs)
+    if len(input_paths) == 0:
+        print("No data files were found", file=sys.stderr)
+        return 2
+    results = run_batch(input_paths, configuration, args.output, max_workers=args.jobs)
+    failures = sum(1 for result in results if not result.succeeded)
+    print(
+        f"Processed {len(results)} files, {failures} failed. "
+        f"Summary: {Path(args.output) / SUMMARY_FILE_NAME}"
+    )
+    return 0 if failures == 0 else 1
+
+
+def _build_fitting_data(
+    column_source: ColumnSource, configuration: BatchConfiguration
+) -> FittingData:
+    columns = configuration.columns
+    if all(column is None for column in columns):
+        columns = column_source.default_columns
+    if configuration.selection_rule is None:
+        return column_source.build_fitting_data(columns=columns)
+    # The rule may refer to any column, not only to the used ones
+    fitting_data = column_source.build_fitting_data(columns=columns, all_columns=True)
+    mask = SelectionRule(configuration.selection_rule).mask(fitting_data)
+    fitting_data.records_indices = mask.tolist()
+    return fitting_data
+
+
+def _output_directories(
+    input_paths: Sequence[Path], output_directory: Path
+) -> List[Path]:
+    names = [input_path.name.replace(".", "_") for input_path in input_paths]
+    return [
+        output_directory / (name if names.count(name) == 1 else f"{name}_{i}")
+        for i, name in enumerate(names)
+    ]
+
+
+def _initialize_worker(module_paths: List[str]):
+    for module_path in module_paths:
+        load_user_module(module_path)
+
+
+def _batch_result(future: Future, input_path: Path, output_directory: Path):
+    try:
+        return future.result()
+    # A worker process which has died, or failed to start, fails only its files
+    except Exception as error:  # pylint: disable=broad-except
+        return BatchResult(input_path, output_directory, error=_error_message(error))
+
+
+def _error_message(error: Exception) -> str:
+    return str(error) or type(error).__name__
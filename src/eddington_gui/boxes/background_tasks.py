@@ -0,0 +1,131 @@
+"""Tasks running in the background of a box, sharing its progress box."""
+import asyncio
+from typing import Any, Callable, Dict, Optional
+
+from eddington_gui.boxes.progress_box import ProgressBox
+
+
+class BackgroundTasks:
+    """
+    Named tasks running in the background, whose progress is shown in one box.
+
+    A task can be anything with a ``cancel`` method, such as an asyncio future, a
+    fit job or an ingestion task. At most one task of each name runs at a time:
+    starting a task cancels the previous one of the same name. Progress is shown
+    only for running tasks, and the progress box is hidden once none is running.
+    """
+
+    def __init__(self, progress_box: ProgressBox):
+        """
+        Constructor.
+
+        :param progress_box: box in which the progress of the tasks is shown
+        :type progress_box: ProgressBox
+        """
+        self.progress_box = progress_box
+        self.__tasks: Dict[str, Any] = {}
+
+    def get(self, name: str) -> Any:
+        """
+        Get the running task of the given name.
+
+        :param name: name of the task
+        :type name: str
+        :return: The running task, or None if there is none.
+        :rtype: Any
+        """
+        return self.__tasks.get(name, None)
+
+    def is_running(self, name: str, task: Any) -> bool:
+        """Whether the given task is the latest task of its name started."""
+        return task is not None and task is self.get(name)
+
+    def start(
+        self,
+        name: str,
+        task: Any,
+        text: str,
+        on_cancel: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Start showing the progress of a task, cancelling the previous one if any.
+
+        :param name: name of the task
+        :type name: str
+        :param task: the started task
+        :type task: Any
+        :param text: text describing the task
+        :type text: str
+        :param on_cancel: Optional. Callback to run when the user cancels the task.
+            If None, the task is cancelled and stopped at once.
+        :type on_cancel: Optional[Callable[[], None]]
+        """
+        previous = self.get(name)
+        if previous is not None and previous is not task:
+            previous.cancel()
+        self.__tasks[name] = task
+        self.progress_box.start(
+            text=text,
+            on_cancel=(lambda: self.cancel(name)) if on_cancel is None else on_cancel,
+        )
+
+    def update(  # pylint: disable=too-many-arguments
+        self,
+        name: str,
+        task: Any,
+        text: str,
+        value: Optional[float] = None,
+        max_value: Optional[float] = None,
+    ):
+        """
+        Show the progress of a task, if it is still running.
+
+        :param name: name of the task
+        :type name: str
+        :param task: the task whose progress it is
+        :type task: Any
+        :param text: text describing the current progress
+        :type text: str
+        :param value: Optional. Current progress value.
+        :type value: Optional[float]
+        :param max_value: Optional. Progress value of a finished task.
+        :type max_value: Optional[float]
+        """
+        if self.is_running(name, task):
+            self.progress_box.update(text, value=value, max_value=max_value)
+
+    def stop(self, name: str, task: Any):
+        """Stop showing a task, hiding the progress box if no task is left."""
+        if not self.is_running(name, task):
+            return
+        del self.__tasks[name]
+        if len(self.__tasks) == 0:
+            self.progress_box.stop()
+
+    def cancel(self, name: str):
+        """Cancel the running task of the given name, if there is one."""
+        task = self.get(name)
+        if task is None:
+            return
+        task.cancel()
+        self.stop(name, task)
+
+    async def run(self, name: str, task: asyncio.Future, text: str) -> Any:
+        """
+        Wait for a task, showing its progress until it is done.
+
+        :param name: name of the task
+        :type name: str
+        :param task: the task to wait for
+        :type task: asyncio.Future
+        :param text: text describing the task
+        :type text: str
+        :return: The result of the task
+        :rtype: Any
+        :raises asyncio.CancelledError: Raised when the task has been cancelled.
+        """
+        self.start(name, task, text)
+        try:
+            return await task
+        finally:
+            self.stop(name, task)
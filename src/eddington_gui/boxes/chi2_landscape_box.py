@@ -0,0 +1,187 @@
+"""Box for choosing the grid of parameters over which chi-squared is mapped."""
+from typing import Optional, Tuple
+
+import toga
+from eddington import FittingResult
+from toga.style import Pack
+from toga.style.pack import COLUMN
+
+from eddington_gui.boxes.eddington_box import EddingtonBox
+from eddington_gui.boxes.line_box import LineBox
+from eddington_gui.consts import (
+    CHI2_LANDSCAPE_POINTS,
+    CHI2_LANDSCAPE_SPAN,
+    SMALL_INPUT_WIDTH,
+    SMALL_PADDING,
+)
+from eddington_gui.fitting.chi2_landscape import (
+    Chi2Landscape,
+    landscape_axis,
+    new_chi2_landscape,
+)
+from eddington_gui.util import value_or_none
+
+
+class Chi2LandscapeBox(EddingtonBox):  # pylint: disable=too-many-instance-attributes
+    """Visual box for choosing two parameters and the grid of their values."""
+
+    __first_index_input: toga.NumberInput
+    __second_index_input: toga.NumberInput
+    __points_input: toga.NumberInput
+    __span_input: toga.NumberInput
+    __first_min_input: toga.TextInput
+    __first_max_input: toga.TextInput
+    __second_min_input: toga.TextInput
+    __second_max_input: toga.TextInput
+    __status_label: toga.Label
+
+    def __init__(self, on_compute):
+        """Initialize box."""
+        super().__init__(style=Pack(direction=COLUMN))
+        self.__first_index_input = toga.NumberInput(
+            min_value=0, value=0, style=Pack(width=60)
+        )
+        self.__second_index_input = toga.NumberInput(
+            min_value=0, value=1, style=Pack(width=60)
+        )
+        self.__points_input = toga.NumberInput(
+            min_value=2, value=CHI2_LANDSCAPE_POINTS, style=Pack(width=60)
+        )
+        self.__span_input = toga.NumberInput(
+            min_value=0.1, step=0.1, value=CHI2_LANDSCAPE_SPAN, style=Pack(width=60)
+        )
+        self.__first_min_input = _bound_input()
+        self.__first_max_input = _bound_input()
+        self.__second_min_input = _bound_input()
+        self.__second_max_input = _bound_input()
+        self.__status_label = toga.Label(text="")
+        self.add(
+            LineBox(
+                children=[
+                    toga.Label(text="Parameters: a["),
+                    self.__first_index_input,
+                    toga.Label(text="] and a["),
+                    self.__second_index_input,
+                    toga.Label(text="]"),
+                    toga.Label(text="Points:", style=Pack(padding_left=SMALL_PADDING)),
+                    self.__points_input,
+                    toga.Label(
+                        text="Span (errors):", style=Pack(padding_left=SMALL_PADDING)
+                    ),
+                    self.__span_input,
+                    toga.Button(
+                        text="Compute",
+                        on_press=on_compute,
+                        style=Pack(padding_left=SMALL_PADDING),
+                    ),
+                ]
+            ),
+            LineBox(
+                children=[
+                    toga.Label(text="First range:"),
+                    self.__first_min_input,
+                    toga.Label(text="to"),
+                    self.__first_max_input,
+                    toga.Label(
+                        text="Second range:", style=Pack(padding_left=SMALL_PADDING)
+                    ),
+                    self.__second_min_input,
+                    toga.Label(text="to"),
+                    self.__second_max_input,
+                ]
+            ),
+            self.__status_label,
+        )
+
+    @property
+    def first_index(self) -> int:
+        """Index of the parameter on the x axis."""
+        return int(self.__first_index_input.value)
+
+    @property
+    def second_index(self) -> int:
+        """Index of the parameter on the y axis."""
+        return int(self.__second_index_input.value)
+
+    @property
+    def points(self) -> int:
+        """Number of values of each parameter."""
+        return int(self.__points_input.value)
+
+    @property
+    def span(self) -> float:
+        """Number of standard errors on each side of the fitted values."""
+        return float(self.__span_input.value)
+
+    @property
+    def first_bounds(self) -> Optional[Tuple[float, float]]:
+        """Range of the first parameter, or None to use the span."""
+        return _bounds(self.__first_min_input, self.__first_max_input)
+
+    @property
+    def second_bounds(self) -> Optional[Tuple[float, float]]:
+        """Range of the second parameter, or None to use the span."""
+        return _bounds(self.__second_min_input, self.__second_max_input)
+
+    def new_landscape(self, fitting_result: FittingResult) -> Chi2Landscape:
+        """
+        Create the chosen grid around a fit result, with no rows computed yet.
+
+        :param fitting_result: fit result around which the grid is laid
+        :type fitting_result: FittingResult
+        :return: The new chi-squared landscape
+        :rtype: Chi2Landscape
+        :raises ValueError: Raised when the chosen parameters or ranges are invalid.
+        """
+        number_of_parameters = len(fitting_result.a)
+        if self.first_index == self.second_index:
+            raise ValueError("Choose two different parameters")
+        if max(self.first_index, self.second_index) >= number_of_parameters:
+            raise ValueError(
+                f"The fitting function has only {number_of_parameters} parameters"
+            )
+        first_values, second_values = [
+            landscape_axis(
+                value=fitting_result.a[index],
+                error=fitting_result.aerr[index],
+                span=self.span,
+                points=self.points,
+                bounds=bounds,
+            )
+            for index, bounds in [
+                (self.first_index, self.first_bounds),
+                (self.second_index, self.second_bounds),
+            ]
+        ]
+        return new_chi2_landscape(
+            a=fitting_result.a,
+            first_index=self.first_index,
+            second_index=self.second_index,
+            first_values=first_values,
+            second_values=second_values,
+        )
+
+    def show(self, landscape: Optional[Chi2Landscape]):
+        """Show how much of the grid has been computed."""
+        if landscape is None:
+            self.__status_label.text = ""
+            return
+        self.__status_label.text = (
+            f"Computed {landscape.done} of {landscape.total} rows of "
+            f"a[{landscape.first_index}] by a[{landscape.second_index}]"
+        )
+
+
+def _bound_input() -> toga.TextInput:
+    return toga.TextInput(placeholder="auto", style=Pack(width=SMALL_INPUT_WIDTH))
+
+
+def _bounds(
+    min_input: toga.TextInput, max_input: toga.TextInput
+) -> Optional[Tuple[float, float]]:
+    low, high = value_or_none(min_input.value), value_or_none(max_input.value)
+    if low is None and high is None:
+        return None
+    if low is None or high is None:
+        raise ValueError("Both ends of a range should be given")
+    return float(low), float(high)
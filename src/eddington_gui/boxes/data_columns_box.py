@@ -1,14 +1,35 @@
+# pylint: disable=too-many-public-methods
 """Box for choosing which columns to use in data dictionary."""
+import functools
 from pathlib import Path
-from typing import Callable, List, Optional, Union
+from typing import Awaitable, Callable, List, Optional, Tuple, Union
 
 import toga
-from eddington import FittingData
+from eddington import FittingData, FittingDataError
+from eddington.fitting_data import Columns
 from toga.style import Pack
 from toga.style.pack import LEFT
 
 from eddington_gui.boxes.line_box import LineBox
-from eddington_gui.util import value_or_none
+from eddington_gui.consts import PROJECTED_LOAD_MIN_COLUMNS
+from eddington_gui.exceptions import INPUT_FILE_ERRORS
+from eddington_gui.readers.column_source import (
+    ColumnSource,
+    CsvColumnSource,
+    ExcelColumnSource,
+    open_column_source,
+)
+from eddington_gui.readers.compression import is_compressed
+from eddington_gui.readers.csv_follower import (
+    CsvFollower,
+    append_rows,
+    appended_records_indices,
+)
+from eddington_gui.readers.data_cache import DataCache
+from eddington_gui.readers.excel_reader import ExcelReader
+from eddington_gui.readers.ingestion_task import IngestionTask
+from eddington_gui.records.record_selection import RecordSelection
+from eddington_gui.util import run_in_background, value_or_none
 
 
 class DataColumnsBox(LineBox):  # pylint: disable=too-many-instance-attributes
@@ -23,25 +44,38 @@ class DataColumnsBox(LineBox):  # pylint: disable=too-many-instance-attributes
     yerr_selection: toga.Selection
 
     __fitting_data: Optional[FittingData]
+    __record_selection: Optional[RecordSelection]
+    __data_cache: Optional[DataCache]
+    __column_source: Optional[ColumnSource]
+    __csv_file: Optional[Path]
+    __csv_size: Optional[int]
+    __data_version: int
     __on_columns_change: Optional[Callable[[FittingData], None]]
 
-    def __init__(self, on_columns_change):
+    on_read_columns: Optional[Callable[[Columns], Awaitable[None]]] = None
+
+    def __init__(self, on_columns_change, data_cache: Optional[DataCache] = None):
         """Initialize box."""
         super().__init__()
         self.__fitting_data = None
+        self.__record_selection = None
+        self.__data_cache = data_cache
+        self.__column_source = None
+        self.__csv_file = self.__csv_size = None
+        self.__data_version = 0
         self.on_columns_change = None
 
         self.x_selection = self.__add_column_option(
-            text="X column:", on_select=lambda widget: self.set_columns()
+            text="X column:", on_select=self.select_columns
         )
         self.xerr_selection = self.__add_column_option(
-            text="X error column:", on_select=lambda widget: self.set_columns()
+            text="X error column:", on_select=self.select_columns
         )
         self.y_selection = self.__add_column_option(
-            text="Y column:", on_select=lambda widget: self.set_columns()
+            text="Y column:", on_select=self.select_columns
         )
         self.yerr_selection = self.__add_column_option(
-            text="Y error column:", on_select=lambda widget: self.set_columns()
+            text="Y error column:", on_select=self.select_columns
         )
         self.on_columns_change = on_columns_change
 
@@ -55,13 +89,19 @@ def fitting_data(self, fitting_data: FittingData):
         """
         Fit data setter.
 
-        If fit data is None, reset all selections
+        If fit data is None, reset all selections. When data is read from a column
+        source, all of the source columns are offered for selection.
         """
         self.__fitting_data = fitting_data
         if fitting_data is None:
+            self.__column_source = None
+            self.__csv_file = self.__csv_size = None
             self.clear_selections()
             return
-        items = list(fitting_data.data.keys())
+        if self.column_source is None:
+            items = list(fitting_data.data.keys())
+        else:
+            items = self.column_source.headers
         used_columns = self.fitting_data.used_columns
         self.set_items(self.x_selection, items, used_columns.x)
         self.set_items(self.xerr_selection, items, used_columns.xerr)
@@ -70,6 +110,29 @@ def fitting_data(self, fitting_data: FittingData):
         self.selection_enabled = True
         self.set_columns()
 
+    @property
+    def record_selection(self) -> Optional[RecordSelection]:
+        """Selection of the records of the fitting data, if any."""
+        if self.fitting_data is None:
+            return None
+        if (
+            self.__record_selection is None
+            or self.__record_selection.fitting_data
+            is not self.fitting_data  # noqa: W503
+        ):
+            self.__record_selection = RecordSelection(self.fitting_data)
+        return self.__record_selection
+
+    @property
+    def data_version(self) -> int:
+        """Number of times the data or its chosen columns have changed."""
+        return self.__data_version
+
+    @property
+    def column_source(self) -> Optional[ColumnSource]:
+        """Source from which columns are read on demand, if any."""
+        return self.__column_source
+
     @property
     def on_columns_change(self) -> Optional[Callable]:
         """on_columns_change getter."""
@@ -139,40 +202,329 @@ def clear_selections(self):
         self.set_items(self.yerr_selection, [], None)
         self.run_on_columns_change()
 
+    async def select_columns(self, widget):  # pylint: disable=unused-argument
+        """
+        Handler of the column selections.
+
+        Chosen columns which haven't been read from the column source yet are read
+        in the background first, using on_read_columns, while the selections are
+        disabled. If they cannot be read, the previous columns are chosen again.
+        """
+        if not self.selection_enabled:
+            return
+        column_source = self.column_source
+        if column_source is not None and not self.__has_selected_columns():
+            previous_columns = self.fitting_data.used_columns
+            self.selection_enabled = False
+            await self.__read_columns(self.__selected_columns())
+            if self.column_source is not column_source:
+                # Another file has been read meanwhile, or the data has been reset
+                return
+            if not self.__has_selected_columns():
+                self.__choose_columns(previous_columns)
+                return
+            self.selection_enabled = True
+        self.set_columns()
+
     def set_columns(self):
-        """Set columns of the fit data based on the selection of the user."""
+        """
+        Set columns of the fit data based on the selection of the user.
+
+        The chosen columns should have been read already. If a chosen column cannot
+        be used, such as a non numeric column, the error is shown and the previous
+        columns are chosen again.
+        """
         if not self.selection_enabled:
             return
-        self.fitting_data.x_column = self.x_selection.value
-        self.fitting_data.xerr_column = self.xerr_selection.value
-        self.fitting_data.y_column = self.y_selection.value
-        self.fitting_data.yerr_column = self.yerr_selection.value
+        previous_columns = self.fitting_data.used_columns
+        try:
+            self.__set_used_columns(
+                Columns(
+                    x=self.x_selection.value,
+                    xerr=self.xerr_selection.value,
+                    y=self.y_selection.value,
+                    yerr=self.yerr_selection.value,
+                )
+            )
+        except INPUT_FILE_ERRORS as error:
+            self.window.error_dialog(title="Input data error", message=str(error))
+            self.__choose_columns(previous_columns)
+            return
         self.run_on_columns_change()
 
     def run_on_columns_change(self):
-        """If on_columns_change is not None, runs it."""
+        """Count the change of the data, and run on_columns_change if not None."""
+        self.__data_version += 1
         if self.on_columns_change is not None:
             self.on_columns_change(self.fitting_data)
 
-    def read_csv(self, filepath: Union[str, Path]):
+    async def read_csv(
+        self, filepath: Union[str, Path], task: Optional[IngestionTask] = None
+    ):
         """
-        Read data from csv file.
+        Read data from csv file in the background.
+
+        If the file has been read before, it is loaded from the data cache instead.
+        Files with many columns are read column by column, reading and caching only
+        the used columns. The fitting data is replaced only once the file has been
+        read.
+
+        Compressed files are decompressed while being read. For uncompressed files,
+        only the bytes the file has when starting to read are read, so rows
+        appended later on can be added using :meth:`create_csv_follower`.
 
         :param filepath: path of the csv file
         :type filepath: Union[str, Path]
+        :param task: Optional. Task used for reporting progress and cancellation.
+        :type task: Optional[IngestionTask]
         """
-        self.fitting_data = FittingData.read_from_csv(filepath)
+        size = None if is_compressed(filepath) else Path(filepath).stat().st_size
+        fitting_data, column_source = await run_in_background(
+            self.__load,
+            filepath,
+            open_source=functools.partial(CsvColumnSource, filepath, size=size),
+            task=task,
+        )
+        if task is not None:
+            task.check_cancelled()
+        self.__column_source = column_source
+        self.fitting_data = fitting_data
+        self.__csv_file = None if size is None else Path(filepath)
+        self.__csv_size = size
 
-    def read_excel(self, filepath: Union[str, Path], sheet: str):
+    async def read_excel(
+        self,
+        excel_reader: ExcelReader,
+        sheet: str,
+        task: Optional[IngestionTask] = None,
+        parsed_data: Optional[FittingData] = None,
+    ):
         """
-        Read data from excel file.
+        Read data from excel file in the background.
 
-        :param filepath: path of the excel file
-        :type filepath: Union[str, Path]
+        If the sheet has been read before, it is loaded from the data cache instead.
+        Sheets with many columns are read column by column, reading and caching only
+        the used columns. The fitting data is replaced only once the sheet has been
+        read.
+
+        :param excel_reader: An open reader of the excel file. It should be kept
+            open for as long as the data of the sheet is in use.
+        :type excel_reader: ExcelReader
         :param sheet: sheet from which to read the data.
         :type sheet: str
+        :param task: Optional. Task used for reporting progress and cancellation.
+        :type task: Optional[IngestionTask]
+        :param parsed_data: Optional. Data already parsed from the sheet, such as
+            when validating it, which is used instead of parsing it again.
+        :type parsed_data: Optional[FittingData]
+        """
+        fitting_data, column_source = await run_in_background(
+            self.__load,
+            excel_reader.filepath,
+            sheet=sheet,
+            open_source=functools.partial(ExcelColumnSource, excel_reader, sheet),
+            task=task,
+            parsed_data=parsed_data,
+        )
+        if task is not None:
+            task.check_cancelled()
+        self.__column_source = column_source
+        self.__csv_file = self.__csv_size = None
+        self.fitting_data = fitting_data
+
+    def create_csv_follower(self) -> CsvFollower:
+        """
+        Create a follower of the csv file, starting after the part already read.
+
+        :return: csv follower
+        :rtype: CsvFollower
+        :raises FittingDataError: Raised when the data was not read from a csv file.
+        """
+        if self.__csv_file is None or self.__csv_size is None:
+            raise FittingDataError(
+                "Only data read from an uncompressed csv file can be followed."
+            )
+        return CsvFollower(self.__csv_file, offset=self.__csv_size)
+
+    async def append_rows(
+        self,
+        rows: List[List[str]],
+        replace_last: bool = False,
+        size: Optional[int] = None,
+    ) -> int:
+        """
+        Append rows read by a csv follower to the fitting data in the background.
+
+        The used columns and the records selection are kept, including records
+        selected while the rows are appended. Since the columns do not change,
+        on_columns_change does not run, but the data version increases.
+
+        :param rows: rows appended to the csv file
+        :type rows: List[List[str]]
+        :param replace_last: whether the first row replaces the last record
+        :type replace_last: bool
+        :param size: Optional. Number of bytes of the file read so far, up to the
+            last complete line.
+        :type size: Optional[int]
+        :return: number of added records, 0 if the data has been replaced meanwhile
+        :rtype: int
+        """
+        fitting_data, record_selection = self.fitting_data, self.record_selection
+        if fitting_data is None or record_selection is None or len(rows) == 0:
+            return 0
+        headers = None if self.column_source is None else self.column_source.headers
+        selection_version = record_selection.version
+        appended_data, number_of_records = await run_in_background(
+            append_rows, fitting_data, rows, replace_last=replace_last, headers=headers
+        )
+        if self.fitting_data is not fitting_data:
+            return 0
+        if record_selection.version != selection_version:
+            appended_data.records_indices = appended_records_indices(
+                fitting_data.records_indices, appended_data.number_of_records
+            )
+        self.__fitting_data = appended_data
+        if size is not None:
+            self.__csv_size = size
+        if isinstance(self.column_source, CsvColumnSource):
+            self.column_source.size = self.__csv_size
+            self.column_source.reset_columns(
+                {
+                    column: self.fitting_data.column_data(column, only_selected=False)
+                    for column in self.fitting_data.all_columns
+                }
+            )
+        self.__data_version += 1
+        return number_of_records
+
+    async def read_columnar(
+        self, filepath: Union[str, Path], task: Optional[IngestionTask] = None
+    ):
+        """
+        Read data from a columnar file (npz, parquet or feather) in the background.
+
+        Only the headers and the used columns are read. Other columns are read
+        once they are selected.
+
+        :param filepath: path of the columnar file
+        :type filepath: Union[str, Path]
+        :param task: Optional. Task used for reporting progress and cancellation.
+        :type task: Optional[IngestionTask]
+        """
+        column_source = await run_in_background(open_column_source, filepath)
+        fitting_data = await run_in_background(
+            column_source.build_fitting_data, task=task
+        )
+        if task is not None:
+            task.check_cancelled()
+        self.__column_source = column_source
+        self.__csv_file = self.__csv_size = None
+        self.fitting_data = fitting_data
+
+    async def load_columns(
+        self, columns: Columns, task: Optional[IngestionTask] = None
+    ):
         """
-        self.fitting_data = FittingData.read_from_excel(filepath, sheet)
+        Read columns from the column source into the fitting data in the background.
+
+        The records selection is kept. If the data is replaced while reading, such
+        as when rows are appended to it, the read columns are not used.
+
+        :param columns: columns to use as x, x error, y and y error
+        :type columns: Columns
+        :param task: Optional. Task used for reporting progress and cancellation.
+        :type task: Optional[IngestionTask]
+        """
+        fitting_data = self.fitting_data
+        column_source = self.column_source
+        if fitting_data is None or column_source is None:
+            return
+        loaded_data = await run_in_background(
+            column_source.build_fitting_data, columns=columns, task=task
+        )
+        if task is not None:
+            task.check_cancelled()
+        if self.fitting_data is not fitting_data:
+            return
+        loaded_data.records_indices = list(fitting_data.records_indices)
+        self.__fitting_data = loaded_data
+
+    def __set_used_columns(self, columns: Columns):
+        self.fitting_data.x_column = columns.x
+        self.fitting_data.xerr_column = columns.xerr
+        self.fitting_data.y_column = columns.y
+        self.fitting_data.yerr_column = columns.yerr
+
+    def __choose_columns(self, columns: Columns):
+        self.__set_used_columns(columns)
+        self.selection_enabled = False
+        for selection, column in zip(
+            [
+                self.x_selection,
+                self.xerr_selection,
+                self.y_selection,
+                self.yerr_selection,
+            ],
+            columns,
+        ):
+            if column is not None:
+                selection.value = column
+        self.selection_enabled = True
+
+    def __selected_columns(self) -> Columns:
+        return Columns(
+            x=self.x_column,
+            xerr=self.xerr_column,
+            y=self.y_column,
+            yerr=self.yerr_column,
+        )
+
+    def __has_selected_columns(self) -> bool:
+        return all(
+            column is None or column in self.fitting_data.all_columns
+            for column in self.__selected_columns()
+        )
+
+    async def __read_columns(self, columns: Columns):
+        if self.on_read_columns is not None:
+            await self.on_read_columns(columns)
+            return
+        try:
+            await self.load_columns(columns)
+        except INPUT_FILE_ERRORS as error:
+            self.window.error_dialog(title="Input data error", message=str(error))
+
+    def __load(  # pylint: disable=too-many-arguments
+        self,
+        filepath: Union[str, Path],
+        open_source: Callable[[], ColumnSource],
+        sheet: Optional[str] = None,
+        task: Optional[IngestionTask] = None,
+        parsed_data: Optional[FittingData] = None,
+    ) -> Tuple[FittingData, Optional[ColumnSource]]:
+        column_source = open_source()
+        projected = len(column_source.headers) >= PROJECTED_LOAD_MIN_COLUMNS
+        read = functools.partial(
+            column_source.build_fitting_data, task=task, all_columns=not projected
+        )
+        if parsed_data is not None:
+            fitting_data = parsed_data
+        elif self.__data_cache is None:
+            fitting_data = read()
+        else:
+            fitting_data = self.__data_cache.load_or_read(
+                filepath, read=read, sheet=sheet
+            )
+        if not projected:
+            return fitting_data, None
+        # Only the used columns are cached, so the source reads the other ones
+        column_source.reset_columns(
+            {
+                column: fitting_data.column_data(column, only_selected=False)
+                for column in fitting_data.all_columns
+            }
+        )
+        return fitting_data, column_source
 
     def __add_column_option(self, text, on_select):
         self.add(toga.Label(text=text))
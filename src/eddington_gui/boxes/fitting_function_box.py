@@ -6,7 +6,12 @@
 from toga.style import Pack
 
 from eddington_gui.boxes.line_box import LineBox
-from eddington_gui.consts import BIG_PADDING, NO_VALUE, POLYNOMIAL
+from eddington_gui.consts import (
+    BIG_PADDING,
+    MAX_POLYNOMIAL_DEGREE,
+    NO_VALUE,
+    POLYNOMIAL,
+)
 
 
 class FittingFunctionBox(LineBox):  # pylint: disable=too-many-instance-attributes
@@ -41,7 +46,7 @@ def __init__(self, on_fitting_function_load):
 
         self.polynomial_degree_title = toga.Label("Degree:")
         self.polynomial_degree_input = toga.NumberInput(
-            min_value=1, max_value=5, value=1
+            min_value=1, max_value=MAX_POLYNOMIAL_DEGREE, value=1
         )
 
         # The lambda function depends on the full initialization of
@@ -92,6 +97,20 @@ def update_fitting_function_options(self):
             FittingFunctionsRegistry.names()
         )
 
+    def select_fitting_function(self, name: str, degree: Optional[int] = None):
+        """
+        Select a fitting function, as if the user has chosen it.
+
+        :param name: name of the fitting function, or "polynomial"
+        :type name: str
+        :param degree: Optional. Degree of the polynomial, if this is a polynomial.
+        :type degree: Optional[int]
+        """
+        if self.fitting_function_state != name:
+            self.fitting_function_selection.value = name
+        if degree is not None and int(self.polynomial_degree_input.value) != degree:
+            self.polynomial_degree_input.value = degree
+
     def load_select_fitting_function_name(
         self, widget
     ):  # pylint: disable=unused-argument
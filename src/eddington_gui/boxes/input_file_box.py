@@ -1,13 +1,22 @@
 """Box for choosing from which file to load the input data."""
 from pathlib import Path
-from typing import Callable
+from typing import Awaitable, Callable, Dict, List, Optional
 
 import toga
-from openpyxl import load_workbook
 from toga.style import Pack
 
 from eddington_gui.boxes.line_box import LineBox
-from eddington_gui.consts import NO_VALUE, SMALL_PADDING
+from eddington_gui.consts import (
+    INVALID_SHEET_MARK,
+    NO_VALUE,
+    SMALL_PADDING,
+    VALID_SHEET_MARK,
+)
+from eddington_gui.exceptions import INPUT_FILE_ERRORS
+from eddington_gui.readers.column_source import is_columnar_file
+from eddington_gui.readers.compression import is_compressed, uncompressed_suffix
+from eddington_gui.readers.excel_reader import ExcelReader
+from eddington_gui.util import run_in_background
 
 
 class InputFileBox(LineBox):  # pylint: disable=too-many-instance-attributes
@@ -17,24 +26,39 @@ class InputFileBox(LineBox):  # pylint: disable=too-many-instance-attributes
     __select_file_button: toga.Button
     __sheet_label: toga.Label
     __sheet_selection: toga.Selection
+    __follow_switch: toga.Switch
 
     __sheet_selection_enabled: bool
+    __follow_enabled: bool
+    __ignore_sheet_selection: bool
+    __excel_reader: Optional[ExcelReader]
+    __sheets_names: List[str]
+    __sheets_validity: Dict[str, bool]
 
     def __init__(  # pylint: disable=too-many-arguments
         self,
         on_choose_records,
         on_input_file_change: Callable[[], None],
-        on_csv_read: Callable[[Path], None],
-        on_excel_read: Callable[[Path, str], None],
-        on_select_excel_file: Callable[[], None],
+        on_csv_read: Callable[[Path], Awaitable[None]],
+        on_excel_read: Callable[[Path, str], Awaitable[None]],
+        on_select_excel_file: Callable[[], Awaitable[None]],
+        on_columnar_read: Callable[[Path], Awaitable[None]],
+        on_follow: Callable[[bool], Awaitable[None]],
     ):
         """Initialize box."""
         super().__init__()
         self.__sheet_selection_enabled = False
+        self.__follow_enabled = False
+        self.__ignore_sheet_selection = False
+        self.__excel_reader = None
+        self.__sheets_names = []
+        self.__sheets_validity = {}
         self.on_input_file_change = on_input_file_change
         self.on_csv_read = on_csv_read
         self.on_excel_read = on_excel_read
         self.on_select_excel_file = on_select_excel_file
+        self.on_columnar_read = on_columnar_read
+        self.on_follow = on_follow
 
         self.__input_file_path = toga.TextInput(readonly=True, style=Pack(flex=1))
         self.__select_file_button = toga.Button(
@@ -55,6 +79,11 @@ def __init__(  # pylint: disable=too-many-arguments
 
         self.__sheet_label = toga.Label(text="Sheet:")
         self.__sheet_selection = toga.Selection(on_select=self.select_sheet)
+        self.__follow_switch = toga.Switch(
+            text="Follow",
+            on_change=self.toggle_follow,
+            style=Pack(padding_left=SMALL_PADDING),
+        )
 
     @property
     def file_path(self):
@@ -71,6 +100,8 @@ def file_path(self, file_path):
         """
         if file_path is None:
             self.__input_file_path.value = ""
+            self.excel_reader = None
+            self.follow_enabled = False
         else:
             self.__input_file_path.value = str(file_path)
         self.on_input_file_change()
@@ -78,19 +109,56 @@ def file_path(self, file_path):
     @property
     def sheets_options(self):
         """Sheets options getter. Relevant for excel files."""
-        return self.__sheet_selection.items
+        return list(self.__sheets_names)
 
     @sheets_options.setter
     def sheets_options(self, options):
         """Sheets options setter. Relevant for excel files."""
+        self.__sheets_validity = {}
         if options is None:
+            self.__sheets_names = []
             self.__sheet_selection.items = []
             self.sheet_selection_enabled = False
 
         else:
+            self.__sheets_names = list(options)
             self.__sheet_selection.items = options
             self.sheet_selection_enabled = True
 
+    def set_sheet_validity(self, sheet: str, is_valid: bool):
+        """
+        Mark a sheet as valid or invalid in the sheet selection.
+
+        :param sheet: name of the sheet
+        :type sheet: str
+        :param is_valid: whether the sheet contains valid fitting data
+        :type is_valid: bool
+        """
+        if sheet not in self.__sheets_names:
+            return
+        self.__sheets_validity[sheet] = is_valid
+        selected_sheet = self.selected_sheet
+        self.__ignore_sheet_selection = True
+        try:
+            self.__sheet_selection.items = [
+                self.__sheet_label_text(name) for name in self.__sheets_names
+            ]
+        finally:
+            self.__ignore_sheet_selection = False
+        self.selected_sheet = selected_sheet
+
+    @property
+    def excel_reader(self) -> Optional[ExcelReader]:
+        """Open reader of the chosen excel file, kept for the whole session."""
+        return self.__excel_reader
+
+    @excel_reader.setter
+    def excel_reader(self, excel_reader: Optional[ExcelReader]):
+        """Set the excel file reader, closing the previous one."""
+        if self.__excel_reader is not None and self.__excel_reader is not excel_reader:
+            self.__excel_reader.close()
+        self.__excel_reader = excel_reader
+
     @property
     def sheet_selection_enabled(self):
         """Whether sheet selection is enabled or not."""
@@ -107,6 +175,35 @@ def sheet_selection_enabled(self, sheet_selection_enabled):
             self.insert(2, self.__sheet_label)
             self.insert(3, self.__sheet_selection)
 
+    @property
+    def follow_enabled(self):
+        """Whether following the input file is available. Relevant for csv files."""
+        return self.__follow_enabled
+
+    @follow_enabled.setter
+    def follow_enabled(self, follow_enabled):
+        """Show/hide the follow switch, turning following off when hidden."""
+        old_enabled = self.__follow_enabled
+        self.__follow_enabled = follow_enabled
+        if old_enabled and not follow_enabled:
+            self.follow = False
+            self.remove(self.__follow_switch)
+        if not old_enabled and follow_enabled:
+            self.insert(
+                self.children.index(self.__select_file_button) + 1,
+                self.__follow_switch,
+            )
+
+    @property
+    def follow(self) -> bool:
+        """Whether the input file is followed for appended rows."""
+        return self.__follow_switch.value
+
+    @follow.setter
+    def follow(self, follow: bool):
+        """Start/stop following the input file."""
+        self.__follow_switch.value = follow
+
     @property
     def on_input_file_change(self) -> Callable[[], None]:
         """on_input_file_change getter."""
@@ -124,40 +221,80 @@ async def select_file(self, widget):  # pylint: disable=unused-argument
         )
         if input_file_path is None:
             return
+        self.follow_enabled = False
         self.file_path = input_file_path
-        suffix = input_file_path.suffix
-        if suffix in [".xlsx", ".xls"]:
-            excel_file = load_workbook(input_file_path)
-            self.sheets_options = [NO_VALUE] + excel_file.sheetnames
-            self.on_select_excel_file()
+        suffix = uncompressed_suffix(input_file_path)
+        compressed = await run_in_background(is_compressed, input_file_path)
+        if suffix in [".xlsx", ".xls"] and not compressed:
+            try:
+                self.excel_reader = await run_in_background(
+                    ExcelReader, input_file_path
+                )
+            except INPUT_FILE_ERRORS as error:
+                self.file_path = None
+                self.window.error_dialog(title="Input data error", message=str(error))
+                return
+            self.sheets_options = [NO_VALUE] + self.excel_reader.sheetnames
+            await self.on_select_excel_file()
             return
+        self.excel_reader = None
         self.sheets_options = None
         if suffix == ".csv":
-            self.on_csv_read(input_file_path)
+            await self.on_csv_read(input_file_path)
+            self.follow_enabled = self.file_path != "" and not compressed
+            return
+        if is_columnar_file(input_file_path) and not compressed:
+            await self.on_columnar_read(input_file_path)
             return
+        if compressed:
+            suffix = "".join(input_file_path.suffixes)
         self.file_path = None
         self.window.error_dialog(
             title="Invalid Input Source",
             message=f"Cannot process file with suffix {suffix}",
         )
 
+    async def toggle_follow(self, widget):
+        """Start or stop following the input file."""
+        await self.on_follow(widget.value)
+
     @property
     def selected_sheet(self):
         """Getter for the chosen sheet."""
-        return self.__sheet_selection.value
+        return self.__sheet_name(self.__sheet_selection.value)
 
     @selected_sheet.setter
     def selected_sheet(self, selected_sheet):
-        """Setter for the chosen sheet."""
-        if selected_sheet is None:
-            self.__sheet_selection.value = NO_VALUE
-        else:
-            self.__sheet_selection.value = selected_sheet
+        """
+        Setter for the chosen sheet.
+
+        Setting the sheet programmatically does not read it again.
+        """
+        self.__ignore_sheet_selection = True
+        try:
+            if selected_sheet is None:
+                self.__sheet_selection.value = NO_VALUE
+            else:
+                self.__sheet_selection.value = self.__sheet_label_text(selected_sheet)
+        finally:
+            self.__ignore_sheet_selection = False
 
-    def select_sheet(self, widget):
+    async def select_sheet(self, widget):
         """Select sheet to read data from. Relevant for excel files."""
-        value = widget.value
-        if value == NO_VALUE:
+        value = self.__sheet_name(widget.value)
+        if self.__ignore_sheet_selection or value == NO_VALUE:
             return
         file_path_value = Path(self.file_path)
-        self.on_excel_read(file_path_value, value)
+        await self.on_excel_read(file_path_value, value)
+
+    def __sheet_label_text(self, sheet: str) -> str:
+        if sheet not in self.__sheets_validity:
+            return sheet
+        mark = VALID_SHEET_MARK if self.__sheets_validity[sheet] else INVALID_SHEET_MARK
+        return f"{sheet} {mark}"
+
+    def __sheet_name(self, label_text: Optional[str]) -> Optional[str]:
+        for sheet in self.__sheets_names:
+            if self.__sheet_label_text(sheet) == label_text:
+                return sheet
+        return label_text
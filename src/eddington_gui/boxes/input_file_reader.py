@@ -0,0 +1,347 @@
+"""Reading the input file into the data columns box in the background."""
+import asyncio
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, Union
+
+from eddington import FittingDataError
+from eddington.fitting_data import Columns
+
+from eddington_gui.boxes.background_tasks import BackgroundTasks
+from eddington_gui.boxes.data_columns_box import DataColumnsBox
+from eddington_gui.boxes.input_file_box import InputFileBox
+from eddington_gui.consts import CSV_FOLLOW_INTERVAL, NO_VALUE
+from eddington_gui.exceptions import INPUT_FILE_ERRORS, IngestionCancelledError
+from eddington_gui.readers.column_source import ExcelColumnSource
+from eddington_gui.readers.csv_follower import CsvFollower
+from eddington_gui.readers.data_cache import DataCache
+from eddington_gui.readers.ingestion_task import IngestionProgress, IngestionTask
+from eddington_gui.readers.sheet_validation import find_first_valid_sheet
+from eddington_gui.util import run_in_background, to_size_string
+
+INGESTION = "ingestion"
+
+
+class InputFileReader:
+    """
+    Reads the file chosen in its input file box into the data columns box.
+
+    Files are read in the background, showing their progress as the
+    :data:`INGESTION` background task, from which reading can be cancelled.
+    Reading a new file cancels the previous one. Errors are reported through the
+    ``on_error`` callback, and the input file is reset.
+    """
+
+    input_file_box: InputFileBox
+    __csv_follower: Optional[CsvFollower] = None
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        data_columns_box: DataColumnsBox,
+        background_tasks: BackgroundTasks,
+        on_choose_records: Callable,
+        on_input_file_change: Callable[[], None],
+        on_error: Callable[[str, str], None],
+        on_records_append: Callable[[], None],
+        data_cache: Optional[DataCache] = None,
+    ):
+        """
+        Constructor.
+
+        :param data_columns_box: box into which files are read
+        :type data_columns_box: DataColumnsBox
+        :param background_tasks: background tasks showing the reading progress
+        :type background_tasks: BackgroundTasks
+        :param on_choose_records: handler of the "choose records" button
+        :type on_choose_records: Callable
+        :param on_input_file_change: callback to run when the input file changes
+        :type on_input_file_change: Callable[[], None]
+        :param on_error: callback showing an error, given its title and message
+        :type on_error: Callable[[str, str], None]
+        :param on_records_append: callback to run when records have been appended
+            to the followed csv file
+        :type on_records_append: Callable[[], None]
+        :param data_cache: Optional. Cache of the data of read files.
+        :type data_cache: Optional[DataCache]
+        """
+        self.data_columns_box = data_columns_box
+        self.background_tasks = background_tasks
+        self.on_error = on_error
+        self.on_records_append = on_records_append
+        self.data_cache = data_cache
+        self.input_file_box = InputFileBox(
+            on_choose_records=on_choose_records,
+            on_input_file_change=on_input_file_change,
+            on_csv_read=self.read_csv,
+            on_excel_read=self.read_excel,
+            on_select_excel_file=self.select_default_sheet,
+            on_columnar_read=self.read_columnar,
+            on_follow=self.follow,
+        )
+        self.data_columns_box.on_read_columns = self.read_columns
+
+    async def read_csv(self, filepath: Union[str, Path]):
+        """
+        Read data from csv file in the background.
+
+        If failing to read the file, reset the input file path and fit data.
+
+        :param filepath: path of the csv file
+        :type filepath: Union[str, Path]
+        """
+        await self.__read_input_file(filepath, read=self.data_columns_box.read_csv)
+
+    async def read_columnar(self, filepath: Union[str, Path]):
+        """
+        Read data from a columnar file in the background.
+
+        If failing to read the file, reset the input file path and fit data.
+
+        :param filepath: path of the columnar file
+        :type filepath: Union[str, Path]
+        """
+        await self.__read_input_file(filepath, read=self.data_columns_box.read_columnar)
+
+    async def read_excel(self, filepath: Union[str, Path], sheet: str):
+        """
+        Read data from excel file in the background.
+
+        If failing to read the file, reset the selected sheet and fit data.
+
+        :param filepath: path of the excel file
+        :type filepath: Union[str, Path]
+        :param sheet: sheet from which to read the data.
+        :type sheet: str
+        """
+        excel_reader = self.input_file_box.excel_reader
+        if excel_reader is None:
+            return
+        task = self.start_ingestion(filepath, sheet=sheet)
+        try:
+            await self.data_columns_box.read_excel(excel_reader, sheet, task=task)
+        except IngestionCancelledError:
+            if self.is_running_ingestion(task):
+                self.input_file_box.selected_sheet = None
+        except INPUT_FILE_ERRORS as error:
+            self.on_error("Input data error", str(error))
+            self.data_columns_box.fitting_data = None
+            self.input_file_box.selected_sheet = None
+        finally:
+            self.stop_ingestion(task)
+
+    async def read_columns(self, columns: Columns):
+        """
+        Read chosen columns from the column source of the data in the background.
+
+        If failing to read the columns, the data is kept as is.
+
+        :param columns: the chosen columns
+        :type columns: Columns
+        """
+        column_source = self.data_columns_box.column_source
+        if column_source is None:
+            return
+        task = self.start_ingestion(
+            column_source.filepath,
+            sheet=(
+                column_source.sheet
+                if isinstance(column_source, ExcelColumnSource)
+                else None
+            ),
+        )
+        try:
+            await self.data_columns_box.load_columns(columns, task=task)
+        except IngestionCancelledError:
+            pass
+        except INPUT_FILE_ERRORS as error:
+            self.on_error("Input data error", str(error))
+        finally:
+            self.stop_ingestion(task)
+
+    async def select_default_sheet(self):
+        """
+        Automatically choose the first valid sheet.
+
+        All sheets are validated concurrently in separate processes, and the first
+        valid sheet in the workbook order is loaded, reusing the data parsed while
+        validating it. The validity of each sheet is shown in the sheet selection.
+
+        If it fails to find a valid sheet, resets the input file.
+        """
+        file_path = Path(self.input_file_box.file_path)
+        sheets = [
+            sheet for sheet in self.input_file_box.sheets_options if sheet != NO_VALUE
+        ]
+        task = self.start_ingestion(file_path)
+        self.background_tasks.update(
+            INGESTION,
+            task,
+            text=f"Validating {len(sheets)} sheets of {file_path.name}...",
+        )
+        try:
+            valid_sheet = await find_first_valid_sheet(
+                file_path,
+                sheets,
+                on_validation=self.input_file_box.set_sheet_validity,
+                cache_directory=(
+                    None if self.data_cache is None else self.data_cache.directory
+                ),
+                task=task,
+            )
+            excel_reader = self.input_file_box.excel_reader
+            # The input file has been reset while its sheets were validated
+            if excel_reader is None:
+                return
+            if valid_sheet is not None:
+                sheet, parsed_data = valid_sheet
+                await self.data_columns_box.read_excel(
+                    excel_reader,
+                    sheet,
+                    task=task,
+                    parsed_data=parsed_data,
+                )
+                self.input_file_box.selected_sheet = sheet
+                return
+        except IngestionCancelledError:
+            if self.is_running_ingestion(task):
+                self.input_file_box.file_path = None
+            return
+        except INPUT_FILE_ERRORS:
+            pass
+        finally:
+            self.stop_ingestion(task)
+
+        if self.data_columns_box.fitting_data is None:
+            self.on_error(
+                "Input data error",
+                "No sheet available with valid data.\n"
+                "Please fix the file or load another one.",
+            )
+            self.input_file_box.file_path = None
+
+    async def follow(self, enabled: bool):
+        """
+        Start or stop following the input csv file.
+
+        While following, rows appended to the file are read periodically and added
+        to the fitting data, keeping the records selection.
+
+        :param enabled: whether to start or stop following
+        :type enabled: bool
+        """
+        if not enabled:
+            self.stop_following()
+            return
+        try:
+            follower = await run_in_background(
+                self.data_columns_box.create_csv_follower
+            )
+        except (FittingDataError, OSError) as error:
+            self.on_error("Follow error", str(error))
+            self.input_file_box.follow = False
+            return
+        self.__csv_follower = follower
+        while self.__csv_follower is follower:
+            await asyncio.sleep(CSV_FOLLOW_INTERVAL)
+            if self.__csv_follower is not follower:
+                return
+            try:
+                rows, replace_last = await run_in_background(follower.read_new_rows)
+                if self.__csv_follower is not follower:
+                    return
+                await self.data_columns_box.append_rows(
+                    rows, replace_last=replace_last, size=follower.complete_offset
+                )
+            except (FittingDataError, OSError) as error:
+                self.stop_following()
+                self.input_file_box.follow = False
+                self.on_error("Follow error", str(error))
+                return
+            if len(rows) != 0:
+                self.on_records_append()
+
+    def stop_following(self):
+        """Stop following the input csv file, if it is followed."""
+        self.__csv_follower = None
+
+    def start_ingestion(
+        self, filepath: Union[str, Path], sheet: Optional[str] = None
+    ) -> IngestionTask:
+        """
+        Start a new ingestion task, cancelling the previous one if still running.
+
+        Progress reported by the worker thread is passed to the event loop, which
+        updates the progress box.
+
+        :param filepath: path of the read file
+        :type filepath: Union[str, Path]
+        :param sheet: Optional. Sheet which is read, relevant for excel files.
+        :type sheet: Optional[str]
+        :return: The new ingestion task
+        :rtype: IngestionTask
+        """
+        loop = asyncio.get_event_loop()
+        name = (
+            Path(filepath).name if sheet is None else f"{Path(filepath).name}:{sheet}"
+        )
+        task = IngestionTask()
+
+        def on_progress(progress: IngestionProgress):
+            loop.call_soon_threadsafe(
+                self.show_ingestion_progress, task, name, progress
+            )
+
+        task.on_progress = on_progress
+        self.background_tasks.start(
+            INGESTION, task, text=f"Reading {name}...", on_cancel=task.cancel
+        )
+        return task
+
+    def show_ingestion_progress(
+        self, task: IngestionTask, name: str, progress: IngestionProgress
+    ):
+        """Show progress of an ingestion task, if it is still the running one."""
+        if task.cancelled:
+            return
+        text = f"Reading {name}: {progress.rows:,} rows"
+        if progress.bytes_read is not None and progress.total_bytes is not None:
+            text += (
+                f" ({to_size_string(progress.bytes_read)}"
+                f" / {to_size_string(progress.total_bytes)})"
+            )
+            self.background_tasks.update(
+                INGESTION,
+                task,
+                text,
+                value=progress.bytes_read,
+                max_value=progress.total_bytes,
+            )
+            return
+        self.background_tasks.update(
+            INGESTION, task, text, value=progress.rows, max_value=progress.total_rows
+        )
+
+    def is_running_ingestion(self, task: IngestionTask) -> bool:
+        """Whether the given task is the latest ingestion task started."""
+        return self.background_tasks.is_running(INGESTION, task)
+
+    def stop_ingestion(self, task: IngestionTask):
+        """Stop showing the progress of the given task, if it is the running one."""
+        self.background_tasks.stop(INGESTION, task)
+
+    async def __read_input_file(
+        self,
+        filepath: Union[str, Path],
+        read: Callable[..., Awaitable[None]],
+    ):
+        task = self.start_ingestion(filepath)
+        try:
+            await read(filepath, task=task)
+        except IngestionCancelledError:
+            if self.is_running_ingestion(task):
+                self.input_file_box.file_path = None
+        except INPUT_FILE_ERRORS as error:
+            self.on_error("Input data error", str(error))
+            self.data_columns_box.fitting_data = None
+            self.input_file_box.file_path = None
+        finally:
+            self.stop_ingestion(task)
@@ -1,8 +1,9 @@
-# pylint: disable=too-many-public-methods,too-many-instance-attributes
+# pylint: disable=too-many-public-methods,too-many-instance-attributes,too-many-lines
 """Main Eddington box."""
-import importlib
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Callable, Dict, Optional, Union
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 import toga
@@ -10,30 +11,60 @@
     EddingtonException,
     FigureBuilder,
     FittingData,
-    FittingDataError,
+    FittingFunction,
     FittingResult,
-    fit,
-    show_or_export,
 )
+from eddington.fitting_data import Columns
 from eddington.interval import Interval
-from eddington.plot.figure import Figure
-from eddington.plot.line_style import LineStyle
 from toga.style import Pack
 from travertino.constants import COLUMN
 
+from eddington_gui.batch.batch_configuration import PLOT_NAMES, BatchConfiguration
+from eddington_gui.boxes.background_tasks import BackgroundTasks
+from eddington_gui.boxes.chi2_landscape_box import Chi2LandscapeBox
 from eddington_gui.boxes.data_columns_box import DataColumnsBox
 from eddington_gui.boxes.eddington_box import EddingtonBox
 from eddington_gui.boxes.fitting_function_box import FittingFunctionBox
 from eddington_gui.boxes.input_file_box import InputFileBox
+from eddington_gui.boxes.input_file_reader import InputFileReader
 from eddington_gui.boxes.line_box import LineBox
 from eddington_gui.boxes.output_box import OutputBox
 from eddington_gui.boxes.parameters_box import ParametersBox
 from eddington_gui.boxes.plot_configuration_box import PlotConfigurationBox
+from eddington_gui.boxes.progress_box import ProgressBox
+from eddington_gui.boxes.resampling_box import ResamplingBox
 from eddington_gui.buttons.plot_button import PlotButton
-from eddington_gui.consts import NO_VALUE, SMALL_PADDING, FontSize
+from eddington_gui.consts import DEFAULT_FIT_TIMEOUT, SMALL_PADDING, FontSize
+from eddington_gui.exceptions import FitCancelledError
+from eddington_gui.fitting.chi2_landscape import Chi2Landscape, compute_chi2_landscape
+from eddington_gui.fitting.fit_job import FitJob, FitProgress
+from eddington_gui.fitting.fit_result_cache import FitResultCache
+from eddington_gui.fitting.fit_statistics import FitStatistics, save_fitting_result_json
+from eddington_gui.fitting.fitting_function_spec import FittingFunctionSpec
+from eddington_gui.fitting.influence import Influence, linearized_influence
+from eddington_gui.fitting.resampling import ResamplingResult, leave_one_out, resample
+from eddington_gui.fitting.warm_start import FitRecord, warm_start_a0
+from eddington_gui.plotting.figure_cache import FigureCache
+from eddington_gui.plotting.plot_instructions import (
+    add_chi2_landscape_instructions,
+    add_convergence_instructions,
+    add_data_instructions,
+    add_function_instructions,
+    add_histogram_instructions,
+    add_residuals_instructions,
+)
+from eddington_gui.readers.data_cache import DataCache
+from eddington_gui.util import load_user_module, run_in_background
 from eddington_gui.window.explore_window import ExploreWindow
+from eddington_gui.window.model_search_window import ModelSearchWindow
 from eddington_gui.window.records_choice_window import RecordsChoiceWindow
 
+# Names of the tasks running in the background, besides reading the input file
+_FIT = "fit"
+_RESAMPLING = "resampling"
+_CHI2_LANDSCAPE = "chi2 landscape"
+_INFLUENCE = "influence"
+
 
 class MainBox(EddingtonBox):
     """Class representing the main box of the application."""
@@ -42,17 +73,40 @@ class MainBox(EddingtonBox):
     fitting_function_box: FittingFunctionBox
     initial_guess_box: ParametersBox
     data_columns_box: DataColumnsBox
+    progress_box: ProgressBox
+    fit_timeout_input: toga.NumberInput
+    warm_start_switch: toga.Switch
+    resampling_box: ResamplingBox
+    chi2_landscape_box: Chi2LandscapeBox
     plot_options_container: toga.OptionContainer
     output_box: OutputBox
 
     __a0: Optional[np.ndarray] = None
     __fitting_result: Optional[FittingResult] = None
+    __fit_future: Optional[asyncio.Future] = None
+    __fit_outdated: bool = False
+    __last_fit: Optional[FitRecord] = None
+    __fit_version: int = 0
+    __resampling: Optional[ResamplingResult] = None
+    __chi2_landscape: Optional[Chi2Landscape] = None
+    __records_window: Optional[RecordsChoiceWindow] = None
 
-    def __init__(self, on_back: Callable[[], None]):
+    def __init__(
+        self, on_back: Callable[[], None], data_cache: Optional[DataCache] = None
+    ):
         """Constructor."""
         self.plot_boxes: Dict[str, PlotConfigurationBox] = {}
-        self.can_plot_map: Dict[str, Callable[[], None]] = {}
+        self.can_plot_map: Dict[str, Callable[[], Awaitable[bool]]] = {}
+        self.data_cache = data_cache
+        self.fit_result_cache = FitResultCache()
+        self.figure_cache = FigureCache()
+        self.__module_paths: List[str] = []
         super().__init__(style=Pack(direction=COLUMN))
+        self.resampling_box = ResamplingBox(
+            on_resample=self.resample,
+            on_parameter_change=self.__refresh_figures,
+        )
+        self.chi2_landscape_box = Chi2LandscapeBox(on_compute=self.compute_landscape)
 
         self.add(
             LineBox(
@@ -62,30 +116,43 @@ def __init__(self, on_back: Callable[[], None]):
                 ]
             )
         )
-        self.input_file_box = InputFileBox(
-            on_choose_records=self.choose_records,
-            on_input_file_change=self.reset_fitting_data,
-            on_csv_read=self.read_csv,
-            on_excel_read=self.read_excel,
-            on_select_excel_file=self.select_default_sheet,
-        )
-        self.add(self.input_file_box)
-
+        self.progress_box = ProgressBox()
+        self.__background_tasks = BackgroundTasks(self.progress_box)
         self.data_columns_box = DataColumnsBox(
-            on_columns_change=self.on_data_columns_change
+            on_columns_change=self.on_data_columns_change, data_cache=data_cache
         )
         self.data_columns_box.add(
             toga.Button(
                 "Explore", on_press=self.explore, style=Pack(padding_left=SMALL_PADDING)
             )
         )
-        self.add(self.data_columns_box)
+        self.__input_file_reader = InputFileReader(
+            data_columns_box=self.data_columns_box,
+            background_tasks=self.__background_tasks,
+            on_choose_records=self.choose_records,
+            on_input_file_change=self.reset_fitting_data,
+            on_error=self.__show_error,
+            on_records_append=self.on_records_append,
+            data_cache=data_cache,
+        )
+        self.input_file_box = self.__input_file_reader.input_file_box
+        self.add(self.input_file_box, self.progress_box, self.data_columns_box)
 
         self.fitting_function_box = FittingFunctionBox(
             on_fitting_function_load=self.on_fitting_function_load
         )
+        self.fit_timeout_input = toga.NumberInput(
+            min_value=1, value=DEFAULT_FIT_TIMEOUT, style=Pack(width=60)
+        )
+        self.warm_start_switch = toga.Switch(
+            text="Warm start", value=True, style=Pack(padding_left=SMALL_PADDING)
+        )
         self.fitting_function_box.add(
             toga.Button(text="Fit", on_press=self.fit),
+            toga.Label(text="Timeout (s):", style=Pack(padding_left=SMALL_PADDING)),
+            self.fit_timeout_input,
+            self.warm_start_switch,
+            toga.Button(text="Find best model", on_press=self.find_best_model),
             toga.Button(text="Load module", on_press=self.load_module),
         )
         self.add(self.fitting_function_box)
@@ -126,26 +193,109 @@ def __init__(self, on_back: Callable[[], None]):
             can_plot=self.can_plot_fit,
             has_legend=False,
         )
+        self.add_plot_configuration_box(
+            option_text="Convergence",
+            button_text="Plot convergence",
+            additional_instructions=self.plot_convergence_instructions,
+            suffix="Convergence",
+            can_plot=self.can_plot_convergence,
+            has_legend=False,
+            has_columns_labels=False,
+        )
+        self.add_plot_configuration_box(
+            option_text="Parameters distribution",
+            button_text="Plot distribution",
+            additional_instructions=self.plot_resampling_instructions,
+            suffix="Parameters Distribution",
+            can_plot=self.can_plot_resampling,
+            has_columns_labels=False,
+        )
+        self.plot_boxes["Parameters distribution"].add(self.resampling_box)
+        self.add_plot_configuration_box(
+            option_text="Chi\u00b2 landscape",
+            button_text="Plot landscape",
+            additional_instructions=self.plot_landscape_instructions,
+            suffix="Chi2 Landscape",
+            can_plot=self.can_plot_landscape,
+            has_columns_labels=False,
+        )
+        self.plot_boxes["Chi\u00b2 landscape"].add(self.chi2_landscape_box)
         self.plot_options_container = toga.OptionContainer(style=Pack(flex=5))
         for label, box in self.plot_boxes.items():
             self.plot_options_container.add(label, box)
 
         self.add(self.plot_options_container)
 
-        self.output_box = OutputBox(on_save_output=self.on_save_output)
+        self.output_box = OutputBox(
+            on_save_output=self.on_save_output,
+            on_save_configuration=self.on_save_configuration,
+        )
         self.add(self.output_box)
 
     @property
-    def fitting_result(self):
-        """Getter of the fit result."""
-        if self.__fitting_result is None:
-            self.__calculate_fitting_result()
+    def fitting_result(self) -> Optional[FittingResult]:
+        """
+        Getter of the fit result.
+
+        None if no fit has finished since the data, the fitting function or the
+        initial guess have changed. Use :meth:`calculate_fitting_result` in order
+        to fit.
+        """
         return self.__fitting_result
 
     @fitting_result.setter
     def fitting_result(self, fitting_result):
         """Setter of the fit result."""
         self.__fitting_result = fitting_result
+        self.__fit_version += 1
+
+    @property
+    def fit_timeout(self) -> Optional[float]:
+        """Seconds after which a fit is stopped, or None if there is no limit."""
+        value = self.fit_timeout_input.value
+        return None if value is None else float(value)
+
+    @property
+    def last_fit(self) -> Optional[FitRecord]:
+        """The last fit which has finished, if any."""
+        return self.__last_fit
+
+    @property
+    def fit_statistics(self) -> Optional[FitStatistics]:
+        """Counters and timers of the fit which produced the fit result, if known."""
+        if (
+            self.fitting_result is None
+            or self.__last_fit is None  # noqa: W503
+            or self.__last_fit.fitting_result is not self.fitting_result  # noqa: W503
+        ):
+            return None
+        return self.__last_fit.statistics
+
+    @property
+    def resampling(self) -> Optional[ResamplingResult]:
+        """Parameters fitted to resampled records, if resampling has started."""
+        return self.__resampling
+
+    @property
+    def figure_state(self) -> Tuple[int, Optional[int], int, int]:
+        """
+        Versions of everything drawn in the figures, besides their configuration.
+
+        The fit version increases whenever the fit result, or anything computed
+        from it, changes.
+        """
+        record_selection = self.data_columns_box.record_selection
+        return (
+            self.data_columns_box.data_version,
+            None if record_selection is None else record_selection.version,
+            self.__fit_version,
+            self.resampling_box.parameter_index,
+        )
+
+    @property
+    def chi2_landscape(self) -> Optional[Chi2Landscape]:
+        """Chi-squared over a grid of two parameters, if it has been computed."""
+        return self.__chi2_landscape
 
     def add_plot_configuration_box(  # pylint: disable=too-many-arguments
         self,
@@ -155,12 +305,16 @@ def add_plot_configuration_box(  # pylint: disable=too-many-arguments
         can_plot,
         suffix,
         has_legend=True,
+        has_columns_labels=True,
     ):
         """Build a plot configuration box."""
         plot_configuration_box = PlotConfigurationBox(
             additional_instructions=additional_instructions,
             suffix=suffix,
             has_legend=has_legend,
+            has_columns_labels=has_columns_labels,
+            figure_cache=self.figure_cache,
+            figure_state=lambda: self.figure_state,
         )
         plot_configuration_box.add(
             PlotButton(
@@ -176,9 +330,21 @@ def add_plot_configuration_box(  # pylint: disable=too-many-arguments
     def on_data_columns_change(self, fitting_data):
         """Run those methods when data columns are changed."""
         self.reset_fitting_result()
+        self.__update_records_window()
         for plot_box in self.plot_boxes.values():
             plot_box.on_fitting_data_load(fitting_data)
 
+    def on_records_append(self):
+        """
+        Run those methods when records are appended to the followed input file.
+
+        Nothing computed from the fit is cancelled. The fit is redone on the new
+        records once it is needed and nothing computed from it is running.
+        """
+        self.__fit_outdated = True
+        self.__update_records_window()
+        self.app.refresh_figures()
+
     def on_fitting_function_load(self, fitting_function):
         """Run those methods when fitting function is changed."""
         self.reset_fitting_result()
@@ -186,7 +352,7 @@ def on_fitting_function_load(self, fitting_function):
         for plot_box in self.plot_boxes.values():
             plot_box.on_fitting_function_load(fitting_function)
 
-    def on_save_output(self, widget):  # pylint: disable=unused-argument
+    async def on_save_output(self, widget):  # pylint: disable=unused-argument
         """Handler for the "save to output directory" button."""
         if self.output_box.output_directory is None:
             self.window.error_dialog(
@@ -198,80 +364,102 @@ def on_save_output(self, widget):  # pylint: disable=unused-argument
         if not output_dir.exists():
             output_dir.mkdir()
         for option_label, plot_box in self.plot_boxes.items():
-            if self.can_plot_map[option_label]():
-                with Figure() as fig:
-                    plot_box.on_draw(plot_box, fig)
-                    show_or_export(fig, output_dir / plot_box.file_name)
-        if self.fitting_function_box.fitting_function is not None:
+            if await self.can_plot_map[option_label]():
+                (output_dir / plot_box.file_name).write_bytes(plot_box.render_png())
+        fitting_result = await self.calculate_fitting_result()
+        if fitting_result is not None:
             func_name = self.fitting_function_box.fitting_function.name
-            self.fitting_result.save_txt(output_dir / f"{func_name}_result.txt")
-            self.fitting_result.save_json(output_dir / f"{func_name}_result.json")
+            fitting_result.save_txt(output_dir / f"{func_name}_result.txt")
+            save_fitting_result_json(
+                fitting_result,
+                output_dir / f"{func_name}_result.json",
+                statistics=self.fit_statistics,
+            )
         self.window.info_dialog(
             title="Save output", message="All plots have been saved successfully!"
         )
 
-    def read_csv(self, filepath: Union[str, Path]):
-        """
-        Read data from csv file.
-
-        If failing to read the file, reset the input file path and fit data.
-
-        :param filepath: path of the csv file
-        :type filepath: Union[str, Path]
+    async def on_save_configuration(self, widget):  # pylint: disable=unused-argument
         """
-        try:
-            self.data_columns_box.read_csv(filepath)
-        except FittingDataError as error:
-            self.window.error_dialog(title="Input data error", message=str(error))
-            self.data_columns_box.fitting_data = None
-            self.input_file_box.file_path = None
-
-    def read_excel(self, filepath: Union[str, Path], sheet: str):
-        """
-        Read data from excel file.
-
-        If failing to read the file, reset the selected sheet and fit data.
+        Handler for the "save configuration" button.
 
-        :param filepath: path of the excel file
-        :type filepath: Union[str, Path]
-        :param sheet: sheet from which to read the data.
-        :type sheet: str
+        The configuration can be used for processing many data files the same way
+        from the command line, with ``python -m eddington_gui batch``.
         """
+        fitting_function = self.fitting_function_box.fitting_function
+        if fitting_function is None:
+            self.window.error_dialog(
+                title="Save configuration error",
+                message="No fitting function was chosen",
+            )
+            return
         try:
-            self.data_columns_box.read_excel(filepath, sheet)
-        except FittingDataError as error:
-            self.window.error_dialog(title="Input data error", message=str(error))
-            self.data_columns_box.fitting_data = None
-            self.input_file_box.selected_sheet = None
+            configuration = BatchConfiguration(
+                function=FittingFunctionSpec.from_function(fitting_function),
+                columns=Columns(
+                    x=self.data_columns_box.x_column,
+                    xerr=self.data_columns_box.xerr_column,
+                    y=self.data_columns_box.y_column,
+                    yerr=self.data_columns_box.yerr_column,
+                ),
+                a0=self.initial_guess_box.a0,
+                sheet=self.input_file_box.selected_sheet,
+                module_paths=list(self.__module_paths),
+                timeout=self.fit_timeout,
+                plots={
+                    label: plot_box.settings
+                    for label, plot_box in self.plot_boxes.items()
+                    if label in PLOT_NAMES
+                },
+            )
+        except EddingtonException as error:
+            self.window.error_dialog(
+                title="Save configuration error", message=str(error)
+            )
+            return
+        file_path = await self.window.save_file_dialog(
+            title="Save configuration",
+            suggested_filename="configuration.json",
+            file_types=["json"],
+        )
+        if file_path is None:
+            return
+        configuration.save(file_path)
 
-    def choose_records(self, widget):  # pylint: disable=unused-argument
+    def choose_records(self, widget):
         """Open the choose records window."""
         if self.data_columns_box.fitting_data is None:
             self.window.info_dialog(
                 title="Choose Records", message="No data been given yet"
             )
             return
+        if self.__records_window is not None and not self.__records_window.closed:
+            self.__records_window.close_window(widget)
         window = RecordsChoiceWindow(
-            fitting_data=self.data_columns_box.fitting_data,
+            record_selection=self.data_columns_box.record_selection,
             font_size=self.font_size,
             on_change=self.reset_fitting_result,
+            on_analyze_influence=self.analyze_influence,
         )
         window.app = self.app
         window.show()
+        self.__records_window = window
 
-    def can_plot_fit(self):
-        """Can plot a fitting plot."""
-        return (
-            self.fitting_result is not None
-            and self.fitting_function_box.fitting_function is not None  # noqa: W503
-            and self.__has_data()  # noqa: W503
-        )
+    async def can_plot_fit(self) -> bool:
+        """
+        Can plot a fitting plot.
 
-    def can_plot_data(self):
+        If needed, waits for the data to be fitted without blocking the event loop.
+        """
+        if self.fitting_function_box.fitting_function is None or not self.__has_data():
+            return False
+        return await self.calculate_fitting_result() is not None
+
+    async def can_plot_data(self) -> bool:
         """Can plot a data plot."""
         return self.__has_data()
 
-    def can_plot_initial_guess(self):
+    async def can_plot_initial_guess(self) -> bool:
         """Can plot initial guess plot."""
         return (
             self.initial_guess_box.a0 is not None
@@ -279,21 +467,47 @@ def can_plot_initial_guess(self):
             and self.__has_data()  # noqa: W503
         )
 
+    async def can_plot_convergence(self) -> bool:
+        """
+        Can plot chi2 along the iterations of the fit.
+
+        If needed, waits for the data to be fitted without blocking the event loop.
+        Fits solved in closed form have no iterations to plot.
+        """
+        if not await self.can_plot_fit():
+            return False
+        statistics = self.fit_statistics
+        return statistics is not None and len(statistics.chi2_trace) != 0
+
+    async def can_plot_resampling(self) -> bool:
+        """Can plot the distribution of a parameter over the resamples."""
+        return (
+            self.__resampling is not None
+            and len(self.__resampling.samples) != 0  # noqa: W503
+            and self.resampling_box.parameter_index  # noqa: W503
+            < self.__resampling.samples.shape[1]  # noqa: W503
+        )
+
+    async def can_plot_landscape(self) -> bool:
+        """Can plot chi-squared over a grid of two parameters."""
+        return self.__chi2_landscape is not None
+
     def plot_data_instructions(
         self, figure_builder: FigureBuilder, interval: Interval
     ):  # pylint: disable=unused-argument
         """Instruction for plotting data."""
-        figure_builder.add_data(data=self.data_columns_box.fitting_data, label="Data")
+        add_data_instructions(figure_builder, self.data_columns_box.fitting_data)
 
     def plot_initial_guess_instructions(
         self, figure_builder: FigureBuilder, interval: Interval
     ):
         """Instruction for plotting initial guess."""
-        figure_builder.add_data(data=self.data_columns_box.fitting_data, label="Data")
-        figure_builder.add_plot(
-            interval=interval.intersect(self.data_columns_box.fitting_data.x_domain),
+        add_function_instructions(
+            figure_builder,
+            interval,
+            data=self.data_columns_box.fitting_data,
             func=self.fitting_function_box.fitting_function,
-            a=self.fitting_result.a0,
+            a=self.initial_guess_box.a0,
             label="Initial Guess",
         )
 
@@ -301,11 +515,16 @@ def plot_fitting_instructions(
         self, figure_builder: FigureBuilder, interval: Interval
     ):
         """Instruction for plotting fitting."""
-        figure_builder.add_data(data=self.data_columns_box.fitting_data, label="Data")
-        figure_builder.add_plot(
-            interval=interval.intersect(self.data_columns_box.fitting_data.x_domain),
+        fitting_result = self.__fitting_result_or_refit()
+        if fitting_result is None:
+            add_data_instructions(figure_builder, self.data_columns_box.fitting_data)
+            return
+        add_function_instructions(
+            figure_builder,
+            interval,
+            data=self.data_columns_box.fitting_data,
             func=self.fitting_function_box.fitting_function,
-            a=self.fitting_result.a,
+            a=fitting_result.a,
             label="Fitting",
         )
 
@@ -313,26 +532,50 @@ def plot_residuals_instructions(
         self, figure_builder: FigureBuilder, interval: Interval
     ):
         """Instruction for plotting residuals."""
-        y = (
-            self.fitting_function_box.fitting_function(  # pylint: disable=not-callable
-                self.fitting_result.a, self.data_columns_box.fitting_data.x
-            )
-            - self.data_columns_box.fitting_data.y
-        )
-        figure_builder.add_horizontal_line(
-            interval=interval.intersect(self.data_columns_box.fitting_data.x_domain),
-            y_value=0,
-            linestyle=LineStyle.DASHED,
-            color="black",
+        fitting_result = self.__fitting_result_or_refit()
+        if fitting_result is None:
+            return
+        add_residuals_instructions(
+            figure_builder,
+            interval,
+            data=self.data_columns_box.fitting_data,
+            func=self.fitting_function_box.fitting_function,
+            a=fitting_result.a,
         )
-        figure_builder.add_error_bar(
-            x=self.data_columns_box.fitting_data.x,
-            y=y,
-            xerr=self.data_columns_box.fitting_data.xerr,
-            yerr=self.data_columns_box.fitting_data.yerr,
-            label="Residuals",
+
+    def plot_convergence_instructions(
+        self, figure_builder: FigureBuilder, interval: Interval
+    ):  # pylint: disable=unused-argument
+        """Instruction for plotting chi2 along the iterations of the fit."""
+        statistics = self.fit_statistics
+        if statistics is None:
+            return
+        add_convergence_instructions(figure_builder, statistics.chi2_trace)
+
+    def plot_resampling_instructions(
+        self, figure_builder: FigureBuilder, interval: Interval
+    ):  # pylint: disable=unused-argument
+        """Instruction for plotting the distribution of a resampled parameter."""
+        if self.__resampling is None or len(self.__resampling.samples) == 0:
+            return
+        index = self.resampling_box.parameter_index
+        if index >= self.__resampling.samples.shape[1]:
+            return
+        add_histogram_instructions(
+            figure_builder,
+            values=self.__resampling.samples[:, index],
+            marked_value=self.__resampling.a[index],
+            label=f"Fitted a[{index}]",
         )
 
+    def plot_landscape_instructions(
+        self, figure_builder: FigureBuilder, interval: Interval
+    ):  # pylint: disable=unused-argument
+        """Instruction for plotting chi-squared over a grid of two parameters."""
+        if self.__chi2_landscape is None:
+            return
+        add_chi2_landscape_instructions(figure_builder, self.__chi2_landscape)
+
     def explore(self, widget):  # pylint: disable=unused-argument
         """Explore different fitting functions and parameters to fit the data."""
         if not self.__has_data():
@@ -342,18 +585,310 @@ def explore(self, widget):  # pylint: disable=unused-argument
             data=self.data_columns_box.fitting_data,
             app=self.app,
             font_size=self.window.content.font_size,
+            module_paths=self.__module_paths,
+            timeout=self.fit_timeout,
+        )
+        window.show()
+
+    def find_best_model(self, widget):  # pylint: disable=unused-argument
+        """Open a window ranking all fitting functions by how well they fit."""
+        if not self.__has_data():
+            self.app.show_nothing_to_plot()
+            return
+        window = ModelSearchWindow(
+            data=self.data_columns_box.fitting_data,
+            on_load=self.load_fitting_function,
+            module_paths=self.__module_paths,
+            timeout=self.fit_timeout,
+            font_size=self.window.content.font_size,
         )
+        window.app = self.app
         window.show()
 
-    def fit(self, widget):  # pylint: disable=unused-argument
+    def load_fitting_function(self, spec: FittingFunctionSpec):
+        """Choose the described fitting function in the fitting function box."""
+        self.fitting_function_box.select_fitting_function(spec.name, degree=spec.degree)
+
+    async def fit(self, widget):  # pylint: disable=unused-argument
         """Handler for the "fit" button."""
+        if (
+            self.data_columns_box.fitting_data is None
+            or self.fitting_function_box.fitting_function is None  # noqa: W503
+        ):
+            self.app.show_nothing_to_plot()
+            return
+        fitting_result = await self.calculate_fitting_result()
+        if fitting_result is None:
+            return
+        message = str(fitting_result)
+        if self.fit_statistics is not None:
+            message += f"\n{self.fit_statistics}"
+        if (
+            self.last_fit is not None
+            and self.last_fit.warm  # noqa: W503
+            and self.last_fit.fitting_result is fitting_result  # noqa: W503
+            and self.last_fit.saved_iterations > 0  # noqa: W503
+        ):
+            message += (
+                f"\nWarm start from the previous fit: {self.last_fit.iterations} "
+                f"iterations, saving {self.last_fit.saved_iterations} iterations "
+                "compared with the last fit from the initial guess"
+            )
+        message += f"\n{self.fit_result_cache}"
+        self.window.info_dialog(title="Fit Result", message=message)
+
+    def start_fit(self) -> Optional[asyncio.Future]:
+        """
+        Start fitting the data in a worker thread, unless a fit is already running.
+
+        If the same data, selection, fitting function and initial guess have
+        already been fitted, the cached result is used instead. If warm start is
+        on, and only the data or the records selection have changed since the last
+        fit, the fit starts from the last fit result. The elapsed time
+        and iterations of the fit are shown in the progress box, from which the
+        fit can be cancelled.
+
+        :return: Future of the fit result, or None if there is nothing to fit.
+        :rtype: Optional[asyncio.Future]
+        :raises FittingError: Raised when missing information for fitting.
+        """
+        if self.__fit_future is not None:
+            return self.__fit_future
+        if (
+            self.data_columns_box.fitting_data is None
+            or self.fitting_function_box.fitting_function is None  # noqa: W503
+        ):
+            return None
+        loop = asyncio.get_event_loop()
+        data = self.data_columns_box.fitting_data
+        func = self.fitting_function_box.fitting_function
+        a0 = self.initial_guess_box.a0
+        key = self.fit_result_cache.key(data, func, a0)
+        cached_result = self.fit_result_cache.get(key)
+        self.__fit_outdated = False
+        if cached_result is not None:
+            self.__replace_fitting_result(cached_result)
+            future = loop.create_future()
+            future.set_result(cached_result)
+            # Figures drawn without the fit are redrawn with it, as after a fit
+            self.app.refresh_figures()
+            return future
+        warm_a0 = (
+            warm_start_a0(self.last_fit, func, a0)
+            if self.warm_start_switch.value
+            else None
+        )
+        job = FitJob(
+            data=data,
+            func=func,
+            a0=a0 if warm_a0 is None else warm_a0,
+            timeout=self.fit_timeout,
+        )
+
+        def on_progress(progress: FitProgress):
+            loop.call_soon_threadsafe(self.show_fit_progress, job, progress)
+
+        job.on_progress = on_progress
+        text = f"Fitting {func.name}" + (
+            "..." if warm_a0 is None else " from the last fit..."
+        )
+        self.__background_tasks.start(_FIT, job, text=text, on_cancel=job.cancel)
+        self.__fit_future = asyncio.ensure_future(
+            self.__run_fit(job, key, a0=a0, warm=warm_a0 is not None)
+        )
+        return self.__fit_future
+
+    async def calculate_fitting_result(self) -> Optional[FittingResult]:
+        """
+        Get the fit result, fitting the data in the background if needed.
+
+        Waits for the running fit, if there is one, without blocking the event
+        loop. Errors are shown to the user.
+
+        :return: The fit result, or None if there is nothing to fit, the fit has
+            failed or it has been cancelled.
+        :rtype: Optional[FittingResult]
+        """
+        if self.fitting_result is not None and not self.__is_fit_outdated():
+            return self.fitting_result
         try:
-            if self.fitting_result is None:
-                self.app.show_nothing_to_plot()
-                return
-        except EddingtonException:
+            future = self.start_fit()
+            if future is None:
+                return None
+            # Shielded, so the fit keeps running for other waiters if this one stops
+            return await asyncio.shield(future)
+        except FitCancelledError:
+            return None
+        except EddingtonException as error:
+            self.window.error_dialog(title="Fit result error", message=str(error))
+            return None
+
+    def show_fit_progress(self, job: FitJob, progress: FitProgress):
+        """Show progress of a fit job, if it is still the running one."""
+        if job.cancelled:
             return
-        self.window.info_dialog(title="Fit Result", message=str(self.fitting_result))
+        self.__background_tasks.update(
+            _FIT,
+            job,
+            f"Fitting {job.func.name}: {progress.iterations} iterations, "
+            f"chi2 = {progress.chi2:.4g} ({progress.elapsed:.1f}s)",
+            value=progress.iterations,
+            max_value=progress.max_iterations,
+        )
+
+    async def resample(self, widget):  # pylint: disable=unused-argument
+        """
+        Handler for the "resample" button.
+
+        Fits resampled selected records in parallel, starting from the fit result,
+        and shows the uncertainties of the parameters as resamples are fitted.
+        """
+        if (
+            self.data_columns_box.fitting_data is None
+            or self.fitting_function_box.fitting_function is None  # noqa: W503
+        ):
+            self.app.show_nothing_to_plot()
+            return
+        fitting_result = await self.calculate_fitting_result()
+        if fitting_result is None:
+            return
+        method = self.resampling_box.method
+        task = asyncio.ensure_future(
+            resample(
+                data=self.data_columns_box.fitting_data,
+                spec=FittingFunctionSpec.from_function(
+                    self.fitting_function_box.fitting_function
+                ),
+                a=fitting_result.a,
+                method=method,
+                number_of_resamples=self.resampling_box.number_of_resamples,
+                module_paths=self.__module_paths,
+                on_update=lambda result: self.show_resampling(task, result),
+            )
+        )
+        self.__resampling = None
+        self.__fit_version += 1
+        self.resampling_box.show(None)
+        try:
+            await self.__background_tasks.run(
+                _RESAMPLING, task, text=f"{method.value} resampling..."
+            )
+        except asyncio.CancelledError:
+            pass
+        except (EddingtonException, BrokenProcessPool) as error:
+            self.window.error_dialog(title="Resampling error", message=str(error))
+
+    def show_resampling(self, task: asyncio.Future, result: ResamplingResult):
+        """Show the resampling result so far, if its task is still running."""
+        if not self.__background_tasks.is_running(_RESAMPLING, task):
+            return
+        self.__resampling = result
+        self.__fit_version += 1
+        self.resampling_box.show(result)
+        self.__background_tasks.update(
+            _RESAMPLING,
+            task,
+            f"{result.method.value} resampling: {result.done} of {result.total}",
+            value=result.done,
+            max_value=result.total,
+        )
+        self.app.refresh_figures()
+
+    async def compute_landscape(self, widget):  # pylint: disable=unused-argument
+        """
+        Handler for the "compute" button of the chi-squared landscape.
+
+        Computes chi-squared over a grid of two parameters, with the others at
+        their fitted values, and redraws the plots as rows of the grid are done.
+        """
+        data = self.data_columns_box.fitting_data
+        func = self.fitting_function_box.fitting_function
+        if data is None or func is None:
+            self.app.show_nothing_to_plot()
+            return
+        fitting_result = await self.calculate_fitting_result()
+        if fitting_result is None:
+            return
+        try:
+            landscape = self.chi2_landscape_box.new_landscape(fitting_result)
+        except ValueError as error:
+            self.window.error_dialog(
+                title="Chi\u00b2 landscape error", message=str(error)
+            )
+            return
+        self.__background_tasks.cancel(_CHI2_LANDSCAPE)
+        task = asyncio.ensure_future(
+            compute_chi2_landscape(
+                func, data, landscape, on_update=lambda _: self.show_landscape(task)
+            )
+        )
+        self.__chi2_landscape = landscape
+        self.__fit_version += 1
+        self.chi2_landscape_box.show(landscape)
+        try:
+            await self.__background_tasks.run(
+                _CHI2_LANDSCAPE, task, text="Computing chi-squared landscape..."
+            )
+        except asyncio.CancelledError:
+            pass
+
+    def show_landscape(self, task: asyncio.Future):
+        """Show the rows of the landscape computed so far, if its task is running."""
+        landscape = self.__chi2_landscape
+        # The landscape is reset along with the fit, cancelling its task
+        if landscape is None or not self.__background_tasks.is_running(
+            _CHI2_LANDSCAPE, task
+        ):
+            return
+        self.__fit_version += 1
+        self.chi2_landscape_box.show(landscape)
+        self.__background_tasks.update(
+            _CHI2_LANDSCAPE,
+            task,
+            f"Chi-squared landscape: {landscape.done} of {landscape.total} rows",
+            value=landscape.done,
+            max_value=landscape.total,
+        )
+        self.app.refresh_figures()
+
+    async def analyze_influence(self, exact: bool) -> Optional[Influence]:
+        """
+        Calculate the influence of each selected record on the fit.
+
+        The influence is linearized around the fit result, which takes a single
+        pass over the records. If exact, the records are also refitted leaving each
+        one out, in parallel, and the parameter shifts of the refits are used.
+
+        :param exact: whether to refit the records leaving each one out
+        :type exact: bool
+        :return: influence of each selected record, or None if there is nothing to
+            analyze, or the analysis has failed or has been cancelled.
+        :rtype: Optional[Influence]
+        """
+        data = self.data_columns_box.fitting_data
+        func = self.fitting_function_box.fitting_function
+        if data is None or func is None:
+            self.app.show_nothing_to_plot()
+            return None
+        fitting_result = await self.calculate_fitting_result()
+        if fitting_result is None:
+            return None
+        try:
+            influence = linearized_influence(func, data, fitting_result)
+        except ValueError as error:
+            self.window.error_dialog(title="Influence error", message=str(error))
+            return None
+        if not exact:
+            return influence
+        parameters = await self.__refit_without_each_record(data, func, fitting_result)
+        if parameters is None:
+            return None
+        return influence.with_shifts(parameters - fitting_result.a)
+
+    def cancel_fit(self):
+        """Cancel the running fit, if there is one."""
+        self.__background_tasks.cancel(_FIT)
+        self.__fit_future = None
 
     async def load_module(self, widget):  # pylint: disable=unused-argument
         """
@@ -366,75 +901,138 @@ async def load_module(self, widget):  # pylint: disable=unused-argument
         )
         if file_path is None:
             return
-        spec = importlib.util.spec_from_file_location("eddington.dummy", file_path)
-        dummy_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(dummy_module)
+        load_user_module(file_path)
+        self.__module_paths.append(str(file_path))
         self.fitting_function_box.update_fitting_function_options()
 
     def reset_fitting_data(self):
         """Set fit data to None."""
+        self.__input_file_reader.stop_following()
+        self.__last_fit = None
         self.data_columns_box.fitting_data = None
+        self.__update_records_window()
+        self.figure_cache.clear()
 
     def reset_fitting_result(self):
-        """Set fit result to None."""
+        """Set fit result to None, and cancel everything computed from the fit."""
         self.fitting_result = None
+        self.__fit_outdated = False
+        self.cancel_fit()
+        self.__reset_computed_from_fit()
 
     def set_parameters_number(self, func):
         """Set number of parameters."""
         self.initial_guess_box.n = 0 if func is None else func.n
 
-    def select_default_sheet(self):
-        """
-        Automatically choose the first valid sheet.
-
-        If it fails to find a valid sheet, resets the input file.
-        """
-        for sheet in self.input_file_box.sheets_options:
-            if sheet != NO_VALUE:
-                try:
-                    self.data_columns_box.fitting_data = FittingData.read_from_excel(
-                        Path(self.input_file_box.file_path), sheet
-                    )
-                    self.input_file_box.selected_sheet = sheet
-                    return
-                except FittingDataError:
-                    pass
-
-        if self.data_columns_box.fitting_data is None:
-            self.window.error_dialog(
-                title="Input data error",
-                message=(
-                    "No sheet available with valid data.\n"
-                    "Please fix the file or load another one."
-                ),
-            )
-            self.input_file_box.file_path = None
-
     def set_font_size(self, font_size: FontSize):
         """Set font size."""
         super().set_font_size(font_size=font_size)
         for plot_box in self.plot_boxes.values():
             plot_box.set_font_size(font_size)
 
-    def __calculate_fitting_result(self):
-        if (
-            self.data_columns_box.fitting_data is None
-            or self.fitting_function_box.fitting_function is None  # noqa: W503
-        ):
-            self.fitting_result = None
-            return
+    async def __run_fit(
+        self, job: FitJob, key: str, a0: Optional[np.ndarray], warm: bool
+    ) -> Optional[FittingResult]:
         try:
-            self.fitting_result = fit(
-                data=self.data_columns_box.fitting_data,
-                func=self.fitting_function_box.fitting_function,
-                a0=self.initial_guess_box.a0,
+            fitting_result = await run_in_background(job.run)
+        finally:
+            is_running = self.__background_tasks.is_running(_FIT, job)
+            if is_running:
+                self.__background_tasks.stop(_FIT, job)
+                self.__fit_future = None
+        if not is_running or job.cancelled:
+            raise FitCancelledError("Fit has been cancelled")
+        self.fit_result_cache.put(key, fitting_result)
+        self.__last_fit = FitRecord(
+            function_key=self.fit_result_cache.function_key(job.func),
+            a0=a0,
+            fitting_result=fitting_result,
+            iterations=job.iterations,
+            cold_iterations=(
+                self.__last_fit.cold_iterations
+                if warm and self.__last_fit is not None
+                else job.iterations
+            ),
+            warm=warm,
+            statistics=job.statistics,
+        )
+        self.__replace_fitting_result(fitting_result)
+        self.app.refresh_figures()
+        return fitting_result
+
+    async def __refit_without_each_record(
+        self, data: FittingData, func: FittingFunction, fitting_result: FittingResult
+    ) -> Optional[np.ndarray]:
+        task = asyncio.ensure_future(
+            leave_one_out(
+                data=data,
+                spec=FittingFunctionSpec.from_function(func),
+                a=fitting_result.a,
+                module_paths=self.__module_paths,
+                on_update=lambda done, total: self.__background_tasks.update(
+                    _INFLUENCE,
+                    task,
+                    f"Refitting without each record: {done} of {total}",
+                    value=done,
+                    max_value=total,
+                ),
             )
-        except EddingtonException as error:
-            self.fitting_result = None
-            self.window.error_dialog(title="Fit result error", message=str(error))
-            raise error
+        )
+        try:
+            return await self.__background_tasks.run(
+                _INFLUENCE, task, text="Refitting without each record..."
+            )
+        except asyncio.CancelledError:
+            return None
+        except (EddingtonException, BrokenProcessPool) as error:
+            self.window.error_dialog(title="Influence error", message=str(error))
+            return None
 
-    def __has_data(self):
-        return self.data_columns_box.fitting_data is not None and any(
-            self.data_columns_box.fitting_data.records_indices
+    def __fitting_result_or_refit(self) -> Optional[FittingResult]:
+        # Figures are drawn synchronously, so they are redrawn once the fit is done
+        if self.fitting_result is None or self.__is_fit_outdated():
+            asyncio.ensure_future(self.calculate_fitting_result())
+        return self.fitting_result
+
+    def __is_fit_outdated(self) -> bool:
+        # A fit missing appended records is kept while results computed from it run
+        return self.__fit_outdated and all(
+            self.__background_tasks.get(name) is None
+            for name in [_RESAMPLING, _CHI2_LANDSCAPE, _INFLUENCE]
         )
+
+    def __replace_fitting_result(self, fitting_result: FittingResult):
+        if self.fitting_result is not None:
+            self.__reset_computed_from_fit()
+        self.fitting_result = fitting_result
+
+    def __reset_computed_from_fit(self):
+        for name in [_RESAMPLING, _CHI2_LANDSCAPE, _INFLUENCE]:
+            self.__background_tasks.cancel(name)
+        self.__resampling = None
+        self.resampling_box.show(None)
+        self.__chi2_landscape = None
+        self.chi2_landscape_box.show(None)
+
+    def __show_error(self, title: str, message: str):
+        self.window.error_dialog(title=title, message=message)
+
+    def __refresh_figures(self):
+        self.app.refresh_figures()
+
+    def __update_records_window(self):
+        # The open records window follows the data, or is closed if it cannot
+        window = self.__records_window
+        if window is None or window.closed:
+            self.__records_window = None
+            return
+        record_selection = self.data_columns_box.record_selection
+        if record_selection is None or not window.set_record_selection(
+            record_selection
+        ):
+            window.close_window(None)
+            self.__records_window = None
+
+    def __has_data(self):
+        record_selection = self.data_columns_box.record_selection
+        return record_selection is not None and record_selection.any_selected
@@ -12,7 +12,7 @@ class OutputBox(LineBox):
 
     output_directory_input: toga.TextInput
 
-    def __init__(self, on_save_output):
+    def __init__(self, on_save_output, on_save_configuration):
         """Initialize box."""
         super().__init__()
         self.output_directory_input = toga.TextInput(style=Pack(flex=1))
@@ -27,6 +27,11 @@ def __init__(self, on_save_output):
             toga.Button(
                 text="Save",
                 on_press=on_save_output,
+                style=Pack(padding_left=SMALL_PADDING),
+            ),
+            toga.Button(
+                text="Save configuration",
+                on_press=on_save_configuration,
                 style=Pack(padding_left=SMALL_PADDING, padding_right=SMALL_PADDING),
             ),
         )
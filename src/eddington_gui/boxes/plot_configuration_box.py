@@ -1,12 +1,12 @@
 # pylint: disable=too-many-instance-attributes,too-many-public-methods
 """Box for setting up plot configuration for the output graphs."""
-from typing import Optional
+from io import BytesIO
+from typing import Callable, Hashable, Optional
 
 import toga
-from eddington import EddingtonException, FigureBuilder, to_relevant_precision_string
+from eddington import EddingtonException
 from eddington.interval import Interval
 from eddington.plot.figure import Figure
-from matplotlib.ticker import FuncFormatter, NullLocator
 from toga.style import Pack
 from toga.style.pack import COLUMN, HIDDEN, VISIBLE
 from toga.validators import Number
@@ -14,13 +14,18 @@
 from eddington_gui.boxes.eddington_box import EddingtonBox
 from eddington_gui.boxes.line_box import LineBox
 from eddington_gui.consts import LABEL_WIDTH, LONG_INPUT_WIDTH, SMALL_PADDING
-
-EDDINGTON_FORMATTER = FuncFormatter(lambda y, _: to_relevant_precision_string(y))
-NULL_LOCATOR = NullLocator()
+from eddington_gui.plotting.figure_cache import FigureCache
+from eddington_gui.plotting.plot_settings import PlotSettings, plot_file_name
 
 
 class PlotConfigurationBox(EddingtonBox):
-    """Visual box to create plot configuration."""
+    """
+    Visual box to create plot configuration.
+
+    If a figure cache is given, along with the state of everything drawn besides
+    the configuration, built figures and their images are reused until either
+    changes.
+    """
 
     __title_input: toga.TextInput
     __xlabel_input: toga.TextInput
@@ -36,16 +41,30 @@ class PlotConfigurationBox(EddingtonBox):
     __y_log_scale: toga.Switch
 
     __has_legend: bool
+    __has_columns_labels: bool
     __base_name: Optional[str]
     __xcolumn: Optional[str]
     __ycolumn: Optional[str]
-
-    def __init__(self, additional_instructions, suffix, has_legend=True):
+    __figure_cache: Optional[FigureCache]
+    __figure_state: Optional[Callable[[], Hashable]]
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        additional_instructions,
+        suffix,
+        has_legend=True,
+        has_columns_labels=True,
+        figure_cache: Optional[FigureCache] = None,
+        figure_state: Optional[Callable[[], Hashable]] = None,
+    ):
         """Initialize box."""
         super().__init__(style=Pack(direction=COLUMN))
+        self.__figure_cache = figure_cache
+        self.__figure_state = figure_state
         self.__base_name = None
         self.__ycolumn = None
         self.__xcolumn = None
+        self.__has_columns_labels = has_columns_labels
 
         self.additional_instructions = additional_instructions
         self.suffix = suffix
@@ -95,23 +114,14 @@ def __init__(self, additional_instructions, suffix, has_legend=True):
     @property
     def title(self):
         """Getter of the fitting graph title."""
-        if self.__title_input.value != "":
-            return self.__title_input.value
-        if self.__base_name is not None:
-            return f"{self.__base_name} - {self.suffix.title()}"
-        return self.suffix
+        return PlotSettings(title=self.__title_input.value).plot_title(
+            self.suffix, base_name=self.__base_name
+        )
 
     @property
     def file_name(self):
         """Getter of the fitting graph title."""
-        if self.__base_name is not None:
-            name = (
-                f"{self.__base_name.replace(' ', '_')}"
-                f"_{self.suffix.replace(' ', '_')}.png"
-            )
-        else:
-            name = f"{self.suffix.replace(' ', '_')}.png"
-        return name.lower()
+        return plot_file_name(self.suffix, base_name=self.__base_name)
 
     @property
     def xlabel(self):
@@ -176,9 +186,24 @@ def xmax(self):
             ) from error
 
     @property
-    def interval(self):
+    def interval(self) -> Interval:
         """Get data interval from the user."""
-        return Interval(min_val=self.xmin, max_val=self.xmax)
+        return self.settings.interval
+
+    @property
+    def settings(self) -> PlotSettings:
+        """The settings chosen by the user, with empty texts as None."""
+        return PlotSettings(
+            title=self.__title_input.value or None,
+            xlabel=self.__xlabel_input.value or None,
+            ylabel=self.__ylabel_input.value or None,
+            grid=bool(self.grid),
+            legend=bool(self.legend),
+            x_log_scale=bool(self.x_log_scale),
+            y_log_scale=bool(self.y_log_scale),
+            xmin=self.xmin,
+            xmax=self.xmax,
+        )
 
     def get_plot_kwargs(self):
         """Get plot kwargs from configuration box."""
@@ -198,14 +223,7 @@ def get_plot_kwargs(self):
 
     def set_scale(self, figure):
         """Set ticks of figure if in log scale."""
-        axes = figure.get_axes()[0]
-        if self.x_log_scale:
-            axes.xaxis.set_major_formatter(EDDINGTON_FORMATTER)
-            axes.xaxis.set_minor_locator(NULL_LOCATOR)
-        if self.y_log_scale:
-            axes.yaxis.set_major_formatter(EDDINGTON_FORMATTER)
-            axes.yaxis.set_minor_locator(NULL_LOCATOR)
-        return figure
+        return self.settings.set_scale(figure)
 
     def on_fitting_function_load(self, fitting_function):
         """
@@ -223,7 +241,7 @@ def on_fitting_data_load(self, fitting_data):
 
         Updates the basename and reset the plot configuration.
         """
-        if fitting_data is None:
+        if fitting_data is None or not self.__has_columns_labels:
             self.__xcolumn, self.__ycolumn = None, None
         else:
             self.__xcolumn, self.__ycolumn = (
@@ -263,18 +281,39 @@ def toggle_y_log_scale(self, widget):  # pylint: disable=unused-argument
 
     def build_figure_builder(self):
         """Build FigureBuilder to use when drawing."""
-        figure_builder = FigureBuilder()
-        if self.title is not None:
-            figure_builder.add_title(self.title)
-        if self.xlabel is not None:
-            figure_builder.add_xlabel(self.xlabel)
-        if self.ylabel is not None:
-            figure_builder.add_ylabel(self.ylabel)
-        if self.grid:
-            figure_builder.add_grid()
-        if self.legend:
-            figure_builder.add_legend()
-        self.additional_instructions(figure_builder, self.interval)
+        return self.settings.build_figure_builder(
+            title=self.title,
+            xlabel=self.xlabel,
+            ylabel=self.ylabel,
+            additional_instructions=self.additional_instructions,
+        )
+
+    @property
+    def figure_key(self) -> Optional[str]:
+        """Cache key of the figure, or None if it can't be cached."""
+        if self.__figure_cache is None or self.__figure_state is None:
+            return None
+        return self.__figure_cache.key(
+            self.suffix,
+            self.title,
+            self.xlabel,
+            self.ylabel,
+            self.settings,
+            self.__figure_state(),
+        )
+
+    def cached_figure_builder(self):
+        """Get the figure builder from the cache, building it if needed."""
+        key, figure_cache = self.figure_key, self.__figure_cache
+        if key is None or figure_cache is None:
+            return self.build_figure_builder()
+        figure_builder = figure_cache.get_builder(key)
+        if figure_builder is not None:
+            return figure_builder
+        figure_builder = self.build_figure_builder()
+        # Building may start a fit, in which case the figure is about to change
+        if key == self.figure_key:
+            figure_cache.put_builder(key, figure_builder)
         return figure_builder
 
     def on_draw(
@@ -283,10 +322,26 @@ def on_draw(
         """Draw on figure using the figure builder."""
         if not isinstance(figure, Figure):
             figure = Figure(figure)
-        figure_builder = self.build_figure_builder()
+        figure_builder = self.cached_figure_builder()
         figure_builder.build(figure)
         self.set_scale(figure)
 
+    def render_png(self) -> bytes:
+        """Render the figure as a PNG image, reusing the cached image if possible."""
+        key, figure_cache = self.figure_key, self.__figure_cache
+        if key is not None and figure_cache is not None:
+            cached_image = figure_cache.get_image(key)
+            if cached_image is not None:
+                return cached_image
+        with Figure() as figure:
+            self.on_draw(self, figure)
+            output = BytesIO()
+            figure.savefig(output, format="png")
+        image = output.getvalue()
+        if key is not None and figure_cache is not None and key == self.figure_key:
+            figure_cache.put_image(key, image)
+        return image
+
     def __add_column_option(self, label, *additional_widgets):
         text_input = toga.TextInput(style=Pack(width=LONG_INPUT_WIDTH))
         line = LineBox(
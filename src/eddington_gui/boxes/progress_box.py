@@ -0,0 +1,95 @@
+"""Box for showing the progress of a background job."""
+from typing import Callable, Optional
+
+import toga
+from toga.style import Pack
+from toga.style.pack import HIDDEN, VISIBLE
+
+from eddington_gui.boxes.line_box import LineBox
+from eddington_gui.consts import SMALL_PADDING
+
+
+class ProgressBox(LineBox):
+    """Visual box showing the progress of a background job with a cancel button."""
+
+    __label: toga.Label
+    __progress_bar: toga.ProgressBar
+    __cancel_button: toga.Button
+    __on_cancel: Optional[Callable[[], None]]
+
+    def __init__(self):
+        """Initialize box."""
+        super().__init__()
+        self.__on_cancel = None
+        self.__label = toga.Label(text="", style=Pack(flex=1, visibility=HIDDEN))
+        self.__progress_bar = toga.ProgressBar(
+            max=None, style=Pack(flex=1, visibility=HIDDEN)
+        )
+        self.__cancel_button = toga.Button(
+            text="Cancel",
+            on_press=lambda _: self.cancel(),
+            style=Pack(padding_left=SMALL_PADDING, visibility=HIDDEN),
+        )
+        self.add(self.__label, self.__progress_bar, self.__cancel_button)
+
+    @property
+    def running(self) -> bool:
+        """Whether a job is currently in progress."""
+        return self.__progress_bar.is_running
+
+    def start(self, text: str, on_cancel: Optional[Callable[[], None]] = None):
+        """
+        Show the box and start the progress bar.
+
+        :param text: Text describing the job
+        :type text: str
+        :param on_cancel: Optional. Callback to run when the user cancels the job.
+            If None, the cancel button is hidden.
+        :type on_cancel: Optional[Callable[[], None]]
+        """
+        self.__on_cancel = on_cancel
+        self.__label.text = text
+        self.__progress_bar.max = None
+        self.__progress_bar.start()
+        self.__label.style.visibility = VISIBLE
+        self.__progress_bar.style.visibility = VISIBLE
+        self.__cancel_button.style.visibility = HIDDEN if on_cancel is None else VISIBLE
+
+    def update(
+        self,
+        text: str,
+        value: Optional[float] = None,
+        max_value: Optional[float] = None,
+    ):
+        """
+        Update the progress of the job.
+
+        :param text: Text describing the current progress
+        :type text: str
+        :param value: Optional. Current progress value.
+        :type value: Optional[float]
+        :param max_value: Optional. Progress value of a finished job. If None, the
+            progress is indeterminate.
+        :type max_value: Optional[float]
+        """
+        self.__label.text = text
+        if max_value is None or value is None:
+            self.__progress_bar.max = None
+            return
+        self.__progress_bar.max = max_value
+        self.__progress_bar.value = min(value, max_value)
+
+    def stop(self):
+        """Stop the progress bar and hide the box."""
+        self.__on_cancel = None
+        self.__progress_bar.stop()
+        self.__label.text = ""
+        self.__label.style.visibility = HIDDEN
+        self.__progress_bar.style.visibility = HIDDEN
+        self.__cancel_button.style.visibility = HIDDEN
+
+    def cancel(self):
+        """Cancel the running job."""
+        if self.__on_cancel is not None:
+            self.__on_cancel()
+        self.__label.text = "Cancelling..."
@@ -0,0 +1,83 @@
+"""Box for estimating the uncertainties of the parameters by resampling."""
+from typing import Optional
+
+import toga
+from toga.style import Pack
+from toga.style.pack import COLUMN
+
+from eddington_gui.boxes.eddington_box import EddingtonBox
+from eddington_gui.boxes.line_box import LineBox
+from eddington_gui.consts import DEFAULT_RESAMPLES, SMALL_PADDING
+from eddington_gui.fitting.resampling import (
+    ResamplingMethod,
+    ResamplingResult,
+    resampling_summary,
+)
+
+
+class ResamplingBox(EddingtonBox):
+    """Visual box for choosing how to resample the records, showing the results."""
+
+    __method_selection: toga.Selection
+    __resamples_input: toga.NumberInput
+    __parameter_input: toga.NumberInput
+    __summary_label: toga.Label
+
+    def __init__(self, on_resample, on_parameter_change):
+        """Initialize box."""
+        super().__init__(style=Pack(direction=COLUMN))
+        self.__method_selection = toga.Selection(
+            items=[method.value for method in ResamplingMethod]
+        )
+        self.__resamples_input = toga.NumberInput(
+            min_value=10, value=DEFAULT_RESAMPLES, style=Pack(width=80)
+        )
+        self.__parameter_input = toga.NumberInput(
+            min_value=0,
+            value=0,
+            on_change=lambda _: on_parameter_change(),
+            style=Pack(width=60),
+        )
+        self.__summary_label = toga.Label(text="")
+        self.add(
+            LineBox(
+                children=[
+                    toga.Label(text="Method:"),
+                    self.__method_selection,
+                    toga.Label(
+                        text="Resamples:", style=Pack(padding_left=SMALL_PADDING)
+                    ),
+                    self.__resamples_input,
+                    toga.Button(
+                        text="Resample",
+                        on_press=on_resample,
+                        style=Pack(padding_left=SMALL_PADDING),
+                    ),
+                    toga.Label(
+                        text="Plotted parameter:",
+                        style=Pack(padding_left=SMALL_PADDING),
+                    ),
+                    self.__parameter_input,
+                ]
+            ),
+            self.__summary_label,
+        )
+
+    @property
+    def method(self) -> ResamplingMethod:
+        """How to resample the records."""
+        return ResamplingMethod(self.__method_selection.value)
+
+    @property
+    def number_of_resamples(self) -> int:
+        """Number of bootstrap resamples."""
+        return int(self.__resamples_input.value)
+
+    @property
+    def parameter_index(self) -> int:
+        """Index of the parameter whose distribution is plotted."""
+        return int(self.__parameter_input.value)
+
+    def show(self, result: Optional[ResamplingResult]):
+        """Show the uncertainties found so far, or nothing if there is no result."""
+        self.__summary_label.text = "" if result is None else resampling_summary(result)
@@ -9,14 +9,19 @@ class PlotButton(toga.Button):
 
     def __init__(self, text, can_plot, on_draw, plot_title):
         """Initialize button."""
-        super().__init__(text=text, on_press=lambda widget: self.plot())
+        super().__init__(text=text, on_press=self.plot)
         self.can_plot = can_plot
         self.plot_title = plot_title
         self.on_draw = on_draw
 
-    def plot(self):
-        """Run when plot button is pressed."""
-        if not self.can_plot():
+    async def plot(self, widget):  # pylint: disable=unused-argument
+        """
+        Run when plot button is pressed.
+
+        Waits for the data needed for the plot, such as a running fit, without
+        blocking the event loop.
+        """
+        if not await self.can_plot():
             self.app.show_nothing_to_plot()
             return
         try:
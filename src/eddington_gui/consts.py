@@ -9,17 +9,46 @@
 DEFAULT_BACKUP_COUNT = 5  # Maximum of 5 backup files
 DEFAULT_MAX_BYTES = 10_000_000  # 10MB
 
+INGESTION_PROGRESS_ROWS = 1_000  # Report reading progress every 1000 rows
+DEFAULT_DATA_CACHE_SIZE = 1_000_000_000  # 1GB
+PROJECTED_LOAD_MIN_COLUMNS = 8  # Read files with 8 columns or more column by column
+CSV_FOLLOW_INTERVAL = 1  # Check for appended rows every second
+CSV_FOLLOW_CHUNK_SIZE = 4_096  # Read backwards 4KB at a time to find the last line
+SHEET_VALIDATION_POLL_INTERVAL = 0.1  # Check for cancellation every 100ms
+FIT_MAX_ITERATIONS = 50  # Same iterations limit as ODR's default
+FIT_ITERATIONS_CHUNK = 5  # Check for cancellation every 5 fit iterations
+DEFAULT_FIT_TIMEOUT = 60  # Stop fits which take longer than a minute
+FIT_RESULT_CACHE_SIZE = 128  # Keep the results of the last 128 fits
+FIGURE_CACHE_SIZE = 32  # Keep the instructions of the last 32 drawn figures
+FIGURE_CACHE_IMAGES_SIZE = 50_000_000  # 50MB of rendered figure images
+MAX_POLYNOMIAL_DEGREE = 20  # Polynomials are solved in closed form, in a stable basis
+MODEL_SEARCH_MAX_DEGREE = 5  # Search polynomials up to degree 5 by default
+DEFAULT_RESAMPLES = 1000  # Fit 1000 bootstrap resamples by default
+RESAMPLING_CHUNK_SIZE = 25  # Report resampling results every 25 fits
+CHI2_LANDSCAPE_POINTS = 50  # Grid of 50 by 50 parameter values by default
+CHI2_LANDSCAPE_SPAN = 3  # Span 3 standard errors around each fitted value by default
+CHI2_LANDSCAPE_CHUNK_SIZE = 1_000_000  # Evaluate up to 1M function values at once
+MULTI_START_RANDOM_RESTARTS = 10  # Fit from 10 random initial guesses by default
+MULTI_START_SHOWN_SOLUTIONS = 3  # Draw the 3 best solutions by default
+MULTI_START_TOLERANCE = 1e-4  # Fits whose parameters agree up to 0.01% are the same
+INFLUENCE_UNSELECTED_RECORDS = 5  # Unselect the 5 most influential records by default
+
 GITHUB_USER_NAME = "EddLabs"
 
 NO_VALUE = "----------"
+VALID_SHEET_MARK = "\u2713"  # Check mark
+INVALID_SHEET_MARK = "\u2717"  # Ballot X
 POLYNOMIAL = "polynomial"
 
 LOGO_SIZE = 300
 MAIN_WINDOW_SIZE = (1000, 500)
 RECORD_WINDOW_SIZE = (1000, 500)
+RECORDS_PAGE_SIZE = 50  # Number of records shown in each page of the records window
+RECORDS_CHANGE_DELAY = 0.3  # Apply records changes after 300ms without changes
 FIGURE_WINDOW_SIZE = (500, 550)
 CHART_HEIGHT_SIZE = 500
 EXPLORE_WINDOW_SIZE = (1250, 500)
+MODEL_SEARCH_WINDOW_SIZE = (900, 500)
 
 SMALL_PADDING = 2
 BIG_PADDING = 5
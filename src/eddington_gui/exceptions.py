@@ -0,0 +1,34 @@
+"""Exception classes for Eddington GUI."""
+from zipfile import BadZipFile
+
+from eddington import EddingtonException, FittingDataError
+from eddington.exceptions import FittingError
+from openpyxl.utils.exceptions import InvalidFileException
+
+
+class IngestionCancelledError(EddingtonException):
+    """Raised when reading an input file has been cancelled by the user."""
+
+
+class SelectionRuleError(EddingtonException):
+    """Raised when a records selection rule is invalid."""
+
+
+class FitCancelledError(EddingtonException):
+    """Raised when a fit has been cancelled by the user."""
+
+
+class FitTimeoutError(FittingError):
+    """Raised when a fit did not finish in time."""
+
+
+# Errors of reading a corrupt or invalid input file, which are shown to the user.
+# Columnar readers raise ValueError subclasses, such as pyarrow's ArrowInvalid, and
+# openpyxl raises InvalidFileException for workbooks of formats it cannot read.
+INPUT_FILE_ERRORS = (
+    FittingDataError,
+    BadZipFile,
+    InvalidFileException,
+    OSError,
+    ValueError,
+)
@@ -0,0 +1 @@
+"""Fitting of data in the background."""
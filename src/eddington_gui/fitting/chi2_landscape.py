@@ -0,0 +1,278 @@
+"""Chi-squared of a fit over a grid of two of its parameters."""
+import math
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+from eddington import FittingData, FittingFunction
+
+from eddington_gui.consts import CHI2_LANDSCAPE_CHUNK_SIZE
+from eddington_gui.util import run_in_background
+
+
+@dataclass
+class Chi2Landscape:  # pylint: disable=too-many-instance-attributes
+    """
+    Chi-squared over a grid of two parameters, with the others at their fitted values.
+
+    The grid is filled a few rows at a time. Rows which are not computed yet are NaN.
+
+    :param first_index: index of the parameter on the x axis
+    :param second_index: index of the parameter on the y axis
+    :param first_values: values of the first parameter, one per grid column
+    :param second_values: values of the second parameter, one per grid row
+    :param a: fitted parameters
+    :param chi2: chi-squared of each grid point
+    :param chi2_min: chi-squared at the fitted parameters, computed before the grid
+    :param done: number of grid rows computed so far
+    """
+
+    first_index: int
+    second_index: int
+    first_values: np.ndarray
+    second_values: np.ndarray
+    a: np.ndarray
+    chi2: np.ndarray
+    chi2_min: float = math.nan
+    done: int = 0
+
+    @property
+    def total(self) -> int:
+        """Number of grid rows."""
+        return len(self.second_values)
+
+    @property
+    def finished(self) -> bool:
+        """Whether all grid rows have been computed."""
+        return self.done >= self.total
+
+    @property
+    def delta_chi2(self) -> np.ndarray:
+        """Chi-squared of each grid point above the chi-squared of the fit."""
+        return self.chi2 - self.chi2_min
+
+
+def landscape_axis(
+    value: float,
+    error: float,
+    span: float,
+    points: int,
+    bounds: Optional[Tuple[float, float]] = None,
+) -> np.ndarray:
+    """
+    Values of a parameter along one axis of the grid.
+
+    :param value: fitted value of the parameter
+    :type value: float
+    :param error: standard error of the parameter
+    :type error: float
+    :param span: number of standard errors on each side of the fitted value
+    :type span: float
+    :param points: number of values
+    :type points: int
+    :param bounds: Optional. Lowest and highest values, instead of the span.
+    :type bounds: Optional[Tuple[float, float]]
+    :return: evenly spaced values
+    :rtype: np.ndarray
+    """
+    if bounds is not None:
+        return np.linspace(bounds[0], bounds[1], points)
+    if not math.isfinite(error) or error == 0:
+        # A degenerate fit has no meaningful error, so span the value itself
+        error = max(abs(value), 1.0)
+    return np.linspace(value - span * error, value + span * error, points)
+
+
+def new_chi2_landscape(
+    a: np.ndarray,
+    first_index: int,
+    second_index: int,
+    first_values: np.ndarray,
+    second_values: np.ndarray,
+) -> Chi2Landscape:
+    """
+    Create a landscape whose grid points are not computed yet.
+
+    :param a: fitted parameters
+    :type a: np.ndarray
+    :param first_index: index of the parameter on the x axis
+    :type first_index: int
+    :param second_index: index of the parameter on the y axis
+    :type second_index: int
+    :param first_values: values of the first parameter
+    :type first_values: np.ndarray
+    :param second_values: values of the second parameter
+    :type second_values: np.ndarray
+    :return: an empty landscape
+    :rtype: Chi2Landscape
+    """
+    return Chi2Landscape(
+        first_index=first_index,
+        second_index=second_index,
+        first_values=np.asarray(first_values, dtype=float),
+        second_values=np.asarray(second_values, dtype=float),
+        a=np.array(a, dtype=float),
+        chi2=np.full(shape=(len(second_values), len(first_values)), fill_value=np.nan),
+    )
+
+
+def chi2_grid(  # pylint: disable=too-many-arguments
+    func: FittingFunction,
+    x: np.ndarray,
+    y: np.ndarray,
+    variance: np.ndarray,
+    a: np.ndarray,
+    first_index: int,
+    second_index: int,
+    first_values: np.ndarray,
+    second_values: np.ndarray,
+) -> np.ndarray:
+    """
+    Compute chi-squared over a grid of two parameters in a single batched call.
+
+    The fitting function is called once with parameters whose entries are arrays
+    of all the grid points. Functions which can't be called this way are
+    evaluated one grid point at a time instead.
+
+    :param func: fitting function
+    :type func: FittingFunction
+    :param x: x values
+    :type x: np.ndarray
+    :param y: y values
+    :type y: np.ndarray
+    :param variance: variance of each residual, as returned by
+        :func:`residuals_variance`
+    :type variance: np.ndarray
+    :param a: fitted parameters
+    :type a: np.ndarray
+    :param first_index: index of the parameter changing along the grid columns
+    :type first_index: int
+    :param second_index: index of the parameter changing along the grid rows
+    :type second_index: int
+    :param first_values: values of the first parameter
+    :type first_values: np.ndarray
+    :param second_values: values of the second parameter
+    :type second_values: np.ndarray
+    :return: chi-squared, whose rows are the second values and columns are the
+        first values
+    :rtype: np.ndarray
+    """
+    parameters = np.repeat(
+        np.asarray(a, dtype=float)[:, np.newaxis],
+        len(first_values) * len(second_values),
+        axis=1,
+    )
+    first_grid, second_grid = np.meshgrid(first_values, second_values)
+    parameters[first_index] = first_grid.ravel()
+    parameters[second_index] = second_grid.ravel()
+    values = _evaluate(func, parameters, x)
+    with np.errstate(all="ignore"):
+        chi2 = np.sum((y - values) ** 2 / variance, axis=1)
+    return chi2.reshape(first_grid.shape)
+
+
+async def compute_chi2_landscape(
+    func: FittingFunction,
+    data: FittingData,
+    landscape: Chi2Landscape,
+    on_update: Optional[Callable[[Chi2Landscape], None]] = None,
+):
+    """
+    Fill the grid of a landscape in a worker thread, a chunk of rows at a time.
+
+    Chunks are sized so that evaluating the function on a chunk takes at most
+    :data:`CHI2_LANDSCAPE_CHUNK_SIZE` values, which bounds the memory used.
+
+    :param func: fitting function
+    :type func: FittingFunction
+    :param data: fitted data, of which only the selected records are used
+    :type data: FittingData
+    :param landscape: landscape to fill
+    :type landscape: Chi2Landscape
+    :param on_update: Optional. Callback to run whenever a chunk is done.
+    :type on_update: Optional[Callable[[Chi2Landscape], None]]
+    """
+    x, y = np.array(data.x, dtype=float), np.array(data.y, dtype=float)
+    variance = residuals_variance(func, data, landscape.a)
+    chi2_min = await run_in_background(
+        chi2_grid,
+        func,
+        x,
+        y,
+        variance,
+        landscape.a,
+        landscape.first_index,
+        landscape.second_index,
+        landscape.a[[landscape.first_index]],
+        landscape.a[[landscape.second_index]],
+    )
+    landscape.chi2_min = float(chi2_min[0, 0])
+    row_size = max(len(landscape.first_values) * len(x), 1)
+    rows_per_chunk = max(CHI2_LANDSCAPE_CHUNK_SIZE // row_size, 1)
+    while not landscape.finished:
+        start = landscape.done
+        stop = min(start + rows_per_chunk, landscape.total)
+        landscape.chi2[start:stop] = await run_in_background(
+            chi2_grid,
+            func,
+            x,
+            y,
+            variance,
+            landscape.a,
+            landscape.first_index,
+            landscape.second_index,
+            landscape.first_values,
+            landscape.second_values[start:stop],
+        )
+        landscape.done = stop
+        if on_update is not None:
+            on_update(landscape)
+
+
+def residuals_variance(
+    func: FittingFunction, data: FittingData, a: np.ndarray
+) -> np.ndarray:
+    """
+    Variance of the residuals of each record, by which chi-squared is weighted.
+
+    This is the square of the y errors. If there are x errors, they are
+    propagated through the slope of the function at the fitted parameters.
+
+    :param func: fitting function
+    :type func: FittingFunction
+    :param data: fitted data, of which only the selected records are used
+    :type data: FittingData
+    :param a: fitted parameters
+    :type a: np.ndarray
+    :return: variance of each selected record
+    :rtype: np.ndarray
+    """
+    variance = (
+        np.ones(len(data.y))
+        if data.yerr is None
+        else np.array(data.yerr, dtype=float) ** 2
+    )
+    if data.xerr is not None and func.x_derivative is not None:
+        with np.errstate(all="ignore"):
+            slope = np.broadcast_to(func.x_derivative(a, data.x), variance.shape)
+        variance = variance + (slope * np.asarray(data.xerr)) ** 2
+    return variance
+
+
+def _evaluate(func: FittingFunction, parameters: np.ndarray, x: np.ndarray):
+    shape = (parameters.shape[1], len(x))
+    active = [i for i in range(func.n) if i not in func.fixed]
+    all_parameters = np.empty(shape=(func.n, shape[0]))
+    all_parameters[active] = parameters
+    for i, value in func.fixed.items():
+        all_parameters[i] = value
+    with np.errstate(all="ignore"):
+        try:
+            return np.broadcast_to(
+                func.fit_func(all_parameters[:, :, np.newaxis], x), shape
+            )
+        except (TypeError, ValueError, IndexError):
+            return np.array(
+                [np.broadcast_to(func(point, x), x.shape) for point in parameters.T],
+                dtype=float,
+            )
@@ -0,0 +1,286 @@
+"""Cancellable fit which reports its progress while running."""
+import itertools
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple, Union
+
+import numpy as np
+from eddington import FittingData, FittingFunction, FittingResult
+from eddington.exceptions import FittingError
+from scipy.odr import ODR, Model, Output, RealData
+
+from eddington_gui.consts import ENCODING, FIT_ITERATIONS_CHUNK, FIT_MAX_ITERATIONS
+from eddington_gui.exceptions import FitCancelledError, FitTimeoutError
+from eddington_gui.fitting.fit_statistics import (
+    CLOSED_FORM,
+    ODR_METHOD,
+    EvaluationCounter,
+    FitStatistics,
+)
+from eddington_gui.fitting.linear_fit import LinearSolution, solve_linear
+
+# ODR sets the last digit of its info to 4 when stopping at the iterations limit
+_ITERATIONS_LIMIT_INFO = 4
+# ODR sets the last digit of its info to 1, 2 or 3 when the fit has converged
+_CONVERGED_INFO = (1, 2, 3)
+# Position of the iterations count in ODRPACK's integer work array is
+# NQ * NP + NQ * M + NP + 14, with a single x and y dimension (M = NQ = 1)
+_ITERATIONS_WORK_OFFSET = 15
+# A line of ODR's iteration report starts with the iteration number, the number of
+# function evaluations so far and the weighted sum of squares, such as
+# "    3      17  2.44699D+03  ..."
+_ITERATION_REPORT_LINE = re.compile(r"^\s*(\d+)\s+\d+\s+(\S+D[+-]\d+)\s")
+
+
+@dataclass
+class FitProgress:
+    """Progress of a fit job."""
+
+    iterations: int
+    elapsed: float
+    chi2: float
+    max_iterations: int = FIT_MAX_ITERATIONS
+
+
+class FitJob:  # pylint: disable=too-many-instance-attributes
+    """
+    A fit of data, run a few iterations at a time.
+
+    The fit gives the same result as :func:`eddington.fit`. Between chunks of
+    iterations, the job reports its progress and checks whether it has been
+    cancelled or has run out of time. The job is shared between the UI thread,
+    which may cancel it, and the worker thread running it.
+
+    The data is copied when the job is created, so changing the records selection
+    while the fit is running doesn't affect it.
+
+    Functions which are linear in their parameters, such as polynomials, are
+    solved in closed form. If the x errors are given and are all zero, this is the
+    fit result and no iterations are needed. Otherwise, the closed-form solution is
+    the starting point of the fit, which then converges within a few iterations.
+    Data without x errors is fitted by ODR with unit x weights, as in
+    :func:`eddington.fit`, so it is iterated as well.
+
+    Evaluations of the fitting function and its derivatives are counted and timed,
+    and chi2 is traced after each iteration, as reported by ODR. Evaluations made
+    while checking whether the function is linear are counted apart from those of
+    the fit itself. Once the fit is done, these are in :attr:`statistics`.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        data: Union[FittingData, RealData],
+        func: FittingFunction,
+        a0: Optional[np.ndarray] = None,
+        timeout: Optional[float] = None,
+        on_progress: Optional[Callable[[FitProgress], None]] = None,
+    ):
+        """
+        Constructor.
+
+        :param data: data to fit, or its selected records as ODR data
+        :type data: Union[FittingData, RealData]
+        :param func: function to fit the data according to
+        :type func: FittingFunction
+        :param a0: Optional. Initial guess for the parameters.
+        :type a0: Optional[np.ndarray]
+        :param timeout: Optional. Seconds after which the fit is stopped.
+        :type timeout: Optional[float]
+        :param on_progress: Optional. Callback to run, from the worker thread,
+            after each chunk of iterations.
+        :type on_progress: Optional[Callable[[FitProgress], None]]
+        :raises FittingError: Raised when missing information for fitting.
+        """
+        if data.x is None:
+            raise FittingError("Cannot fit data without x values")
+        if data.y is None:
+            raise FittingError("Cannot fit data without y values")
+        self.func = func
+        self.real_data = (
+            data
+            if isinstance(data, RealData)
+            else RealData(x=data.x, y=data.y, sx=data.xerr, sy=data.yerr)
+        )
+        self.a0 = (
+            np.full(shape=func.active_parameters, fill_value=1.0) if a0 is None else a0
+        )
+        self.timeout = timeout
+        self.on_progress = on_progress
+        self.iterations = 0
+        self.converged = False
+        self.statistics: Optional[FitStatistics] = None
+        self.__cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the job has been cancelled."""
+        return self.__cancel_event.is_set()
+
+    def cancel(self):
+        """Cancel the job. The fit stops after its current chunk of iterations."""
+        self.__cancel_event.set()
+
+    def run(self) -> FittingResult:
+        """
+        Run the fit. This is a blocking method, meant to run in a worker thread.
+
+        Once done, :attr:`iterations` holds the number of iterations of the fit,
+        which is 0 when it has been solved in closed form, and :attr:`converged`
+        tells whether the fit has converged before the iterations limit.
+
+        :return: The fit result
+        :rtype: FittingResult
+        :raises FitCancelledError: Raised when the job has been cancelled.
+        :raises FitTimeoutError: Raised when the fit did not finish in time.
+        """
+        # ODR sets the members of its output when it runs
+        # pylint: disable=no-member
+        start = time.monotonic()
+        self.__check_cancelled()
+        linearity_counter = EvaluationCounter(self.func)
+        linear_solution = solve_linear(
+            linearity_counter,
+            x=self.real_data.x,
+            y=self.real_data.y,
+            yerr=self.real_data.sy,
+        )
+        fit_counters: List[Optional[EvaluationCounter]] = [
+            None if func is None else EvaluationCounter(func)
+            for func in [self.func, self.func.a_derivative, self.func.x_derivative]
+        ]
+        counters = [linearity_counter] + [
+            counter for counter in fit_counters if counter is not None
+        ]
+        if linear_solution is not None and self.__has_exact_x():
+            self.iterations = 0
+            self.converged = True
+            self.statistics = self.__statistics(CLOSED_FORM, start, counters, [])
+            return self.__linear_fitting_result(linear_solution)
+        with tempfile.TemporaryDirectory() as reports_directory:
+            output, chi2_trace = self.__run_odr(
+                linear_solution, fit_counters, start, reports_directory
+            )
+        self.converged = output.info % 10 in _CONVERGED_INFO
+        self.statistics = self.__statistics(ODR_METHOD, start, counters, chi2_trace)
+        return FittingResult(
+            a0=self.a0,
+            a=output.beta,
+            aerr=output.sd_beta,
+            acov=output.cov_beta,
+            degrees_of_freedom=len(self.real_data.x) - self.func.active_parameters,
+            chi2=output.sum_square,
+        )
+
+    def __run_odr(
+        self,
+        linear_solution: Optional[LinearSolution],
+        counters: List[Optional[EvaluationCounter]],
+        start: float,
+        reports_directory: str,
+    ) -> Tuple[Output, List[Tuple[int, float]]]:
+        # ODR sets the members of its output when it runs
+        # pylint: disable=no-member
+        func, a_derivative, x_derivative = counters
+        kwargs = {"fcn": func}
+        if a_derivative is not None:
+            kwargs["fjacb"] = a_derivative
+        if x_derivative is not None:
+            kwargs["fjacd"] = x_derivative
+        # ODRPACK refuses to overwrite its report, so each chunk writes a new one
+        report_paths = (
+            os.path.join(reports_directory, f"report{chunk}.txt")
+            for chunk in itertools.count()
+        )
+        odr = ODR(
+            data=self.real_data,
+            model=Model(**kwargs),
+            beta0=self.a0 if linear_solution is None else linear_solution.a,
+            maxit=FIT_ITERATIONS_CHUNK,
+            rptfile=next(report_paths),
+        )
+        odr.set_iprint(init=0, iter=1, iter_step=1, final=0)
+        output = odr.run()
+        self.iterations = self.__count_iterations(output)
+        chi2_trace = _read_chi2_report(odr.rptfile)
+        while (
+            output.info % 10 == _ITERATIONS_LIMIT_INFO
+            and self.iterations < FIT_MAX_ITERATIONS  # noqa: W503
+        ):
+            elapsed = time.monotonic() - start
+            self.__check_cancelled()
+            if self.timeout is not None and elapsed > self.timeout:
+                raise FitTimeoutError(
+                    f"Fit did not finish within {self.timeout:g} seconds "
+                    f"({self.iterations} iterations)"
+                )
+            if self.on_progress is not None:
+                self.on_progress(
+                    FitProgress(
+                        iterations=self.iterations,
+                        elapsed=elapsed,
+                        chi2=float(output.sum_square),
+                    )
+                )
+            odr.rptfile = next(report_paths)
+            output = odr.restart(
+                iter=min(FIT_ITERATIONS_CHUNK, FIT_MAX_ITERATIONS - self.iterations)
+            )
+            self.iterations = self.__count_iterations(output)
+            chi2_trace.extend(_read_chi2_report(odr.rptfile))
+        return output, chi2_trace
+
+    def __statistics(
+        self,
+        method: str,
+        start: float,
+        counters: List[EvaluationCounter],
+        chi2_trace: List[Tuple[int, float]],
+    ) -> FitStatistics:
+        linearity_counter, func, *derivatives = counters
+        return FitStatistics(
+            method=method,
+            iterations=self.iterations,
+            converged=self.converged,
+            evaluations=func.calls,
+            linearity_evaluations=linearity_counter.calls,
+            # ODR evaluates both derivatives for each Jacobian it needs
+            jacobian_evaluations=max([counter.calls for counter in derivatives] + [0]),
+            evaluation_time=sum(counter.time for counter in counters),
+            wall_time=time.monotonic() - start,
+            chi2_trace=chi2_trace,
+        )
+
+    def __has_exact_x(self) -> bool:
+        return self.real_data.sx is not None and not np.any(self.real_data.sx)
+
+    def __linear_fitting_result(self, solution: LinearSolution) -> FittingResult:
+        degrees_of_freedom = len(self.real_data.x) - self.func.active_parameters
+        return FittingResult(
+            a0=self.a0,
+            a=solution.a,
+            aerr=np.sqrt(np.diag(solution.acov) * solution.chi2 / degrees_of_freedom),
+            acov=solution.acov,
+            degrees_of_freedom=degrees_of_freedom,
+            chi2=solution.chi2,
+        )
+
+    def __count_iterations(self, output) -> int:
+        return int(output.iwork[2 * len(self.a0) + _ITERATIONS_WORK_OFFSET])
+
+    def __check_cancelled(self):
+        if self.cancelled:
+            raise FitCancelledError("Fit has been cancelled")
+
+
+def _read_chi2_report(report_path: str) -> List[Tuple[int, float]]:
+    with open(report_path, encoding=ENCODING) as report_file:
+        matches = [_ITERATION_REPORT_LINE.match(line) for line in report_file]
+    return [
+        (int(match.group(1)), float(match.group(2).replace("D", "E")))
+        for match in matches
+        if match is not None
+    ]
@@ -0,0 +1,135 @@
+"""In-memory cache of fit results."""
+import hashlib
+import marshal
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from eddington import FittingData, FittingFunction, FittingResult
+
+from eddington_gui.consts import ENCODING, FIT_RESULT_CACHE_SIZE
+
+
+class FitResultCache:
+    """
+    Least recently used cache of fit results, keyed by the content of the fit.
+
+    The key is a hash of the used data columns, the records selection, the
+    fitting function and the initial guess. Going back to a configuration which
+    has already been fitted returns its result without fitting again.
+    """
+
+    def __init__(self, max_size: int = FIT_RESULT_CACHE_SIZE):
+        """
+        Constructor.
+
+        :param max_size: maximal number of cached fit results
+        :type max_size: int
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.__results: "OrderedDict[str, FittingResult]" = OrderedDict()
+
+    @classmethod
+    def key(
+        cls,
+        data: FittingData,
+        func: FittingFunction,
+        a0: Optional[np.ndarray] = None,
+    ) -> str:
+        """
+        Build the cache key of a fit.
+
+        :param data: fitted data
+        :type data: FittingData
+        :param func: fitting function
+        :type func: FittingFunction
+        :param a0: Optional. Initial guess for the parameters.
+        :type a0: Optional[np.ndarray]
+        :return: cache key
+        :rtype: str
+        """
+        hasher = hashlib.sha256()
+        for column in data.used_columns:
+            if column is None:
+                hasher.update(b"\x00")
+                continue
+            values = np.ascontiguousarray(
+                data.column_data(column, only_selected=False), dtype=float
+            )
+            hasher.update(column.encode(ENCODING))
+            hasher.update(values.tobytes())
+        hasher.update(
+            np.packbits(np.asarray(data.records_indices, dtype=bool)).tobytes()
+        )
+        hasher.update(cls.function_key(func).encode(ENCODING))
+        if a0 is not None:
+            hasher.update(np.asarray(a0, dtype=float).tobytes())
+        return hasher.hexdigest()
+
+    @classmethod
+    def function_key(cls, func: FittingFunction) -> str:
+        """
+        Build a key identifying a fitting function.
+
+        Besides its name, the key contains a hash of the function's code, so
+        reloading a modified user module changes the key.
+
+        :param func: fitting function
+        :type func: FittingFunction
+        :return: function key
+        :rtype: str
+        """
+        code = getattr(func.fit_func, "__code__", None)
+        code_hash = (
+            "" if code is None else hashlib.sha256(marshal.dumps(code)).hexdigest()
+        )
+        return f"{func.name}|{func.n}|{sorted(func.fixed.items())}|{code_hash}"
+
+    def __len__(self) -> int:
+        """Number of cached fit results."""
+        return len(self.__results)
+
+    def __str__(self) -> str:
+        """Describe the size of the cache and how often it has been used."""
+        return (
+            f"Fit results cache: {len(self)} results, {self.hits} hits, "
+            f"{self.misses} misses"
+        )
+
+    def get(self, key: str) -> Optional[FittingResult]:
+        """
+        Get a cached fit result, and count the hit or the miss.
+
+        :param key: cache key of the fit
+        :type key: str
+        :return: The cached fit result, or None if the fit is not cached
+        :rtype: Optional[FittingResult]
+        """
+        fitting_result = self.__results.get(key, None)
+        if fitting_result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.__results.move_to_end(key)
+        return fitting_result
+
+    def put(self, key: str, fitting_result: FittingResult):
+        """
+        Cache a fit result, evicting the least recently used ones if needed.
+
+        :param key: cache key of the fit
+        :type key: str
+        :param fitting_result: fit result to cache
+        :type fitting_result: FittingResult
+        """
+        self.__results[key] = fitting_result
+        self.__results.move_to_end(key)
+        while len(self.__results) > self.max_size:
+            self.__results.popitem(last=False)
+
+    def clear(self):
+        """Remove all cached fit results and reset the counters."""
+        self.__results.clear()
+        self.hits = self.misses = 0
@@ -0,0 +1,119 @@
+"""Counting and timing the work done by a fit."""
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple, Union
+
+from eddington import FittingResult
+
+from eddington_gui.consts import ENCODING
+
+CLOSED_FORM = "closed form"
+ODR_METHOD = "ODR"
+
+
+@dataclass
+class FitStatistics:  # pylint: disable=too-many-instance-attributes
+    """
+    How much work a fit took.
+
+    :param method: how the fit was solved, :data:`CLOSED_FORM` or :data:`ODR_METHOD`
+    :param iterations: number of iterations
+    :param converged: whether the fit has converged before the iterations limit
+    :param evaluations: number of evaluations of the fitting function by the fit
+    :param linearity_evaluations: number of evaluations of the fitting function
+        while checking whether it is linear in its parameters, and solving it in
+        closed form if it is
+    :param jacobian_evaluations: number of evaluations of the derivatives of the
+        fitting function. 0 if they are approximated by evaluating the function.
+    :param evaluation_time: seconds spent evaluating the function and its
+        derivatives, including the linearity check
+    :param wall_time: seconds the whole fit took
+    :param chi2_trace: the iteration number and chi2 after each iteration
+    """
+
+    method: str
+    iterations: int
+    converged: bool
+    evaluations: int
+    linearity_evaluations: int
+    jacobian_evaluations: int
+    evaluation_time: float
+    wall_time: float
+    chi2_trace: List[Tuple[int, float]] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """Represent the statistics as a dictionary which can be saved as json."""
+        return asdict(self)
+
+    def __str__(self) -> str:
+        """Describe the statistics in a few lines."""
+        return "\n".join(
+            [
+                f"Fit method: {self.method}, {self.iterations} iterations"
+                + ("" if self.converged else " (did not converge)"),
+                f"Function evaluations: {self.evaluations} "
+                f"(+{self.linearity_evaluations} checking linearity), "
+                f"Jacobian evaluations: {self.jacobian_evaluations}",
+                f"Wall time: {self.wall_time:.3g}s, of which "
+                f"{self.evaluation_time:.3g}s evaluating the function",
+            ]
+        )
+
+
+class EvaluationCounter:
+    """
+    Wraps a fitting function, or one of its derivatives, counting and timing calls.
+
+    Other attributes are those of the wrapped function, so a counter can be used
+    wherever the fitting function is.
+    """
+
+    def __init__(self, func: Callable):
+        """
+        Constructor.
+
+        :param func: the wrapped function
+        :type func: Callable
+        """
+        self.func = func
+        self.calls = 0
+        self.time = 0.0
+
+    def __call__(self, *args):
+        """Call the wrapped function."""
+        start = time.perf_counter()
+        try:
+            return self.func(*args)
+        finally:
+            self.calls += 1
+            self.time += time.perf_counter() - start
+
+    def __getattr__(self, name):
+        """Get an attribute of the wrapped function."""
+        return getattr(self.func, name)
+
+
+def save_fitting_result_json(
+    fitting_result: FittingResult,
+    file_path: Union[str, Path],
+    statistics: Optional[FitStatistics] = None,
+):
+    """
+    Write a fit result to a json file, along with the statistics of its fit.
+
+    :param fitting_result: the fit result
+    :type fitting_result: FittingResult
+    :param file_path: path of the json file
+    :type file_path: Union[str, Path]
+    :param statistics: Optional. Statistics of the fit, saved under "statistics".
+    :type statistics: Optional[FitStatistics]
+    """
+    if statistics is None:
+        fitting_result.save_json(file_path)
+        return
+    content = json.loads(fitting_result.json_string)
+    content["statistics"] = statistics.to_dict()
+    with open(file_path, mode="w", encoding=ENCODING) as output_file:
+        json.dump(content, output_file, indent=1)
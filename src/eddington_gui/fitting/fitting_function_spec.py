@@ -0,0 +1,60 @@
+"""Picklable description of a fitting function."""
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from eddington import FittingFunction, FittingFunctionsRegistry, polynomial
+
+from eddington_gui.consts import POLYNOMIAL
+
+_POLYNOMIAL_NAME = re.compile(rf"{POLYNOMIAL}_(\d+)")
+
+
+@dataclass(frozen=True)
+class FittingFunctionSpec:
+    """
+    Description of a fitting function, which can be sent to another process.
+
+    Fitting functions themselves cannot be pickled, so worker processes load
+    them by their name, or by their degree for polynomials.
+
+    :param name: name of the fitting function in the registry, or "polynomial"
+    :param degree: degree of the polynomial, if this is a polynomial
+    """
+
+    name: str
+    degree: Optional[int] = None
+
+    @classmethod
+    def from_function(cls, func: FittingFunction) -> "FittingFunctionSpec":
+        """
+        Build the description of a fitting function.
+
+        :param func: fitting function
+        :type func: FittingFunction
+        :return: description of the fitting function
+        :rtype: FittingFunctionSpec
+        """
+        match = _POLYNOMIAL_NAME.fullmatch(func.name)
+        if match is not None:
+            return FittingFunctionSpec(name=POLYNOMIAL, degree=int(match.group(1)))
+        return FittingFunctionSpec(name=func.name)
+
+    @property
+    def title(self) -> str:
+        """Name of the fitting function to show to the user."""
+        if self.degree is None:
+            return self.name
+        return f"{self.name} (degree {self.degree})"
+
+    def load(self) -> FittingFunction:
+        """
+        Load the described fitting function.
+
+        :return: fitting function
+        :rtype: FittingFunction
+        :raises FittingFunctionLoadError: Raised when the function is not found.
+        """
+        if self.degree is not None:
+            return polynomial(self.degree)
+        return FittingFunctionsRegistry.load(self.name)
@@ -0,0 +1,176 @@
+"""Influence of each selected record on a fit, without refitting."""
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from eddington import FittingData, FittingFunction, FittingResult
+from scipy.linalg import solve_triangular
+
+from eddington_gui.fitting.chi2_landscape import residuals_variance
+
+LEVERAGE = "Leverage"
+COOKS_DISTANCE = "Cook's distance"
+MAX_SHIFT = "Max shift (errors)"
+INFLUENCE_COLUMNS = [LEVERAGE, COOKS_DISTANCE, MAX_SHIFT]
+
+
+@dataclass
+class Influence:
+    """
+    Influence of each selected record on a fit.
+
+    :param records: numbers of the fitted records, starting from 1
+    :param leverage: leverage of each record, between 0 and 1
+    :param cooks_distance: Cook's distance of each record
+    :param parameter_shifts: change of the parameters when leaving each record
+        out, a row per record
+    :param parameter_errors: standard errors of the fitted parameters
+    :param cooks_metric: matrix M for which the Cook's distance of a parameters
+        shift is the squared norm of M times the shift
+    :param exact: whether the shifts are of actual refits, rather than
+        linearized ones
+    """
+
+    records: np.ndarray
+    leverage: np.ndarray
+    cooks_distance: np.ndarray
+    parameter_shifts: np.ndarray
+    parameter_errors: np.ndarray
+    cooks_metric: np.ndarray
+    exact: bool = False
+
+    @property
+    def max_shift(self) -> np.ndarray:
+        """Largest change of a parameter when leaving each record out, in errors."""
+        with np.errstate(all="ignore"):
+            return np.max(np.abs(self.parameter_shifts / self.parameter_errors), axis=1)
+
+    def with_shifts(self, parameter_shifts: np.ndarray) -> "Influence":
+        """
+        Use the parameter shifts of actual refits, leaving each record out.
+
+        Cook's distance is recalculated from the shifts. Records whose refit has
+        failed should have NaN shifts.
+
+        :param parameter_shifts: shifts of the refits, a row per record
+        :type parameter_shifts: np.ndarray
+        :return: influence with exact shifts
+        :rtype: Influence
+        """
+        return replace(
+            self,
+            cooks_distance=np.sum(
+                (parameter_shifts @ self.cooks_metric.T) ** 2, axis=1
+            ),
+            parameter_shifts=parameter_shifts,
+            exact=True,
+        )
+
+    def values_by_record(self, number_of_records: int) -> Dict[str, np.ndarray]:
+        """
+        Influence columns with a value for each record, NaN for unfitted records.
+
+        :param number_of_records: number of records, selected or not
+        :type number_of_records: int
+        :return: values of each of :data:`INFLUENCE_COLUMNS`
+        :rtype: Dict[str, np.ndarray]
+        """
+        columns = OrderedDict()
+        for name, values in [
+            (LEVERAGE, self.leverage),
+            (COOKS_DISTANCE, self.cooks_distance),
+            (MAX_SHIFT, self.max_shift),
+        ]:
+            column = np.full(number_of_records, fill_value=np.nan)
+            in_range = self.records <= number_of_records
+            column[self.records[in_range] - 1] = values[in_range]
+            columns[name] = column
+        return columns
+
+
+def linearized_influence(
+    func: FittingFunction,
+    data: FittingData,
+    fitting_result: FittingResult,
+    records: Optional[np.ndarray] = None,
+) -> Influence:
+    """
+    Calculate the influence of each selected record in a single pass.
+
+    The fitting function is linearized around the fitted parameters, using the
+    Jacobian of the weighted residuals. The leverage of a record is the diagonal
+    of the hat matrix, and leaving a record out shifts the parameters by a
+    single Gauss-Newton step. For functions which are linear in their
+    parameters, with exact x values, the shifts are exact.
+
+    :param func: the fitting function
+    :type func: FittingFunction
+    :param data: the fitted data, of which only the selected records are used
+    :type data: FittingData
+    :param fitting_result: the fit result
+    :type fitting_result: FittingResult
+    :param records: Optional. Numbers of the selected records, starting from 1.
+        Defaults to the records selection of the data.
+    :type records: Optional[np.ndarray]
+    :return: influence of each selected record
+    :rtype: Influence
+    :raises ValueError: Raised when there are no more records than parameters.
+    """
+    a = np.asarray(fitting_result.a, dtype=float)
+    if records is None:
+        records = np.flatnonzero(data.records_indices) + 1
+    number_of_parameters = len(a)
+    if len(data.x) <= number_of_parameters:
+        raise ValueError(
+            f"Influence needs more than {number_of_parameters} selected records"
+        )
+    jacobian, residuals = _weighted_linearization(func, data, a)
+    orthogonal, triangular = np.linalg.qr(jacobian)
+    leverage = np.sum(orthogonal**2, axis=1)
+    variance = residuals @ residuals / (len(residuals) - number_of_parameters)
+    with np.errstate(all="ignore"):
+        parameter_shifts = -(
+            solve_triangular(triangular, orthogonal.T) * residuals / (1 - leverage)
+        ).T
+        cooks_metric = triangular / np.sqrt(number_of_parameters * variance)
+        cooks_distance = (
+            residuals**2
+            / (number_of_parameters * variance)  # noqa: W503
+            * leverage  # noqa: W503
+            / (1 - leverage) ** 2  # noqa: W503
+        )
+    return Influence(
+        records=np.asarray(records, dtype=int),
+        leverage=leverage,
+        cooks_distance=cooks_distance,
+        parameter_shifts=parameter_shifts,
+        parameter_errors=np.asarray(fitting_result.aerr, dtype=float),
+        cooks_metric=cooks_metric,
+    )
+
+
+def _weighted_linearization(
+    func: FittingFunction, data: FittingData, a: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    x, y = np.asarray(data.x, dtype=float), np.asarray(data.y, dtype=float)
+    weights = 1 / np.sqrt(residuals_variance(func, data, a))
+    return _jacobian(func, a, x) * weights[:, np.newaxis], (y - func(a, x)) * weights
+
+
+def _jacobian(func: FittingFunction, a: np.ndarray, x: np.ndarray) -> np.ndarray:
+    shape = (len(x), len(a))
+    if func.a_derivative is not None:
+        with np.errstate(all="ignore"):
+            jacobian = np.asarray(func.a_derivative(a, x), dtype=float)
+        if jacobian.T.shape == shape and np.all(np.isfinite(jacobian)):
+            return jacobian.T
+    # Central differences, with steps balancing rounding and truncation errors
+    steps = np.cbrt(sys.float_info.epsilon) * np.maximum(np.abs(a), 1.0)
+    jacobian = np.empty(shape)
+    for i, step in enumerate(steps):
+        delta = np.zeros(len(a))
+        delta[i] = step
+        jacobian[:, i] = (func(a + delta, x) - func(a - delta, x)) / (2 * step)
+    return jacobian
@@ -0,0 +1,165 @@
+"""Closed-form fit of fitting functions which are linear in their parameters."""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+from eddington import FittingFunction
+from scipy.linalg import solve_triangular
+
+# Relative tolerance when checking that a function is linear in its parameters
+_LINEARITY_TOLERANCE = 1e-8
+# Relative size of the smallest diagonal element of R for which the least squares
+# problem is considered to have a unique solution
+_RANK_TOLERANCE = 1e-12
+
+
+@dataclass
+class LinearSolution:
+    """
+    Weighted least squares solution of a linear fit.
+
+    :param a: fitted parameters
+    :param acov: covariance of the parameters, not scaled by the residual
+        variance, as in ODR
+    :param chi2: weighted sum of the squared residuals
+    """
+
+    a: np.ndarray
+    acov: np.ndarray
+    chi2: float
+
+
+def linear_design(
+    func: FittingFunction, x: np.ndarray
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Write a fitting function as an offset plus a design matrix times its parameters.
+
+    Linearity is checked by evaluating the function on the given x values, so it
+    works for user defined functions and for functions with fixed parameters, for
+    which the fixed terms are part of the offset.
+
+    :param func: fitting function
+    :type func: FittingFunction
+    :param x: x values on which the function is evaluated
+    :type x: np.ndarray
+    :return: The offset and the design matrix, or None if the function is not
+        linear in its parameters.
+    :rtype: Optional[Tuple[np.ndarray, np.ndarray]]
+    """
+    n = func.active_parameters
+    with np.errstate(all="ignore"):
+        offset = np.broadcast_to(func(np.zeros(n), x), x.shape).astype(float)
+        design = np.stack(
+            [
+                np.broadcast_to(func(unit, x), x.shape) - offset
+                for unit in np.eye(n, dtype=float)
+            ],
+            axis=1,
+        )
+        probe = np.random.default_rng(0).normal(size=n)
+        expected = offset + design @ probe
+        actual = np.broadcast_to(func(probe, x), x.shape)
+    if not np.all(np.isfinite(design)) or not np.all(np.isfinite(actual)):
+        return None
+    scale = np.max(np.abs(expected), initial=0.0)
+    if not np.allclose(
+        actual, expected, rtol=_LINEARITY_TOLERANCE, atol=_LINEARITY_TOLERANCE * scale
+    ):
+        return None
+    return offset, design
+
+
+def solve_linear(
+    func: FittingFunction,
+    x: np.ndarray,
+    y: np.ndarray,
+    yerr: Optional[np.ndarray] = None,
+) -> Optional[LinearSolution]:
+    """
+    Fit a function which is linear in its parameters in a single step.
+
+    The weighted least squares problem is solved with a QR decomposition. For
+    polynomials, it is solved in the Chebyshev basis over the x domain, which is
+    orthogonal and keeps high degrees well conditioned, and converted back to
+    the polynomial coefficients.
+
+    :param func: fitting function
+    :type func: FittingFunction
+    :param x: x values
+    :type x: np.ndarray
+    :param y: y values
+    :type y: np.ndarray
+    :param yerr: Optional. Errors of the y values. If None, all errors are 1.
+    :type yerr: Optional[np.ndarray]
+    :return: The solution, or None if the function is not linear in its
+        parameters, some y errors are 0, or the solution is not unique.
+    :rtype: Optional[LinearSolution]
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    weights = np.ones_like(y) if yerr is None else np.asarray(yerr, dtype=float)
+    if np.any(weights <= 0) or len(y) <= func.active_parameters:
+        return None
+    weights = 1 / weights
+    linear = linear_design(func, x)
+    if linear is None:
+        return None
+    offset, design = linear
+    basis, transform = _orthogonal_basis(x, design)
+    weighted_y = (y - offset) * weights
+    solution = _least_squares(basis * weights[:, np.newaxis], weighted_y)
+    if solution is None:
+        return None
+    coefficients, covariance = solution
+    residuals = weighted_y - (basis * weights[:, np.newaxis]) @ coefficients
+    return LinearSolution(
+        a=transform @ coefficients,
+        acov=transform @ covariance @ transform.T,
+        chi2=float(residuals @ residuals),
+    )
+
+
+def _least_squares(
+    weighted_basis: np.ndarray, weighted_y: np.ndarray
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    # Columns are normalized, so the rank check doesn't depend on their scale
+    norms = np.linalg.norm(weighted_basis, axis=0)
+    if np.any(norms == 0):
+        return None
+    orthogonal, triangular = np.linalg.qr(weighted_basis / norms)
+    diagonal = np.abs(np.diag(triangular))
+    if np.min(diagonal) <= _RANK_TOLERANCE * np.max(diagonal):
+        return None
+    coefficients = solve_triangular(triangular, orthogonal.T @ weighted_y)
+    triangular_inverse = solve_triangular(triangular, np.eye(len(diagonal)))
+    covariance = triangular_inverse @ triangular_inverse.T
+    return coefficients / norms, covariance / np.outer(norms, norms)
+
+
+def _orthogonal_basis(
+    x: np.ndarray, design: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    degree = design.shape[1] - 1
+    x_min, x_max = np.min(x), np.max(x)
+    if degree < 1 or x_min == x_max:
+        return design, np.eye(degree + 1)
+    with np.errstate(all="ignore"):
+        is_polynomial = np.allclose(
+            design, np.vander(x, degree + 1, increasing=True), rtol=1e-12
+        )
+    if not is_polynomial:
+        return design, np.eye(degree + 1)
+    domain = [x_min, x_max]
+    basis = np.polynomial.chebyshev.chebvander(
+        np.polynomial.polyutils.mapdomain(x, domain, [-1, 1]), degree
+    )
+    transform = np.zeros(shape=(degree + 1, degree + 1))
+    for i in range(degree + 1):
+        coefficients = (
+            np.polynomial.Chebyshev.basis(i, domain=domain)
+            .convert(kind=np.polynomial.Polynomial)
+            .coef
+        )
+        transform[: len(coefficients), i] = coefficients
+    return basis, transform
@@ -0,0 +1,185 @@
+"""Fitting many fitting functions to the same data, in order to rank them."""
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from eddington import FittingData, FittingFunctionsRegistry, FittingResult
+
+from eddington_gui.consts import POLYNOMIAL
+from eddington_gui.fitting.fit_job import FitJob
+from eddington_gui.fitting.fitting_function_spec import FittingFunctionSpec
+from eddington_gui.fitting.worker_pool import run_in_workers, worker_data
+
+
+@dataclass
+class ModelScore:
+    """
+    Goodness of the fit of a single fitting function.
+
+    Information criteria are calculated from the chi2 of the fit, which, for
+    known measurement errors, is minus twice the log likelihood up to a constant.
+
+    :param spec: the fitted function
+    :param number_of_records: number of fitted records
+    :param fitting_result: result of the fit, None if it has failed
+    :param error: the reason the fit has failed, if it has
+    """
+
+    spec: FittingFunctionSpec
+    number_of_records: int
+    fitting_result: Optional[FittingResult] = None
+    error: Optional[str] = None
+
+    @property
+    def number_of_parameters(self) -> Optional[int]:
+        """Number of fitted parameters."""
+        if self.fitting_result is None:
+            return None
+        return len(self.fitting_result.a)
+
+    @property
+    def chi2_reduced(self) -> Optional[float]:
+        """Reduced chi2 of the fit."""
+        if self.fitting_result is None:
+            return None
+        return float(self.fitting_result.chi2_reduced)
+
+    @property
+    def aic(self) -> Optional[float]:
+        """Akaike information criterion of the fit."""
+        if self.fitting_result is None:
+            return None
+        return float(self.fitting_result.chi2) + 2 * len(self.fitting_result.a)
+
+    @property
+    def bic(self) -> Optional[float]:
+        """Bayesian information criterion of the fit."""
+        if self.fitting_result is None:
+            return None
+        number_of_parameters = len(self.fitting_result.a)
+        return float(self.fitting_result.chi2) + number_of_parameters * math.log(
+            self.number_of_records
+        )
+
+
+RANKINGS: Dict[str, Callable[[ModelScore], Optional[float]]] = OrderedDict(
+    [
+        ("Reduced chi2", lambda score: score.chi2_reduced),
+        ("AIC", lambda score: score.aic),
+        ("BIC", lambda score: score.bic),
+    ]
+)
+
+
+def rank_models(scores: List[ModelScore], ranking: str) -> List[ModelScore]:
+    """
+    Sort model scores from the best to the worst.
+
+    For the reduced chi2, the best score is the closest to 1. For the information
+    criteria, the lowest is the best. Failed fits are put last.
+
+    :param scores: model scores to sort
+    :type scores: List[ModelScore]
+    :param ranking: name of the ranking, one of :data:`RANKINGS`
+    :type ranking: str
+    :return: sorted model scores
+    :rtype: List[ModelScore]
+    """
+    score_value = RANKINGS[ranking]
+
+    def sort_key(score: ModelScore):
+        value = score_value(score)
+        if value is None or not math.isfinite(value):
+            return (1, 0.0)
+        if ranking == "Reduced chi2":
+            return (0, abs(value - 1))
+        return (0, value)
+
+    return sorted(scores, key=sort_key)
+
+
+def model_search_specs(max_degree: int) -> List[FittingFunctionSpec]:
+    """
+    Describe all registered fitting functions and polynomials up to a degree.
+
+    Polynomials which are registered fitting functions as well, such as the
+    linear and parabolic functions, are not repeated. They are recognized by their
+    name or by their syntax.
+
+    :param max_degree: maximal degree of the polynomials
+    :type max_degree: int
+    :return: descriptions of the fitting functions
+    :rtype: List[FittingFunctionSpec]
+    """
+    specs = [
+        FittingFunctionSpec(name=name) for name in FittingFunctionsRegistry.names()
+    ]
+    names = {spec.name for spec in specs}
+    syntaxes = {FittingFunctionsRegistry.load(name).syntax for name in names} - {None}
+    for degree in range(1, max_degree + 1):
+        func = FittingFunctionSpec(name=POLYNOMIAL, degree=degree).load()
+        if func.name not in names and func.syntax not in syntaxes:
+            specs.append(FittingFunctionSpec.from_function(func))
+    return specs
+
+
+def fit_model(spec: FittingFunctionSpec, timeout: Optional[float] = None) -> ModelScore:
+    """
+    Fit a single function to the data of the worker process.
+
+    :param spec: function to fit
+    :type spec: FittingFunctionSpec
+    :param timeout: Optional. Seconds after which the fit is stopped.
+    :type timeout: Optional[float]
+    :return: score of the fit
+    :rtype: ModelScore
+    """
+    data = worker_data()
+    number_of_records = data.number_of_records
+    try:
+        fitting_result = FitJob(data, spec.load(), timeout=timeout).run()
+    # A model which cannot be fitted should not stop the search
+    except Exception as error:  # pylint: disable=broad-except
+        return ModelScore(spec, number_of_records, error=str(error))
+    return ModelScore(spec, number_of_records, fitting_result=fitting_result)
+
+
+async def search_models(  # pylint: disable=too-many-arguments
+    data: FittingData,
+    specs: List[FittingFunctionSpec],
+    module_paths: Optional[List[str]] = None,
+    timeout: Optional[float] = None,
+    on_score: Optional[Callable[[ModelScore], None]] = None,
+    max_workers: Optional[int] = None,
+) -> List[ModelScore]:
+    """
+    Fit all given functions to the data concurrently in a process pool.
+
+    Only the selected records are fitted, as described in :func:`run_in_workers`.
+    Cancelling the search cancels the fits which haven't started yet.
+
+    :param data: data to fit
+    :type data: FittingData
+    :param specs: functions to fit
+    :type specs: List[FittingFunctionSpec]
+    :param module_paths: Optional. Paths of user modules to load in each worker.
+    :type module_paths: Optional[List[str]]
+    :param timeout: Optional. Seconds after which each fit is stopped.
+    :type timeout: Optional[float]
+    :param on_score: Optional. Callback to run whenever a fit is done.
+    :type on_score: Optional[Callable[[ModelScore], None]]
+    :param max_workers: Optional. Number of worker processes. Defaults to the
+        number of cores.
+    :type max_workers: Optional[int]
+    :return: scores of all fits, in the order they were done
+    :rtype: List[ModelScore]
+    """
+    return await run_in_workers(
+        data,
+        fit_model,
+        [(spec, timeout) for spec in specs],
+        module_paths=module_paths,
+        on_result=on_score,
+        max_workers=max_workers,
+    )
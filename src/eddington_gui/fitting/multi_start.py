@@ -0,0 +1,222 @@
+"""Fitting from many starting points, in order to find the global best fit."""
+import math
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+from eddington import FittingData, FittingResult
+
+from eddington_gui.consts import MULTI_START_TOLERANCE
+from eddington_gui.fitting.fit_job import FitJob
+from eddington_gui.fitting.fitting_function_spec import FittingFunctionSpec
+from eddington_gui.fitting.worker_pool import run_in_workers, worker_data
+
+
+@dataclass
+class StartingPoint:
+    """
+    Initial guess from which a fitting function is fitted.
+
+    :param spec: the fitting function
+    :param label: name of the initial guess, shown to the user
+    :param a0: the initial guess
+    """
+
+    spec: FittingFunctionSpec
+    label: str
+    a0: np.ndarray
+
+
+@dataclass
+class StartResult:
+    """
+    Result of fitting from a single starting point.
+
+    :param start: the starting point
+    :param fitting_result: result of the fit, None if it has failed
+    :param converged: whether the fit has converged
+    :param error: the reason the fit has failed, if it has
+    """
+
+    start: StartingPoint
+    fitting_result: Optional[FittingResult] = None
+    converged: bool = False
+    error: Optional[str] = None
+
+
+@dataclass
+class Solution:
+    """
+    Distinct parameters to which fits from one or more starting points converged.
+
+    :param spec: the fitting function
+    :param fitting_result: the result of the fit with the lowest chi2
+    :param labels: labels of the starting points which converged to it
+    """
+
+    spec: FittingFunctionSpec
+    fitting_result: FittingResult
+    labels: List[str] = field(default_factory=list)
+
+    @property
+    def chi2(self) -> float:
+        """Chi2 of the fit."""
+        return float(self.fitting_result.chi2)
+
+    @property
+    def a(self) -> np.ndarray:
+        """Fitted parameters."""
+        return self.fitting_result.a
+
+    def is_same(self, spec: FittingFunctionSpec, fitting_result: FittingResult):
+        """Whether a fit of the given function converged to this solution."""
+        return (
+            spec == self.spec
+            and len(fitting_result.a) == len(self.a)  # noqa: W503
+            and np.allclose(  # noqa: W503
+                fitting_result.a,
+                self.a,
+                rtol=MULTI_START_TOLERANCE,
+                atol=MULTI_START_TOLERANCE * max(np.max(np.abs(self.a)), 1.0),
+            )
+        )
+
+
+def random_starting_points(
+    spec: FittingFunctionSpec,
+    a0_values: Sequence[np.ndarray],
+    number_of_parameters: int,
+    count: int,
+    seed: Optional[int] = None,
+) -> List[StartingPoint]:
+    """
+    Draw random initial guesses for a fitting function.
+
+    The magnitude of each parameter is drawn log-uniformly, over two orders of
+    magnitude around the largest given initial guess of that parameter, and its
+    sign is drawn at random.
+
+    :param spec: the fitting function
+    :type spec: FittingFunctionSpec
+    :param a0_values: initial guesses given by the user, if any
+    :type a0_values: Sequence[np.ndarray]
+    :param number_of_parameters: number of parameters of the fitting function
+    :type number_of_parameters: int
+    :param count: number of initial guesses to draw
+    :type count: int
+    :param seed: Optional. Seed of the random initial guesses.
+    :type seed: Optional[int]
+    :return: random starting points
+    :rtype: List[StartingPoint]
+    """
+    scale = np.ones(number_of_parameters)
+    if len(a0_values) != 0:
+        scale = np.max(np.abs(np.array(a0_values, dtype=float)), axis=0)
+        scale[scale == 0] = 1.0
+    rng = np.random.default_rng(seed)
+    return [
+        StartingPoint(
+            spec=spec,
+            label=f"Random {i + 1}",
+            a0=scale
+            * rng.choice([-1.0, 1.0], size=number_of_parameters)  # noqa: W503
+            * 10 ** rng.uniform(-1, 1, size=number_of_parameters),  # noqa: W503
+        )
+        for i in range(count)
+    ]
+
+
+def deduplicate_solutions(results: Sequence[StartResult]) -> List[Solution]:
+    """
+    Group converged fits by the parameters they converged to.
+
+    :param results: results of fits from many starting points
+    :type results: Sequence[StartResult]
+    :return: distinct solutions, sorted by chi2 from the lowest
+    :rtype: List[Solution]
+    """
+    converged = sorted(
+        [
+            (result.start, result.fitting_result)
+            for result in results
+            if result.converged
+            and result.fitting_result is not None  # noqa: W503
+            and math.isfinite(result.fitting_result.chi2)  # noqa: W503
+        ],
+        key=lambda converged_fit: float(converged_fit[1].chi2),
+    )
+    solutions: List[Solution] = []
+    for start, fitting_result in converged:
+        for solution in solutions:
+            if solution.is_same(start.spec, fitting_result):
+                solution.labels.append(start.label)
+                break
+        else:
+            solutions.append(
+                Solution(
+                    spec=start.spec,
+                    fitting_result=fitting_result,
+                    labels=[start.label],
+                )
+            )
+    return solutions
+
+
+def fit_start(start: StartingPoint, timeout: Optional[float] = None) -> StartResult:
+    """
+    Fit a single starting point to the data of the worker process.
+
+    :param start: function to fit and its initial guess
+    :type start: StartingPoint
+    :param timeout: Optional. Seconds after which the fit is stopped.
+    :type timeout: Optional[float]
+    :return: result of the fit
+    :rtype: StartResult
+    """
+    try:
+        job = FitJob(worker_data(), start.spec.load(), a0=start.a0, timeout=timeout)
+        fitting_result = job.run()
+    # A starting point from which the fit fails should not stop the others
+    except Exception as error:  # pylint: disable=broad-except
+        return StartResult(start, error=str(error))
+    return StartResult(start, fitting_result=fitting_result, converged=job.converged)
+
+
+async def fit_all_starts(  # pylint: disable=too-many-arguments
+    data: FittingData,
+    starts: List[StartingPoint],
+    module_paths: Optional[List[str]] = None,
+    timeout: Optional[float] = None,
+    on_result: Optional[Callable[[StartResult], None]] = None,
+    max_workers: Optional[int] = None,
+) -> List[StartResult]:
+    """
+    Fit from all starting points concurrently in a process pool.
+
+    Only the selected records are fitted, as described in :func:`run_in_workers`.
+    Cancelling cancels the fits which haven't started yet.
+
+    :param data: data to fit
+    :type data: FittingData
+    :param starts: functions to fit and their initial guesses
+    :type starts: List[StartingPoint]
+    :param module_paths: Optional. Paths of user modules to load in each worker.
+    :type module_paths: Optional[List[str]]
+    :param timeout: Optional. Seconds after which each fit is stopped.
+    :type timeout: Optional[float]
+    :param on_result: Optional. Callback to run whenever a fit is done.
+    :type on_result: Optional[Callable[[StartResult], None]]
+    :param max_workers: Optional. Number of worker processes. Defaults to the
+        number of cores.
+    :type max_workers: Optional[int]
+    :return: results of all fits, in the order they were done
+    :rtype: List[StartResult]
+    """
+    return await run_in_workers(
+        data,
+        fit_start,
+        [(start, timeout) for start in starts],
+        module_paths=module_paths,
+        on_result=on_result,
+        max_workers=max_workers,
+    )
@@ -0,0 +1,329 @@
+"""Estimating the uncertainties of fitted parameters by fitting resampled data."""
+import math
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from eddington import EddingtonException, FittingData, FittingFunction
+from scipy.odr import RealData
+
+from eddington_gui.consts import RESAMPLING_CHUNK_SIZE
+from eddington_gui.fitting.fit_job import FitJob
+from eddington_gui.fitting.fitting_function_spec import FittingFunctionSpec
+from eddington_gui.fitting.worker_pool import run_in_workers, worker_data
+
+BOOTSTRAP_PERCENTILES = (2.5, 50, 97.5)
+
+
+class ResamplingMethod(Enum):
+    """How to resample the records. Values are the names shown to the user."""
+
+    BOOTSTRAP = "Bootstrap"
+    JACKKNIFE = "Jackknife"
+
+
+@dataclass
+class ResamplingResult:
+    """
+    Parameters fitted to resampled records, which may still be coming in.
+
+    :param method: how the records were resampled
+    :param a: parameters fitted to all the records
+    :param total: number of resamples to fit
+    :param samples: parameters fitted to each resample done so far
+    :param failures: number of resamples whose fit has failed
+    """
+
+    method: ResamplingMethod
+    a: np.ndarray
+    total: int
+    samples: np.ndarray = field(default_factory=lambda: np.empty(shape=(0, 0)))
+    failures: int = 0
+
+    @property
+    def done(self) -> int:
+        """Number of resamples fitted so far, including the failed ones."""
+        return len(self.samples) + self.failures
+
+    @property
+    def finished(self) -> bool:
+        """Whether all resamples have been fitted."""
+        return self.done >= self.total
+
+    @property
+    def standard_errors(self) -> np.ndarray:
+        """
+        Standard errors of the parameters.
+
+        For bootstrap, this is the standard deviation of the samples. For jackknife,
+        the spread of the samples is scaled by the number of samples.
+        """
+        count = len(self.samples)
+        if count < 2:
+            return np.full(shape=len(self.a), fill_value=np.nan)
+        if self.method == ResamplingMethod.JACKKNIFE:
+            deviations = self.samples - np.mean(self.samples, axis=0)
+            return np.sqrt((count - 1) / count * np.sum(deviations**2, axis=0))
+        return np.std(self.samples, axis=0, ddof=1)
+
+    def percentiles(
+        self, levels: Sequence[float] = BOOTSTRAP_PERCENTILES
+    ) -> np.ndarray:
+        """
+        Percentiles of the parameters over the samples.
+
+        :param levels: percentiles to compute, between 0 and 100
+        :type levels: Sequence[float]
+        :return: array whose rows are the percentiles and columns are the parameters
+        :rtype: np.ndarray
+        """
+        if len(self.samples) == 0:
+            return np.full(shape=(len(levels), len(self.a)), fill_value=np.nan)
+        return np.percentile(self.samples, levels, axis=0)
+
+    def add(self, samples: np.ndarray, failures: int):
+        """Add the parameters fitted to more resamples."""
+        if len(samples) != 0:
+            self.samples = (
+                samples
+                if len(self.samples) == 0
+                else np.vstack([self.samples, samples])
+            )
+        self.failures += failures
+
+
+async def resample(  # pylint: disable=too-many-arguments
+    data: FittingData,
+    spec: FittingFunctionSpec,
+    a: np.ndarray,
+    method: ResamplingMethod,
+    number_of_resamples: int,
+    module_paths: Optional[List[str]] = None,
+    on_update: Optional[Callable[[ResamplingResult], None]] = None,
+    max_workers: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> ResamplingResult:
+    """
+    Fit resampled selected records concurrently in a process pool.
+
+    Bootstrap fits records drawn with replacement, and jackknife fits the records
+    leaving one out each time, so the number of resamples is the number of
+    records. Each fit starts from the parameters fitted to all the records.
+    Resamples are fitted in chunks, and the result is updated after each chunk.
+    Only the selected records are sent to the workers, as described in
+    :func:`run_in_workers`.
+
+    :param data: fitted data, of which only the selected records are resampled
+    :type data: FittingData
+    :param spec: the fitting function
+    :type spec: FittingFunctionSpec
+    :param a: parameters fitted to all the selected records
+    :type a: np.ndarray
+    :param method: how to resample the records
+    :type method: ResamplingMethod
+    :param number_of_resamples: number of bootstrap resamples. Ignored for
+        jackknife.
+    :type number_of_resamples: int
+    :param module_paths: Optional. Paths of user modules to load in each worker.
+    :type module_paths: Optional[List[str]]
+    :param on_update: Optional. Callback to run whenever a chunk is done.
+    :type on_update: Optional[Callable[[ResamplingResult], None]]
+    :param max_workers: Optional. Number of worker processes. Defaults to the
+        number of cores.
+    :type max_workers: Optional[int]
+    :param seed: Optional. Seed of the bootstrap random resampling.
+    :type seed: Optional[int]
+    :return: the parameters fitted to all resamples
+    :rtype: ResamplingResult
+    """
+    number_of_records = len(data.x)
+    total = (
+        number_of_records
+        if method == ResamplingMethod.JACKKNIFE
+        else number_of_resamples
+    )
+    result = ResamplingResult(method=method, a=np.asarray(a, dtype=float), total=total)
+    chunks = [
+        (start, min(start + RESAMPLING_CHUNK_SIZE, total))
+        for start in range(0, total, RESAMPLING_CHUNK_SIZE)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    def add_chunk(chunk_result: Tuple[np.ndarray, int]):
+        result.add(*chunk_result)
+        if on_update is not None:
+            on_update(result)
+
+    await run_in_workers(
+        data,
+        _fit_resamples,
+        [
+            (spec, result.a, method, start, stop, chunk_seed)
+            for (start, stop), chunk_seed in zip(chunks, seeds)
+        ],
+        module_paths=module_paths,
+        on_result=add_chunk,
+        max_workers=max_workers,
+    )
+    return result
+
+
+async def leave_one_out(  # pylint: disable=too-many-arguments
+    data: FittingData,
+    spec: FittingFunctionSpec,
+    a: np.ndarray,
+    module_paths: Optional[List[str]] = None,
+    on_update: Optional[Callable[[int, int], None]] = None,
+    max_workers: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Refit the selected records leaving each one out, concurrently in a process pool.
+
+    Each fit starts from the parameters fitted to all the records. Records are
+    refitted in chunks, as in jackknife resampling.
+
+    :param data: fitted data, of which only the selected records are refitted
+    :type data: FittingData
+    :param spec: the fitting function
+    :type spec: FittingFunctionSpec
+    :param a: parameters fitted to all the selected records
+    :type a: np.ndarray
+    :param module_paths: Optional. Paths of user modules to load in each worker.
+    :type module_paths: Optional[List[str]]
+    :param on_update: Optional. Callback to run with the number of refits done
+        and their total number, whenever a chunk is done.
+    :type on_update: Optional[Callable[[int, int], None]]
+    :param max_workers: Optional. Number of worker processes. Defaults to the
+        number of cores.
+    :type max_workers: Optional[int]
+    :return: parameters fitted without each record, a row per selected record.
+        Rows of failed fits are NaN.
+    :rtype: np.ndarray
+    """
+    a = np.asarray(a, dtype=float)
+    total = len(data.x)
+    parameters = np.full(shape=(total, len(a)), fill_value=np.nan)
+    chunks = [
+        (start, min(start + RESAMPLING_CHUNK_SIZE, total))
+        for start in range(0, total, RESAMPLING_CHUNK_SIZE)
+    ]
+    done = 0
+
+    def add_chunk(chunk_result: Tuple[int, int, np.ndarray]):
+        nonlocal done
+        start, stop, chunk_parameters = chunk_result
+        parameters[start:stop] = chunk_parameters
+        done += stop - start
+        if on_update is not None:
+            on_update(done, total)
+
+    await run_in_workers(
+        data,
+        _fit_left_out,
+        [(spec, a, start, stop) for start, stop in chunks],
+        module_paths=module_paths,
+        on_result=add_chunk,
+        max_workers=max_workers,
+    )
+    return parameters
+
+
+def resampling_summary(result: ResamplingResult) -> str:
+    """
+    Describe the uncertainties of the parameters found so far.
+
+    :param result: the resampling result
+    :type result: ResamplingResult
+    :return: A line per parameter
+    :rtype: str
+    """
+    lines = [
+        f"{result.method.value}: {result.done} of {result.total} resamples"
+        + (f" ({result.failures} failed)" if result.failures != 0 else "")
+    ]
+    errors = result.standard_errors
+    if result.method == ResamplingMethod.JACKKNIFE:
+        for i, (value, error) in enumerate(zip(result.a, errors)):
+            lines.append(f"a[{i}] = {value:.4g} ± {error:.2g}")
+        return "\n".join(lines)
+    low, median, high = result.percentiles(BOOTSTRAP_PERCENTILES)
+    for i, value in enumerate(result.a):
+        lines.append(
+            f"a[{i}] = {value:.4g} ± {errors[i]:.2g}, median {median[i]:.4g}, "
+            f"95% interval [{low[i]:.4g}, {high[i]:.4g}]"
+        )
+    return "\n".join(lines)
+
+
+@dataclass
+class _Records:
+    func: FittingFunction
+    x: np.ndarray
+    xerr: Optional[np.ndarray]
+    y: np.ndarray
+    yerr: Optional[np.ndarray]
+    a: np.ndarray
+
+
+def _worker_records(spec: FittingFunctionSpec, a: np.ndarray) -> _Records:
+    data = worker_data()
+    return _Records(
+        func=spec.load(), x=data.x, xerr=data.xerr, y=data.y, yerr=data.yerr, a=a
+    )
+
+
+def _fit_resamples(  # pylint: disable=too-many-arguments
+    spec: FittingFunctionSpec,
+    a: np.ndarray,
+    method: ResamplingMethod,
+    start: int,
+    stop: int,
+    seed: np.random.SeedSequence,
+) -> Tuple[np.ndarray, int]:
+    records = _worker_records(spec, a)
+    number_of_records = len(records.x)
+    rng = np.random.default_rng(seed)
+    samples, failures = [], 0
+    for i in range(start, stop):
+        if method == ResamplingMethod.JACKKNIFE:
+            indices = np.delete(np.arange(number_of_records), i)
+        else:
+            indices = rng.integers(0, number_of_records, size=number_of_records)
+        sample = _fit_records(records, indices)
+        if sample is None:
+            failures += 1
+        else:
+            samples.append(sample)
+    if len(samples) == 0:
+        return np.empty(shape=(0, len(a))), failures
+    return np.array(samples, dtype=float), failures
+
+
+def _fit_left_out(
+    spec: FittingFunctionSpec, a: np.ndarray, start: int, stop: int
+) -> Tuple[int, int, np.ndarray]:
+    records = _worker_records(spec, a)
+    number_of_records = len(records.x)
+    parameters = np.full(shape=(stop - start, len(a)), fill_value=np.nan)
+    for i in range(start, stop):
+        left_out = _fit_records(records, np.delete(np.arange(number_of_records), i))
+        if left_out is not None:
+            parameters[i - start] = left_out
+    return start, stop, parameters
+
+
+def _fit_records(records: _Records, indices: np.ndarray) -> Optional[np.ndarray]:
+    real_data = RealData(
+        x=records.x[indices],
+        y=records.y[indices],
+        sx=None if records.xerr is None else records.xerr[indices],
+        sy=None if records.yerr is None else records.yerr[indices],
+    )
+    try:
+        fitting_result = FitJob(real_data, records.func, a0=records.a).run()
+    except (EddingtonException, ArithmeticError, ValueError):
+        return None
+    if not all(math.isfinite(value) for value in fitting_result.a):
+        return None
+    return fitting_result.a
@@ -0,0 +1,71 @@
+"""Starting fits from the result of a previous similar fit."""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from eddington import FittingFunction, FittingResult
+
+from eddington_gui.fitting.fit_result_cache import FitResultCache
+from eddington_gui.fitting.fit_statistics import FitStatistics
+
+
+@dataclass
+class FitRecord:
+    """
+    A finished fit, from which the next fits may start.
+
+    :param function_key: key of the fitting function, see
+        :meth:`FitResultCache.function_key`
+    :param a0: initial guess given by the user, if any
+    :param fitting_result: result of the fit
+    :param iterations: number of iterations of the fit
+    :param cold_iterations: number of iterations of the last fit of the same
+        function which started from the initial guess given by the user
+    :param warm: whether the fit started from the result of a previous fit
+    :param statistics: counters and timers of the fit
+    """
+
+    function_key: str
+    a0: Optional[np.ndarray]
+    fitting_result: FittingResult
+    iterations: int
+    cold_iterations: int
+    warm: bool = False
+    statistics: Optional[FitStatistics] = None
+
+    @property
+    def saved_iterations(self) -> int:
+        """How many iterations were saved compared with the last cold fit."""
+        return self.cold_iterations - self.iterations
+
+
+def warm_start_a0(
+    last_fit: Optional[FitRecord],
+    func: FittingFunction,
+    a0: Optional[np.ndarray] = None,
+) -> Optional[np.ndarray]:
+    """
+    Find an initial guess for a fit from the result of the last fit.
+
+    The last result is used only if it was fitted with the same fitting function
+    and the same initial guess given by the user, meaning only the data or the
+    records selection have changed since.
+
+    :param last_fit: Optional. The last finished fit.
+    :type last_fit: Optional[FitRecord]
+    :param func: fitting function of the new fit
+    :type func: FittingFunction
+    :param a0: Optional. Initial guess given by the user for the new fit.
+    :type a0: Optional[np.ndarray]
+    :return: The parameters of the last fit, or None if the new fit can't start
+        from them.
+    :rtype: Optional[np.ndarray]
+    """
+    if last_fit is None or last_fit.function_key != FitResultCache.function_key(func):
+        return None
+    if a0 is None or last_fit.a0 is None:
+        if a0 is not None or last_fit.a0 is not None:
+            return None
+    elif not np.array_equal(a0, last_fit.a0):
+        return None
+    return np.array(last_fit.fitting_result.a, dtype=float)
@@ -0,0 +1,103 @@
+"""Running fits of the same data concurrently in a pool of worker processes."""
+import asyncio
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from eddington import FittingData
+
+from eddington_gui.util import load_user_module
+
+_worker_data: Optional[FittingData] = None
+
+
+def worker_data() -> FittingData:
+    """
+    Get the data sent to the worker process by :func:`run_in_workers`.
+
+    :return: The selected records of the data, all of them selected
+    :rtype: FittingData
+    """
+    return _worker_data
+
+
+async def run_in_workers(  # pylint: disable=too-many-arguments
+    data: FittingData,
+    func: Callable[..., Any],
+    arguments: Sequence[tuple],
+    module_paths: Optional[List[str]] = None,
+    on_result: Optional[Callable[[Any], None]] = None,
+    max_workers: Optional[int] = None,
+) -> List[Any]:
+    """
+    Call a function with each of the given arguments concurrently in a process pool.
+
+    Only the selected records of the data are sent to the workers. Each worker
+    process receives them once, which the function gets by :func:`worker_data`,
+    and loads the user modules in which fitting functions are defined. Cancelling
+    cancels the calls which haven't started yet.
+
+    :param data: data to fit
+    :type data: FittingData
+    :param func: function to call in the workers. It should be defined at the top
+        level of a module, so it can be sent to them.
+    :type func: Callable[..., Any]
+    :param arguments: arguments of each call
+    :type arguments: Sequence[tuple]
+    :param module_paths: Optional. Paths of user modules to load in each worker.
+    :type module_paths: Optional[List[str]]
+    :param on_result: Optional. Callback to run with the result of each call.
+    :type on_result: Optional[Callable[[Any], None]]
+    :param max_workers: Optional. Number of worker processes. Defaults to the
+        number of cores.
+    :type max_workers: Optional[int]
+    :return: results of all calls, in the order they were done
+    :rtype: List[Any]
+    """
+    if len(arguments) == 0:
+        return []
+    columns = OrderedDict(
+        (name, values)
+        for name, values in [
+            ("x", data.x),
+            ("xerr", data.xerr),
+            ("y", data.y),
+            ("yerr", data.yerr),
+        ]
+        if values is not None
+    )
+    loop = asyncio.get_event_loop()
+    executor = ProcessPoolExecutor(
+        max_workers=min(len(arguments), max_workers or os.cpu_count() or 1),
+        initializer=_initialize_worker,
+        initargs=(columns, list(module_paths or [])),
+    )
+    futures = [loop.run_in_executor(executor, func, *args) for args in arguments]
+    results = []
+    try:
+        for future in asyncio.as_completed(futures):
+            result = await future
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+        return results
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _initialize_worker(columns: Dict[str, np.ndarray], module_paths: List[str]):
+    global _worker_data  # pylint: disable=global-statement,invalid-name
+    for module_path in module_paths:
+        load_user_module(module_path)
+    _worker_data = FittingData(
+        columns,
+        x_column="x",
+        xerr_column="xerr" if "xerr" in columns else None,
+        y_column="y",
+        yerr_column="yerr" if "yerr" in columns else None,
+        search=False,
+    )
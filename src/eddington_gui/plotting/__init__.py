@@ -0,0 +1 @@
+"""Plotting data and fit results, with or without the GUI."""
@@ -0,0 +1,141 @@
+"""In-memory cache of built figures and of their rendered images."""
+import hashlib
+from collections import OrderedDict
+from typing import Any, Optional
+
+from eddington import FigureBuilder
+
+from eddington_gui.consts import ENCODING, FIGURE_CACHE_IMAGES_SIZE, FIGURE_CACHE_SIZE
+
+
+class FigureCache:
+    """
+    Least recently used cache of figure builders and rendered PNG images.
+
+    Entries are keyed by a fingerprint of everything drawn in the figure: its
+    plot configuration and the versions of the data, the records selection and
+    the fit. Any change produces a new key, so stale entries are never reused
+    and are evicted once the cache is full. Redrawing a figure which hasn't
+    changed, as when its chart is resized, replays its cached instructions
+    instead of building them again, and saving it writes its cached image.
+    """
+
+    def __init__(
+        self,
+        max_size: int = FIGURE_CACHE_SIZE,
+        max_images_size: int = FIGURE_CACHE_IMAGES_SIZE,
+    ):
+        """
+        Constructor.
+
+        :param max_size: maximal number of cached figure builders
+        :type max_size: int
+        :param max_images_size: maximal total size of the cached images, in bytes
+        :type max_images_size: int
+        """
+        self.max_size = max_size
+        self.max_images_size = max_images_size
+        self.hits = 0
+        self.misses = 0
+        self.__builders: "OrderedDict[str, FigureBuilder]" = OrderedDict()
+        self.__images: "OrderedDict[str, bytes]" = OrderedDict()
+        self.__images_size = 0
+
+    @classmethod
+    def key(cls, *parts: Any) -> str:
+        """
+        Build the cache key of a figure.
+
+        :param parts: everything the figure depends on, such as its settings and
+            the versions of its data. Parts are compared by their representation.
+        :type parts: Any
+        :return: cache key
+        :rtype: str
+        """
+        return hashlib.sha256(repr(parts).encode(ENCODING)).hexdigest()
+
+    @property
+    def images_size(self) -> int:
+        """Total size of the cached images in bytes."""
+        return self.__images_size
+
+    def __len__(self) -> int:
+        """Number of cached figure builders."""
+        return len(self.__builders)
+
+    def get_builder(self, key: str) -> Optional[FigureBuilder]:
+        """
+        Get a cached figure builder, and count the hit or the miss.
+
+        :param key: cache key of the figure
+        :type key: str
+        :return: The cached figure builder, or None if the figure is not cached
+        :rtype: Optional[FigureBuilder]
+        """
+        figure_builder = self.__builders.get(key, None)
+        if figure_builder is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.__builders.move_to_end(key)
+        return figure_builder
+
+    def put_builder(self, key: str, figure_builder: FigureBuilder):
+        """
+        Cache a figure builder, evicting the least recently used ones if needed.
+
+        :param key: cache key of the figure
+        :type key: str
+        :param figure_builder: builder holding the instructions of the figure
+        :type figure_builder: FigureBuilder
+        """
+        self.__builders[key] = figure_builder
+        self.__builders.move_to_end(key)
+        while len(self.__builders) > self.max_size:
+            self.__builders.popitem(last=False)
+
+    def get_image(self, key: str) -> Optional[bytes]:
+        """
+        Get a cached PNG image of a figure, and count the hit or the miss.
+
+        :param key: cache key of the figure
+        :type key: str
+        :return: The cached image, or None if it is not cached
+        :rtype: Optional[bytes]
+        """
+        image = self.__images.get(key, None)
+        if image is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.__images.move_to_end(key)
+        return image
+
+    def put_image(self, key: str, image: bytes):
+        """
+        Cache a PNG image of a figure, evicting the least recently used ones.
+
+        Images larger than the whole cache are not cached.
+
+        :param key: cache key of the figure
+        :type key: str
+        :param image: the rendered image
+        :type image: bytes
+        """
+        if len(image) > self.max_images_size:
+            return
+        previous = self.__images.pop(key, None)
+        if previous is not None:
+            self.__images_size -= len(previous)
+        self.__images[key] = image
+        self.__images_size += len(image)
+        while self.__images_size > self.max_images_size:
+            _, evicted = self.__images.popitem(last=False)
+            self.__images_size -= len(evicted)
+
+    def clear(self):
+        """Remove all cached figures and images, and reset the counters."""
+        self.__builders.clear()
+        self.__images.clear()
+        self.__images_size = 0
+        self.hits = self.misses = 0
@@ -0,0 +1,254 @@
+"""Instructions for drawing the data, the fits and the fitted parameters."""
+from typing import List, Tuple
+
+import numpy as np
+from eddington import FigureBuilder, FittingData, FittingFunction
+from eddington.interval import Interval
+from eddington.plot.figure import Figure
+from eddington.plot.figure_builder import FigureInstruction
+from eddington.plot.line_style import LineStyle
+
+from eddington_gui.fitting.chi2_landscape import Chi2Landscape
+
+# Chi-squared increases of the 68.3%, 95.4% and 99.7% confidence regions of two
+# parameters
+CONFIDENCE_DELTA_CHI2 = (2.30, 6.18, 11.83)
+
+
+class HistogramInstruction(FigureInstruction):  # pylint: disable=too-few-public-methods
+    """Add a histogram of values, with a line marking a single value, to figure."""
+
+    def __init__(self, values: np.ndarray, marked_value: float, label: str):
+        """
+        Instruction constructor.
+
+        :param values: values to count in the histogram
+        :type values: np.ndarray
+        :param marked_value: value to mark with a vertical line
+        :type marked_value: float
+        :param label: label of the marked value in the legend
+        :type label: str
+        """
+        super().__init__(name="histogram")
+        self.values = values
+        self.marked_value = marked_value
+        self.label = label
+
+    def add_to_figure(self, fig: Figure):
+        """
+        Add this instruction to figure.
+
+        :param fig: Figure to add element to
+        :type fig: Figure
+        """
+        fig.ax.hist(self.values, bins="auto")
+        fig.ax.axvline(
+            self.marked_value,
+            linestyle=LineStyle.DASHED.value,
+            color="black",
+            label=self.label,
+        )
+
+
+class Chi2MapInstruction(FigureInstruction):  # pylint: disable=too-few-public-methods
+    """Add a map of chi-squared over two parameters to figure."""
+
+    def __init__(self, landscape: Chi2Landscape):
+        """
+        Instruction constructor.
+
+        :param landscape: chi-squared over a grid of two parameters
+        :type landscape: Chi2Landscape
+        """
+        super().__init__(name="chi2_landscape")
+        self.landscape = landscape
+
+    def add_to_figure(self, fig: Figure):
+        """
+        Add this instruction to figure.
+
+        Grid points which are not computed yet are left blank. Once the grid is
+        complete, the confidence regions are outlined.
+
+        :param fig: Figure to add element to
+        :type fig: Figure
+        """
+        landscape = self.landscape
+        delta_chi2 = np.ma.masked_invalid(landscape.delta_chi2)
+        mesh = fig.ax.pcolormesh(
+            landscape.first_values,
+            landscape.second_values,
+            delta_chi2,
+            shading="auto",
+        )
+        fig.ax.figure.colorbar(mesh, ax=fig.ax, label="\u0394\u03c7\u00b2")
+        if landscape.finished and delta_chi2.count() != 0:
+            fig.ax.contour(
+                landscape.first_values,
+                landscape.second_values,
+                delta_chi2,
+                levels=CONFIDENCE_DELTA_CHI2,
+                colors="white",
+                linestyles=LineStyle.DASHED.value,
+            )
+        fig.ax.plot(
+            landscape.a[landscape.first_index],
+            landscape.a[landscape.second_index],
+            marker="+",
+            color="red",
+            linestyle="",
+            label="Fitted value",
+        )
+
+
+class Chi2TraceInstruction(FigureInstruction):  # pylint: disable=too-few-public-methods
+    """Add chi2 along the iterations of a fit to figure."""
+
+    def __init__(self, chi2_trace: List[Tuple[int, float]]):
+        """
+        Instruction constructor.
+
+        :param chi2_trace: the iteration number and chi2 after each iteration
+        :type chi2_trace: List[Tuple[int, float]]
+        """
+        super().__init__(name="convergence")
+        self.chi2_trace = chi2_trace
+
+    def add_to_figure(self, fig: Figure):
+        """
+        Add this instruction to figure.
+
+        The axes are labelled, unless labels have been given.
+
+        :param fig: Figure to add element to
+        :type fig: Figure
+        """
+        iterations, chi2 = zip(*self.chi2_trace)
+        fig.ax.plot(iterations, chi2, marker="o", label="Chi2")
+        if fig.ax.get_xlabel() == "":
+            fig.ax.set_xlabel("Iteration")
+        if fig.ax.get_ylabel() == "":
+            fig.ax.set_ylabel("Chi2")
+
+
+def add_data_instructions(figure_builder: FigureBuilder, data: FittingData):
+    """
+    Add the data to a figure.
+
+    :param figure_builder: builder of the figure
+    :type figure_builder: FigureBuilder
+    :param data: the plotted data
+    :type data: FittingData
+    """
+    figure_builder.add_data(data=data, label="Data")
+
+
+def add_function_instructions(  # pylint: disable=too-many-arguments
+    figure_builder: FigureBuilder,
+    interval: Interval,
+    data: FittingData,
+    func: FittingFunction,
+    a: np.ndarray,
+    label: str,
+):
+    """
+    Add the data and a fitting function with the given parameters to a figure.
+
+    :param figure_builder: builder of the figure
+    :type figure_builder: FigureBuilder
+    :param interval: x interval in which to plot the function
+    :type interval: Interval
+    :param data: the plotted data
+    :type data: FittingData
+    :param func: the plotted fitting function
+    :type func: FittingFunction
+    :param a: parameters of the fitting function
+    :type a: np.ndarray
+    :param label: label of the function in the legend
+    :type label: str
+    """
+    add_data_instructions(figure_builder, data)
+    figure_builder.add_plot(
+        interval=interval.intersect(data.x_domain), func=func, a=a, label=label
+    )
+
+
+def add_residuals_instructions(
+    figure_builder: FigureBuilder,
+    interval: Interval,
+    data: FittingData,
+    func: FittingFunction,
+    a: np.ndarray,
+):
+    """
+    Add the residuals of a fit to a figure.
+
+    :param figure_builder: builder of the figure
+    :type figure_builder: FigureBuilder
+    :param interval: x interval in which to plot the zero line
+    :type interval: Interval
+    :param data: the fitted data
+    :type data: FittingData
+    :param func: the fitting function
+    :type func: FittingFunction
+    :param a: the fitted parameters
+    :type a: np.ndarray
+    """
+    y = func(a, data.x) - data.y
+    figure_builder.add_horizontal_line(
+        interval=interval.intersect(data.x_domain),
+        y_value=0,
+        linestyle=LineStyle.DASHED,
+        color="black",
+    )
+    figure_builder.add_error_bar(
+        x=data.x, y=y, xerr=data.xerr, yerr=data.yerr, label="Residuals"
+    )
+
+
+def add_histogram_instructions(
+    figure_builder: FigureBuilder, values: np.ndarray, marked_value: float, label: str
+):
+    """
+    Add a histogram of values, such as resampled fitted parameters, to a figure.
+
+    :param figure_builder: builder of the figure
+    :type figure_builder: FigureBuilder
+    :param values: values to count in the histogram
+    :type values: np.ndarray
+    :param marked_value: value to mark with a vertical line
+    :type marked_value: float
+    :param label: label of the marked value in the legend
+    :type label: str
+    """
+    figure_builder.add_instruction(
+        HistogramInstruction(values=values, marked_value=marked_value, label=label)
+    )
+
+
+def add_chi2_landscape_instructions(
+    figure_builder: FigureBuilder, landscape: Chi2Landscape
+):
+    """
+    Add a map of chi-squared over two parameters to a figure.
+
+    :param figure_builder: builder of the figure
+    :type figure_builder: FigureBuilder
+    :param landscape: chi-squared over a grid of two parameters
+    :type landscape: Chi2Landscape
+    """
+    figure_builder.add_instruction(Chi2MapInstruction(landscape=landscape))
+
+
+def add_convergence_instructions(
+    figure_builder: FigureBuilder, chi2_trace: List[Tuple[int, float]]
+):
+    """
+    Add chi2 along the iterations of a fit to a figure.
+
+    :param figure_builder: builder of the figure
+    :type figure_builder: FigureBuilder
+    :param chi2_trace: the iteration number and chi2 after each iteration
+    :type chi2_trace: List[Tuple[int, float]]
+    """
+    figure_builder.add_instruction(Chi2TraceInstruction(chi2_trace=chi2_trace))
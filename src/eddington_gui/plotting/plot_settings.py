@@ -0,0 +1,142 @@
+"""Settings of a plot, as chosen by the user."""
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Callable, Dict, Optional
+
+from eddington import EddingtonException, FigureBuilder, to_relevant_precision_string
+from eddington.interval import Interval
+from eddington.plot.figure import Figure
+from matplotlib.ticker import FuncFormatter, NullLocator
+
+EDDINGTON_FORMATTER = FuncFormatter(lambda y, _: to_relevant_precision_string(y))
+NULL_LOCATOR = NullLocator()
+
+
+@dataclass
+class PlotSettings:  # pylint: disable=too-many-instance-attributes
+    """
+    Settings of a plot.
+
+    Empty title and labels are replaced by defaults derived from the fitting
+    function and the data columns.
+    """
+
+    title: Optional[str] = None
+    xlabel: Optional[str] = None
+    ylabel: Optional[str] = None
+    grid: bool = False
+    legend: bool = False
+    x_log_scale: bool = False
+    y_log_scale: bool = False
+    xmin: Optional[float] = None
+    xmax: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, settings: Dict[str, Any]) -> "PlotSettings":
+        """
+        Build plot settings from a dictionary, as saved by :meth:`to_dict`.
+
+        :param settings: the settings
+        :type settings: Dict[str, Any]
+        :return: plot settings
+        :rtype: PlotSettings
+        :raises EddingtonException: Raised when there are unknown settings.
+        """
+        names = {field.name for field in fields(cls)}
+        unknown = sorted(set(settings.keys()) - names)
+        if len(unknown) != 0:
+            raise EddingtonException(f"Unknown plot settings: {', '.join(unknown)}")
+        return PlotSettings(**settings)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plot settings as a dictionary."""
+        return asdict(self)
+
+    @property
+    def interval(self) -> Interval:
+        """X interval in which to plot."""
+        return Interval(min_val=self.xmin, max_val=self.xmax)
+
+    def plot_title(self, suffix: str, base_name: Optional[str] = None) -> str:
+        """
+        Title of the plot.
+
+        :param suffix: name of the plot, such as "Fitting"
+        :type suffix: str
+        :param base_name: Optional. Title of the fitting function.
+        :type base_name: Optional[str]
+        :return: The title chosen by the user, or a default one
+        :rtype: str
+        """
+        if self.title:
+            return self.title
+        if base_name is not None:
+            return f"{base_name} - {suffix.title()}"
+        return suffix
+
+    def build_figure_builder(
+        self,
+        title: str,
+        xlabel: Optional[str],
+        ylabel: Optional[str],
+        additional_instructions: Callable[[FigureBuilder, Interval], None],
+    ) -> FigureBuilder:
+        """
+        Build FigureBuilder to use when drawing.
+
+        :param title: title of the plot
+        :type title: str
+        :param xlabel: label of the x axis, if any
+        :type xlabel: Optional[str]
+        :param ylabel: label of the y axis, if any
+        :type ylabel: Optional[str]
+        :param additional_instructions: adds the plotted data to the figure
+        :type additional_instructions: Callable[[FigureBuilder, Interval], None]
+        :return: figure builder
+        :rtype: FigureBuilder
+        """
+        figure_builder = FigureBuilder()
+        if title is not None:
+            figure_builder.add_title(title)
+        if xlabel is not None:
+            figure_builder.add_xlabel(xlabel)
+        if ylabel is not None:
+            figure_builder.add_ylabel(ylabel)
+        if self.grid:
+            figure_builder.add_grid()
+        if self.legend:
+            figure_builder.add_legend()
+        if self.x_log_scale:
+            figure_builder.add_x_log_scale()
+        if self.y_log_scale:
+            figure_builder.add_y_log_scale()
+        additional_instructions(figure_builder, self.interval)
+        return figure_builder
+
+    def set_scale(self, figure: Figure) -> Figure:
+        """Set ticks of figure if in log scale."""
+        axes = figure.get_axes()[0]
+        if self.x_log_scale:
+            axes.xaxis.set_major_formatter(EDDINGTON_FORMATTER)
+            axes.xaxis.set_minor_locator(NULL_LOCATOR)
+        if self.y_log_scale:
+            axes.yaxis.set_major_formatter(EDDINGTON_FORMATTER)
+            axes.yaxis.set_minor_locator(NULL_LOCATOR)
+        return figure
+
+
+def plot_file_name(suffix: str, base_name: Optional[str] = None) -> str:
+    """
+    Name of the file in which a plot is saved.
+
+    :param suffix: name of the plot, such as "Fitting"
+    :type suffix: str
+    :param base_name: Optional. Title of the fitting function.
+    :type base_name: Optional[str]
+    :return: file name
+    :rtype: str
+    """
+    if base_name is not None:
+        name = f"{base_name.replace(' ', '_')}_{suffix.replace(' ', '_')}.png"
+    else:
+        name = f"{suffix.replace(' ', '_')}.png"
+    return name.lower()
@@ -0,0 +1 @@
+"""Readers of fitting data from input files."""
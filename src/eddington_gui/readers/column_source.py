@@ -0,0 +1,539 @@
+"""Sources of fitting data whose columns can be read separately."""
+import csv
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import IO, Callable, Dict, Generator, List, Optional, Union
+
+import numpy as np
+from eddington import FittingData, FittingDataError, FittingDataInvalidFile
+from eddington.fitting_data import Columns
+
+from eddington_gui.consts import INGESTION_PROGRESS_ROWS
+from eddington_gui.readers.compression import open_decompressed
+from eddington_gui.readers.excel_reader import ExcelReader
+from eddington_gui.readers.ingestion import build_fitting_data_with_columns, iter_lines
+from eddington_gui.readers.ingestion_task import IngestionProgress, IngestionTask
+
+has_pyarrow = False  # pylint: disable=invalid-name
+try:
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    has_pyarrow = True  # pylint: disable=invalid-name
+except ImportError:
+    pass
+
+
+class ColumnSource(ABC):
+    """
+    Source of fitting data which reads each of its columns on demand.
+
+    Only the headers are read when opening the source. Columns are read once they
+    are used, and kept in memory for later use.
+    """
+
+    def __init__(self, filepath: Union[str, Path]):
+        """Constructor."""
+        self.filepath = Path(filepath)
+        self.__columns: Dict[str, np.ndarray] = {}
+        self.__lock = threading.Lock()
+
+    @property
+    @abstractmethod
+    def headers(self) -> List[str]:
+        """Headers of all columns in the source."""
+
+    @property
+    def default_columns(self) -> Columns:
+        """Columns used by default: the first four columns, in order."""
+        headers = self.headers + [None] * 4
+        return Columns(x=headers[0], xerr=headers[1], y=headers[2], yerr=headers[3])
+
+    @abstractmethod
+    def read_column(self, header: str) -> np.ndarray:
+        """
+        Read the values of a column from the source.
+
+        :param header: Header of the column
+        :type header: str
+        :return: values of the column
+        :rtype: np.ndarray
+        """
+
+    def read_columns(
+        self, headers: List[str], task: Optional[IngestionTask] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Read the values of several columns from the source.
+
+        By default, each column is read separately. Sources which have to go over
+        the whole file to read a column override it to read all columns at once.
+
+        :param headers: Headers of the columns
+        :type headers: List[str]
+        :param task: Optional. Task to report progress to.
+        :type task: Optional[IngestionTask]
+        :return: values of the columns, by their headers
+        :rtype: Dict[str, np.ndarray]
+        """
+        columns = {}
+        for header in headers:
+            columns[header] = self.read_column(header)
+            if task is not None:
+                task.report(IngestionProgress(rows=columns[header].size))
+        return columns
+
+    def column(self, header: str) -> np.ndarray:
+        """
+        Get the values of a column, reading it if it wasn't read before.
+
+        :param header: Header of the column
+        :type header: str
+        :return: values of the column
+        :rtype: np.ndarray
+        :raises FittingDataError: Raised when the column does not exist in source
+        """
+        return self.columns([header])[header]
+
+    def columns(
+        self, headers: List[str], task: Optional[IngestionTask] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Get the values of several columns, reading those which weren't read before.
+
+        :param headers: Headers of the columns
+        :type headers: List[str]
+        :param task: Optional. Task to report progress to.
+        :type task: Optional[IngestionTask]
+        :return: values of the columns, by their headers
+        :rtype: Dict[str, np.ndarray]
+        :raises FittingDataError: Raised when a column does not exist in source
+        """
+        for header in headers:
+            if header not in self.headers:
+                raise FittingDataError(
+                    f'Could not find column "{header}" in "{self.filepath.name}"'
+                )
+        with self.__lock:
+            missing_headers = [
+                header for header in headers if header not in self.__columns
+            ]
+            if len(missing_headers) != 0:
+                for header, values in self.read_columns(
+                    missing_headers, task=task
+                ).items():
+                    self.__columns[header] = self.__validate_column(header, values)
+            return {header: self.__columns[header] for header in headers}
+
+    def reset_columns(self, columns: Dict[str, np.ndarray]):
+        """
+        Replace the columns read so far, forgetting columns which are not given.
+
+        Used when records have been added to the data read from the source.
+
+        :param columns: values of the columns, by their headers
+        :type columns: Dict[str, np.ndarray]
+        """
+        with self.__lock:
+            self.__columns = dict(columns)
+
+    def build_fitting_data(
+        self,
+        columns: Optional[Columns] = None,
+        records_indices: Optional[List[bool]] = None,
+        task: Optional[IngestionTask] = None,
+        all_columns: bool = False,
+    ) -> FittingData:
+        """
+        Build fitting data containing only the used columns.
+
+        :param columns: Optional. Columns to use as x, x error, y and y error. If
+            None, uses the default columns.
+        :type columns: Optional[Columns]
+        :param records_indices: Optional. Records selection to keep.
+        :type records_indices: Optional[List[bool]]
+        :param task: Optional. Task to report progress to.
+        :type task: Optional[IngestionTask]
+        :param all_columns: Optional. Whether to read all of the columns, rather
+            than only the used ones.
+        :type all_columns: bool
+        :return: fitting data
+        :rtype: FittingData
+        """
+        if columns is None:
+            columns = self.default_columns
+        used_headers = (
+            self.headers
+            if all_columns
+            else [header for header in columns if header is not None]
+        )
+        used_columns = self.columns(
+            [header for header in self.headers if header in used_headers], task=task
+        )
+        data = OrderedDict(
+            (header, used_columns[header])
+            for header in self.headers
+            if header in used_columns
+        )
+        fitting_data = build_fitting_data_with_columns(data, columns)
+        if records_indices is not None:
+            fitting_data.records_indices = list(records_indices)
+        return fitting_data
+
+    def __validate_column(self, header: str, values: np.ndarray) -> np.ndarray:
+        if values.ndim != 1 or not np.issubdtype(values.dtype, np.number):
+            raise FittingDataInvalidFile(
+                f'Column "{header}" in "{self.filepath.name}" should be a '
+                "one dimensional numeric column."
+            )
+        return np.asarray(values, dtype=float)
+
+
+class NpzColumnSource(ColumnSource):
+    """Column source of numpy ``.npz`` archives, one array per column."""
+
+    def __init__(self, filepath: Union[str, Path]):
+        """Constructor."""
+        super().__init__(filepath)
+        with np.load(self.filepath) as npz_file:
+            self.__headers = list(npz_file.files)
+
+    @property
+    def headers(self) -> List[str]:
+        """Headers of all columns in the source."""
+        return self.__headers
+
+    def read_column(self, header: str) -> np.ndarray:
+        """
+        Read only the array of the given column out of the archive.
+
+        :param header: Header of the column
+        :type header: str
+        :return: values of the column
+        :rtype: np.ndarray
+        """
+        with np.load(self.filepath) as npz_file:
+            return npz_file[header]
+
+
+class ArrowColumnSource(ColumnSource):
+    """Base column source of files read with pyarrow."""
+
+    def __init__(self, filepath: Union[str, Path]):
+        """Constructor."""
+        if not has_pyarrow:
+            raise FittingDataError(
+                f'Reading "{Path(filepath).suffix}" files requires pyarrow. '
+                "Please install it and try again."
+            )
+        super().__init__(filepath)
+        self.__headers = list(self.read_schema().names)
+
+    @property
+    def headers(self) -> List[str]:
+        """Headers of all columns in the source."""
+        return self.__headers
+
+    @abstractmethod
+    def read_schema(self) -> "pyarrow.Schema":
+        """Read the schema of the file, without reading its data."""
+
+    @abstractmethod
+    def read_table(self, header: str) -> "pyarrow.Table":
+        """Read a table containing only the given column."""
+
+    def read_column(self, header: str) -> np.ndarray:
+        """
+        Read a single column, without copying it when its memory layout allows it.
+
+        :param header: Header of the column
+        :type header: str
+        :return: values of the column
+        :rtype: np.ndarray
+        """
+        chunked_array = self.read_table(header).column(header)
+        if chunked_array.num_chunks == 1 and chunked_array.null_count == 0:
+            return chunked_array.chunk(0).to_numpy(zero_copy_only=False)
+        return chunked_array.to_numpy()
+
+
+class ParquetColumnSource(ArrowColumnSource):
+    """Column source of parquet files."""
+
+    def read_schema(self) -> "pyarrow.Schema":
+        """Read the schema of the file, without reading its data."""
+        return pyarrow.parquet.read_schema(self.filepath)
+
+    def read_table(self, header: str) -> "pyarrow.Table":
+        """Read a table containing only the given column."""
+        return pyarrow.parquet.read_table(
+            self.filepath, columns=[header], memory_map=True
+        )
+
+
+class FeatherColumnSource(ArrowColumnSource):
+    """Column source of feather (arrow IPC) files."""
+
+    def read_schema(self) -> "pyarrow.Schema":
+        """Read the schema of the file, without reading its data."""
+        with pyarrow.memory_map(str(self.filepath)) as source:
+            return pyarrow.ipc.open_file(source).schema
+
+    def read_table(self, header: str) -> "pyarrow.Table":
+        """Read a table containing only the given column."""
+        return pyarrow.feather.read_table(
+            self.filepath, columns=[header], memory_map=True
+        )
+
+
+class RowsColumnSource(ColumnSource):
+    """
+    Base column source of files which are stored row by row, like csv files.
+
+    Only the header row is parsed when opening the source. Reading columns still
+    goes over all rows, but only the cells of the requested columns are converted
+    and kept. Headers follow the same rules as when reading the whole file.
+    """
+
+    def __init__(self, filepath: Union[str, Path]):
+        """Constructor."""
+        super().__init__(filepath)
+        rows = self.iter_rows()
+        try:
+            first_row = list(next(rows, []))
+        finally:
+            rows.close()
+        self.__width = len(first_row)
+        for i, value in enumerate(first_row):
+            if self.__is_empty(value):
+                self.__width = i
+                break
+        if self.__width == 0:
+            raise FittingDataInvalidFile("All rows are empty.")
+        first_row = first_row[: self.__width]
+        self.__has_header = all(self.__is_header(value) for value in first_row)
+        if self.__has_header:
+            self.__headers = first_row
+        else:
+            self.__headers = [str(i) for i in range(self.__width)]
+        duplicate_headers = [
+            header
+            for header in dict.fromkeys(self.__headers)
+            if self.__headers.count(header) > 1
+        ]
+        if len(duplicate_headers) != 0:
+            raise FittingDataInvalidFile(
+                f"The following headers appear more than once: "
+                f'{", ".join(duplicate_headers)}'
+            )
+
+    @property
+    def headers(self) -> List[str]:
+        """Headers of all columns in the source."""
+        return self.__headers
+
+    @abstractmethod
+    def iter_rows(self) -> Generator[list, None, None]:
+        """Iterate over the rows of the file, including the header row."""
+
+    def read_column(self, header: str) -> np.ndarray:
+        """
+        Read the values of a single column.
+
+        :param header: Header of the column
+        :type header: str
+        :return: values of the column
+        :rtype: np.ndarray
+        """
+        return self.read_columns([header])[header]
+
+    def read_columns(
+        self, headers: List[str], task: Optional[IngestionTask] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Read several columns in a single pass over the rows.
+
+        :param headers: Headers of the columns
+        :type headers: List[str]
+        :param task: Optional. Task to report progress to.
+        :type task: Optional[IngestionTask]
+        :return: values of the columns, by their headers
+        :rtype: Dict[str, np.ndarray]
+        :raises FittingDataInvalidFile: Raised when a cell of the columns is empty
+            or is not a number.
+        """
+        indices = {header: self.headers.index(header) for header in headers}
+        values: Dict[str, List[float]] = {header: [] for header in headers}
+        rows = self.iter_rows()
+        try:
+            if self.__has_header:
+                next(rows, None)
+            first_row_number = 2 if self.__has_header else 1
+            for row_number, row in enumerate(rows, start=first_row_number):
+                if self.__is_last_row(row, row_number):
+                    break
+                for header, index in indices.items():
+                    values[header].append(self.__convert_cell(row, row_number, index))
+                number_of_rows = row_number - first_row_number + 1
+                if task is not None and number_of_rows % INGESTION_PROGRESS_ROWS == 0:
+                    task.report(self.progress(number_of_rows))
+        finally:
+            rows.close()
+        return {
+            header: np.array(header_values, dtype=float)
+            for header, header_values in values.items()
+        }
+
+    def progress(self, number_of_rows: int) -> IngestionProgress:
+        """
+        Progress of reading the rows, reported while reading columns.
+
+        :param number_of_rows: number of rows read so far, not counting the headers
+        :type number_of_rows: int
+        :return: progress of the reading
+        :rtype: IngestionProgress
+        """
+        return IngestionProgress(rows=number_of_rows)
+
+    def __is_last_row(self, row: list, row_number: int) -> bool:
+        if len(row) > self.__width and not self.__is_empty(row[self.__width]):
+            raise FittingDataInvalidFile(
+                f"Cell should be empty at row {row_number} column {self.__width + 1}."
+            )
+        return all(self.__is_empty(value) for value in row[: self.__width])
+
+    @classmethod
+    def __convert_cell(cls, row: list, row_number: int, index: int) -> float:
+        value = row[index] if index < len(row) else None
+        if isinstance(value, str):
+            value = value.strip()
+        if cls.__is_empty(value):
+            raise FittingDataInvalidFile(
+                f"Empty cell at row {row_number} column {index + 1}."
+            )
+        try:
+            return float(value)
+        except (TypeError, ValueError) as error:
+            raise FittingDataInvalidFile(
+                f"Cell should be a number at row {row_number} column {index + 1}, "
+                f'got "{value}".'
+            ) from error
+
+    @classmethod
+    def __is_empty(cls, value) -> bool:
+        return value is None or (isinstance(value, str) and value.strip() == "")
+
+    @classmethod
+    def __is_header(cls, value) -> bool:
+        if not isinstance(value, str):
+            return False
+        try:
+            float(value)
+            return False
+        except ValueError:
+            return True
+
+
+class CsvColumnSource(RowsColumnSource):
+    """
+    Column source of csv files, which may be compressed.
+
+    The source can be limited to the first bytes of the file, for files which keep
+    growing while being read.
+    """
+
+    def __init__(self, filepath: Union[str, Path], size: Optional[int] = None):
+        """Constructor."""
+        self.size = size
+        self.__raw_file: Optional[IO[bytes]] = None
+        super().__init__(filepath)
+
+    def iter_rows(self) -> Generator[list, None, None]:
+        """Iterate over the rows of the file, including the header row."""
+        with open_decompressed(self.filepath) as (binary_file, raw_file):
+            size = self.size if binary_file is raw_file else None
+            self.__raw_file = raw_file
+            try:
+                yield from csv.reader(iter_lines(binary_file, size))
+            finally:
+                self.__raw_file = None
+
+    def progress(self, number_of_rows: int) -> IngestionProgress:
+        """
+        Progress of reading the rows, including the bytes read so far.
+
+        For compressed files, the reported bytes are the compressed ones.
+
+        :param number_of_rows: number of rows read so far, not counting the headers
+        :type number_of_rows: int
+        :return: progress of the reading
+        :rtype: IngestionProgress
+        """
+        if self.__raw_file is None:
+            return super().progress(number_of_rows)
+        return IngestionProgress(
+            rows=number_of_rows,
+            bytes_read=self.__raw_file.tell(),
+            total_bytes=self.filepath.stat().st_size
+            if self.size is None
+            else self.size,
+        )
+
+
+class ExcelColumnSource(RowsColumnSource):
+    """
+    Column source of a sheet in an excel workbook.
+
+    The source reads the sheet through the given reader, which is owned by the
+    caller. It should be kept open for as long as the source is in use.
+    """
+
+    def __init__(self, excel_reader: ExcelReader, sheet: str):
+        """Constructor."""
+        self.sheet = sheet
+        self.__excel_reader = excel_reader
+        super().__init__(excel_reader.filepath)
+
+    def iter_rows(self) -> Generator[list, None, None]:
+        """Iterate over the rows of the sheet, including the header row."""
+        yield from self.__excel_reader.iter_rows(self.sheet)
+
+
+COLUMN_SOURCES: Dict[str, Callable[[Union[str, Path]], ColumnSource]] = {
+    ".npz": NpzColumnSource,
+    ".parquet": ParquetColumnSource,
+    ".feather": FeatherColumnSource,
+    ".arrow": FeatherColumnSource,
+}
+
+
+def is_columnar_file(filepath: Union[str, Path]) -> bool:
+    """
+    Check whether the file can be read as a column source.
+
+    :param filepath: path of the input file
+    :type filepath: Union[str, Path]
+    :return: True if the file format is a columnar one.
+    :rtype: bool
+    """
+    return Path(filepath).suffix.lower() in COLUMN_SOURCES
+
+
+def open_column_source(filepath: Union[str, Path]) -> ColumnSource:
+    """
+    Open the suitable column source for the given file.
+
+    :param filepath: path of the input file
+    :type filepath: Union[str, Path]
+    :return: column source of the file
+    :rtype: ColumnSource
+    :raises FittingDataError: Raised when the file format is not a columnar one.
+    """
+    suffix = Path(filepath).suffix.lower()
+    if suffix not in COLUMN_SOURCES:
+        raise FittingDataError(f"Cannot read columns of file with suffix {suffix}")
+    return COLUMN_SOURCES[suffix](filepath)
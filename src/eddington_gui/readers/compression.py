@@ -0,0 +1,133 @@
+"""Detection and streaming decompression of compressed input files."""
+import bz2
+import gzip
+import io
+import lzma
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional, Tuple, Type, Union, cast
+
+from eddington import FittingDataError, FittingDataInvalidFile
+
+has_zstandard = False  # pylint: disable=invalid-name
+try:
+    import zstandard
+
+    has_zstandard = True  # pylint: disable=invalid-name
+except ImportError:
+    pass
+
+GZIP, XZ, BZIP2, ZSTANDARD = "gzip", "xz", "bzip2", "zstandard"
+
+COMPRESSION_SUFFIXES = {".gz": GZIP, ".xz": XZ, ".bz2": BZIP2, ".zst": ZSTANDARD}
+COMPRESSION_MAGIC_BYTES = {
+    b"\x1f\x8b": GZIP,
+    b"\xfd7zXZ\x00": XZ,
+    b"BZh": BZIP2,
+    b"\x28\xb5\x2f\xfd": ZSTANDARD,
+}
+
+
+def detect_compression(filepath: Union[str, Path]) -> Optional[str]:
+    """
+    Detect the compression of a file by its suffix or, if missing, its magic bytes.
+
+    :param filepath: path of the input file
+    :type filepath: Union[str, Path]
+    :return: The compression of the file, or None if it is not compressed.
+    :rtype: Optional[str]
+    """
+    filepath = Path(filepath)
+    compression = COMPRESSION_SUFFIXES.get(filepath.suffix.lower(), None)
+    if compression is not None:
+        return compression
+    with open(filepath, mode="rb") as binary_file:
+        header = binary_file.read(max(len(magic) for magic in COMPRESSION_MAGIC_BYTES))
+    for magic, compression in COMPRESSION_MAGIC_BYTES.items():
+        if header.startswith(magic):
+            return compression
+    return None
+
+
+def is_compressed(filepath: Union[str, Path]) -> bool:
+    """
+    Check whether a file is compressed.
+
+    :param filepath: path of the input file
+    :type filepath: Union[str, Path]
+    :return: True if the file is compressed, False otherwise.
+    :rtype: bool
+    """
+    return detect_compression(filepath) is not None
+
+
+def uncompressed_suffix(filepath: Union[str, Path]) -> str:
+    """
+    Get the suffix of a file without its compression suffix.
+
+    For example, the suffix of "data.csv.gz" is ".csv".
+
+    :param filepath: path of the input file
+    :type filepath: Union[str, Path]
+    :return: suffix of the file once decompressed
+    :rtype: str
+    """
+    filepath = Path(filepath)
+    if filepath.suffix.lower() in COMPRESSION_SUFFIXES:
+        return filepath.with_suffix("").suffix
+    return filepath.suffix
+
+
+@contextmanager
+def open_decompressed(
+    filepath: Union[str, Path]
+) -> Iterator[Tuple[IO[bytes], IO[bytes]]]:
+    """
+    Open a file for reading, decompressing it on the fly if it is compressed.
+
+    Nothing is decompressed to the disk: the decompressed bytes are streamed while
+    being read.
+
+    :param filepath: path of the input file
+    :type filepath: Union[str, Path]
+    :return: context manager of the decompressed stream and the underlying file.
+        Position in the underlying file is the number of compressed bytes read.
+    :rtype: Iterator[Tuple[IO[bytes], IO[bytes]]]
+    :raises FittingDataError: Raised when the compression is not supported.
+    :raises FittingDataInvalidFile: Raised when the file cannot be decompressed.
+    """
+    compression = detect_compression(filepath)
+    if compression == ZSTANDARD and not has_zstandard:
+        raise FittingDataError(
+            "Reading zstandard compressed files requires zstandard. "
+            "Please install it and try again."
+        )
+    with open(filepath, mode="rb") as raw_file:
+        if compression is None:
+            yield raw_file, raw_file
+            return
+        try:
+            with _decompress(raw_file, compression) as binary_file:
+                yield binary_file, raw_file
+        except _decompression_errors() as error:
+            raise FittingDataInvalidFile(
+                f'Could not decompress "{Path(filepath).name}": {error}'
+            ) from error
+
+
+def _decompress(raw_file: IO[bytes], compression: str) -> IO[bytes]:
+    if compression == GZIP:
+        # GzipFile is a binary file, though it isn't declared as IO[bytes]
+        return cast(IO[bytes], gzip.open(raw_file, mode="rb"))
+    if compression == XZ:
+        return lzma.open(raw_file, mode="rb")
+    if compression == BZIP2:
+        return bz2.open(raw_file, mode="rb")
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw_file))
+
+
+def _decompression_errors() -> Tuple[Type[Exception], ...]:
+    errors: Tuple[Type[Exception], ...] = (OSError, EOFError, lzma.LZMAError)
+    if has_zstandard:
+        errors += (zstandard.ZstdError,)
+    return errors
@@ -0,0 +1,167 @@
+"""Incremental reading of csv files which keep growing, such as live measurements."""
+import csv
+import io
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+from eddington import FittingData, FittingDataError
+from eddington.raw_data_builder import RawDataBuilder
+
+from eddington_gui.consts import CSV_FOLLOW_CHUNK_SIZE, ENCODING
+from eddington_gui.readers.ingestion import build_fitting_data_with_columns
+
+
+class CsvFollower:
+    """
+    Follower of a csv file to which rows are appended.
+
+    The follower keeps the offset up to which the file has already been read, so
+    each read parses only the bytes appended since. A last line which has not been
+    fully written yet is kept until its end is appended.
+    """
+
+    def __init__(self, filepath: Union[str, Path], offset: int):
+        """
+        Constructor.
+
+        :param filepath: path of the csv file
+        :type filepath: Union[str, Path]
+        :param offset: number of bytes already read from the file
+        :type offset: int
+        """
+        self.filepath = Path(filepath)
+        self.offset = offset
+        self.__pending = self.__read_unterminated_line()
+        self.__replace_last = self.__pending.strip() != b""
+
+    @property
+    def complete_offset(self) -> int:
+        """Offset of the end of the last complete line read from the file."""
+        return self.offset - len(self.__pending)
+
+    def read_new_rows(self) -> Tuple[List[List[str]], bool]:
+        """
+        Read the rows appended to the file since the last read.
+
+        If the last line read before was not terminated, it might have been read
+        while being written. In that case, the first returned row is its complete
+        version and should replace the last record.
+
+        :return: The new rows, and whether the first of them replaces the last record
+        :rtype: Tuple[List[List[str]], bool]
+        :raises FittingDataError: Raised when the file has been truncated.
+        """
+        size = self.filepath.stat().st_size
+        if size < self.offset:
+            raise FittingDataError(
+                f'"{self.filepath.name}" has been truncated, cannot follow it anymore.'
+            )
+        if size == self.offset:
+            return [], False
+        with open(self.filepath, mode="rb") as binary_file:
+            binary_file.seek(self.offset)
+            appended = binary_file.read(size - self.offset)
+        self.offset += len(appended)
+        complete, newline, self.__pending = (self.__pending + appended).rpartition(
+            b"\n"
+        )
+        if newline == b"":
+            return [], False
+        replace_last, self.__replace_last = self.__replace_last, False
+        text = (complete + newline).decode(ENCODING)
+        rows = [
+            row
+            for row in csv.reader(io.StringIO(text, newline=""))
+            if any(cell.strip() != "" for cell in row)
+        ]
+        return rows, replace_last
+
+    def __read_unterminated_line(self) -> bytes:
+        line = b""
+        end = self.offset
+        with open(self.filepath, mode="rb") as binary_file:
+            while end > 0:
+                start = max(0, end - CSV_FOLLOW_CHUNK_SIZE)
+                binary_file.seek(start)
+                chunk = binary_file.read(end - start)
+                newline_index = chunk.rfind(b"\n")
+                if newline_index != -1:
+                    return chunk[newline_index + 1 :] + line
+                line = chunk + line
+                end = start
+        return line
+
+
+def append_rows(
+    fitting_data: FittingData,
+    rows: List[List[str]],
+    replace_last: bool = False,
+    headers: Optional[List[str]] = None,
+) -> Tuple[FittingData, int]:
+    """
+    Build fitting data with records appended to existing fitting data.
+
+    The used columns and the selection of existing records are kept, and the new
+    records are selected.
+
+    :param fitting_data: Fitting data to append the records to
+    :type fitting_data: FittingData
+    :param rows: rows read from the input file
+    :type rows: List[List[str]]
+    :param replace_last: whether the first row replaces the last record
+    :type replace_last: bool
+    :param headers: Optional. Headers of all columns in the rows, when the fitting
+        data contains only some of them. If None, the rows contain the data columns.
+    :type headers: Optional[List[str]]
+    :return: The new fitting data, and the number of added records, not counting a
+        replaced record
+    :rtype: Tuple[FittingData, int]
+    :raises FittingDataInvalidFile: Raised when one of the rows is not valid.
+    """
+    if len(rows) == 0:
+        return fitting_data, 0
+    columns = fitting_data.all_columns
+    if headers is None:
+        headers = columns
+    indices = [headers.index(column) for column in columns]
+    cells = [[row[i] if i < len(row) else None for i in indices] for row in rows]
+    new_data = RawDataBuilder.fix_types_in_raw_dict(
+        OrderedDict(zip(columns, zip(*cells)))
+    )
+    number_of_records = fitting_data.number_of_records
+    kept_records = (
+        number_of_records - 1
+        if replace_last and number_of_records != 0
+        else number_of_records
+    )
+    data = OrderedDict()
+    for column in columns:
+        values = fitting_data.column_data(column, only_selected=False)
+        data[column] = np.concatenate(
+            [values[:kept_records], np.asarray(new_data[column], dtype=float)]
+        )
+    appended_data = build_fitting_data_with_columns(data, fitting_data.used_columns)
+    appended_data.records_indices = appended_records_indices(
+        fitting_data.records_indices, appended_data.number_of_records
+    )
+    return appended_data, appended_data.number_of_records - number_of_records
+
+
+def appended_records_indices(
+    records_indices: List[bool], number_of_records: int
+) -> List[bool]:
+    """
+    Extend a records selection to records appended after them, selecting them.
+
+    A record which replaces the last one keeps its selection.
+
+    :param records_indices: selection of the records before appending
+    :type records_indices: List[bool]
+    :param number_of_records: number of records after appending
+    :type number_of_records: int
+    :return: selection of the records after appending
+    :rtype: List[bool]
+    """
+    return list(records_indices) + [True] * (number_of_records - len(records_indices))
@@ -0,0 +1,207 @@
+"""Persistent cache of parsed fitting data."""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple, Union
+
+import numpy as np
+from eddington import FittingData, FittingDataError
+from eddington.fitting_data import Columns
+
+from eddington_gui.consts import DEFAULT_DATA_CACHE_SIZE, ENCODING
+from eddington_gui.readers.ingestion import build_fitting_data_with_columns
+
+
+class DataCache:
+    """
+    Size bounded on-disk cache of parsed fitting data.
+
+    Each entry is keyed by the path, modification time, size and sheet of the input
+    file, so any change to the file invalidates it. The columns are saved as
+    separate binary ``.npy`` files, which are loaded without parsing, along with the
+    headers and the used columns. Once the cache exceeds its maximum size, the least
+    recently used entries are evicted.
+    """
+
+    COLUMNS_FILE = "columns.json"
+
+    def __init__(self, directory: Path, max_size: int = DEFAULT_DATA_CACHE_SIZE):
+        """Constructor."""
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def key(cls, filepath: Union[str, Path], sheet: Optional[str] = None) -> str:
+        """
+        Build the cache key of an input file.
+
+        :param filepath: path of the input file
+        :type filepath: Union[str, Path]
+        :param sheet: Optional. Sheet from which the data is read.
+        :type sheet: Optional[str]
+        :return: cache key
+        :rtype: str
+        """
+        filepath = Path(filepath).resolve()
+        stat = filepath.stat()
+        raw_key = f"{filepath}|{stat.st_mtime_ns}|{stat.st_size}|{sheet}"
+        return hashlib.sha256(raw_key.encode(ENCODING)).hexdigest()
+
+    @property
+    def size(self) -> int:
+        """Total size of the cache in bytes."""
+        return sum(self.__entry_size(entry) for entry in self.__entries())
+
+    def load(
+        self, filepath: Union[str, Path], sheet: Optional[str] = None
+    ) -> Optional[FittingData]:
+        """
+        Load cached fitting data of an input file.
+
+        :param filepath: path of the input file
+        :type filepath: Union[str, Path]
+        :param sheet: Optional. Sheet from which the data is read.
+        :type sheet: Optional[str]
+        :return: Cached fitting data, or None if the file is not cached
+        :rtype: Optional[FittingData]
+        """
+        return self.__load_entry(self.key(filepath, sheet))
+
+    def save(
+        self,
+        filepath: Union[str, Path],
+        fitting_data: FittingData,
+        sheet: Optional[str] = None,
+    ):
+        """
+        Save fitting data of an input file to the cache.
+
+        Caching is best effort: failing to write the entry leaves the cache as is.
+
+        :param filepath: path of the input file
+        :type filepath: Union[str, Path]
+        :param fitting_data: Fitting data read from the file
+        :type fitting_data: FittingData
+        :param sheet: Optional. Sheet from which the data was read.
+        :type sheet: Optional[str]
+        """
+        self.__save_entry(self.key(filepath, sheet), fitting_data)
+
+    def load_or_read(
+        self,
+        filepath: Union[str, Path],
+        read: Callable[[], FittingData],
+        sheet: Optional[str] = None,
+    ) -> FittingData:
+        """
+        Load fitting data from the cache, or read and cache it if missing.
+
+        The cache key is computed before reading, so a file which changes while
+        being read is cached under the state it had when the reading started.
+
+        :param filepath: path of the input file
+        :type filepath: Union[str, Path]
+        :param read: Callable reading the fitting data from the file itself.
+        :type read: Callable[[], FittingData]
+        :param sheet: Optional. Sheet from which the data is read.
+        :type sheet: Optional[str]
+        :return: fitting data
+        :rtype: FittingData
+        """
+        key = self.key(filepath, sheet)
+        fitting_data = self.__load_entry(key)
+        if fitting_data is None:
+            fitting_data = read()
+            self.__save_entry(key, fitting_data)
+        return fitting_data
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its size."""
+        with self.__lock:
+            entries = sorted(self.__entries(), key=lambda entry: entry.stat().st_mtime)
+            sizes = [self.__entry_size(entry) for entry in entries]
+            total_size = sum(sizes)
+            for entry, entry_size in zip(entries, sizes):
+                if total_size <= self.max_size:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total_size -= entry_size
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __load_entry(self, key: str) -> Optional[FittingData]:
+        entry = self.directory / key
+        if not entry.exists():
+            return None
+        try:
+            headers, used_columns = self.__read_columns(entry)
+            data = OrderedDict(
+                (header, np.load(self.__column_path(entry, i)))
+                for i, header in enumerate(headers)
+            )
+            fitting_data = build_fitting_data_with_columns(data, used_columns)
+        # Entries which cannot be loaded, such as ones of older versions, are evicted
+        except (OSError, ValueError, KeyError, TypeError, FittingDataError):
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        os.utime(entry)
+        return fitting_data
+
+    def __save_entry(self, key: str, fitting_data: FittingData):
+        entry = self.directory / key
+        if entry.exists():
+            return
+        temp_entry = self.directory / f"{key}.{os.getpid()}.{threading.get_ident()}"
+        try:
+            temp_entry.mkdir(parents=True)
+            for i, header in enumerate(fitting_data.all_columns):
+                np.save(
+                    self.__column_path(temp_entry, i),
+                    fitting_data.column_data(header, only_selected=False),
+                )
+            with open(
+                temp_entry / self.COLUMNS_FILE, mode="w", encoding=ENCODING
+            ) as fd:
+                json.dump(
+                    {
+                        "headers": fitting_data.all_columns,
+                        "used_columns": asdict(fitting_data.used_columns),
+                    },
+                    fd,
+                )
+            os.replace(temp_entry, entry)
+        except OSError:
+            shutil.rmtree(temp_entry, ignore_errors=True)
+            return
+        self.evict()
+
+    def __entries(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        return [
+            entry
+            for entry in self.directory.iterdir()
+            if entry.is_dir() and (entry / self.COLUMNS_FILE).exists()
+        ]
+
+    @classmethod
+    def __entry_size(cls, entry: Path) -> int:
+        return sum(path.stat().st_size for path in entry.iterdir())
+
+    @classmethod
+    def __column_path(cls, entry: Path, index: int) -> Path:
+        return entry / f"column_{index}.npy"
+
+    @classmethod
+    def __read_columns(cls, entry: Path) -> Tuple[List[str], Columns]:
+        with open(entry / cls.COLUMNS_FILE, mode="r", encoding=ENCODING) as fd:
+            columns = json.load(fd)
+        return list(columns["headers"]), Columns(**columns["used_columns"])
@@ -0,0 +1,65 @@
+"""Streaming reader of excel workbooks."""
+import threading
+from pathlib import Path
+from typing import Iterator, List, Union
+
+import openpyxl
+from eddington import FittingDataError
+
+
+class ExcelReader:
+    """
+    Read-only handle of an excel workbook.
+
+    The workbook is opened once in read-only mode, so only its metadata is loaded.
+    Rows are streamed from the requested sheet only, keeping memory usage constant
+    no matter how big the workbook is. The handle is meant to be kept open for as
+    long as the file is in use, and may be shared between threads.
+    """
+
+    def __init__(self, filepath: Union[str, Path]):
+        """Constructor."""
+        self.filepath = Path(filepath)
+        self.__lock = threading.Lock()
+        self.__workbook = openpyxl.load_workbook(
+            self.filepath, read_only=True, data_only=True
+        )
+
+    def __enter__(self):
+        """Enter context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Exit context manager, closing the workbook."""
+        self.close()
+
+    @property
+    def sheetnames(self) -> List[str]:
+        """Names of the sheets in the workbook."""
+        return list(self.__workbook.sheetnames)
+
+    def close(self):
+        """Close the workbook handle."""
+        with self.__lock:
+            self.__workbook.close()
+
+    def iter_rows(self, sheet: str) -> Iterator[list]:
+        """
+        Stream the values of the rows in a sheet.
+
+        :param sheet: sheet from which to read the data.
+        :type sheet: str
+        :return: iterator over the rows values
+        :rtype: Iterator[list]
+        :raises FittingDataError: Raised when the given sheet do not exist in the
+            workbook.
+        """
+        if sheet not in self.sheetnames:
+            raise FittingDataError(
+                f'Sheet named "{sheet}" does not exist in "{self.filepath.name}"'
+            )
+        with self.__lock:
+            worksheet = self.__workbook[sheet]
+            worksheet.reset_dimensions()
+            for row in worksheet.iter_rows(values_only=True):
+                yield list(row)
@@ -0,0 +1,55 @@
+"""Reading fitting data out of input files, meant to run outside of the UI thread."""
+from typing import IO, Dict, Iterator, Optional
+
+import numpy as np
+from eddington import FittingData
+from eddington.fitting_data import Columns
+
+from eddington_gui.consts import ENCODING
+
+
+def iter_lines(binary_file: IO[bytes], size: Optional[int] = None) -> Iterator[str]:
+    """
+    Iterate over the decoded lines in the first bytes of a binary file.
+
+    :param binary_file: file opened in binary mode
+    :type binary_file: IO[bytes]
+    :param size: Optional. Number of bytes to read. If None, reads all lines.
+    :type size: Optional[int]
+    :return: iterator over the lines, including their line endings
+    :rtype: Iterator[str]
+    """
+    for line in binary_file:
+        if size is None:
+            yield line.decode(ENCODING)
+            continue
+        excess = binary_file.tell() - size
+        if excess > 0:
+            line = line[: len(line) - excess]
+            if len(line) != 0:
+                yield line.decode(ENCODING, errors="replace")
+            return
+        yield line.decode(ENCODING)
+
+
+def build_fitting_data_with_columns(
+    data: Dict[str, np.ndarray], columns: Columns
+) -> FittingData:
+    """
+    Build fitting data using the given columns, without searching for others.
+
+    :param data: values of the columns, by their headers, in order
+    :type data: Dict[str, np.ndarray]
+    :param columns: columns to use as x, x error, y and y error
+    :type columns: Columns
+    :return: fitting data
+    :rtype: FittingData
+    """
+    return FittingData(
+        data=data,
+        x_column=columns.x,
+        xerr_column=columns.xerr,
+        y_column=columns.y,
+        yerr_column=columns.yerr,
+        search=False,
+    )
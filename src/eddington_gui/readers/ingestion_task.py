@@ -0,0 +1,61 @@
+"""Cancellable task reporting the progress of reading an input file."""
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from eddington_gui.exceptions import IngestionCancelledError
+
+
+@dataclass
+class IngestionProgress:
+    """Progress of an ingestion task."""
+
+    rows: int
+    total_rows: Optional[int] = None
+    bytes_read: Optional[int] = None
+    total_bytes: Optional[int] = None
+
+
+class IngestionTask:
+    """
+    A cancellable reading job of an input file.
+
+    The task is shared between the UI thread, which may cancel it, and the worker
+    thread reading the file, which reports its progress through it.
+    """
+
+    def __init__(
+        self, on_progress: Optional[Callable[[IngestionProgress], None]] = None
+    ):
+        """Constructor."""
+        self.on_progress = on_progress
+        self.__cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the task has been cancelled."""
+        return self.__cancel_event.is_set()
+
+    def cancel(self):
+        """Cancel the task. The worker stops on its next progress report."""
+        self.__cancel_event.set()
+
+    def check_cancelled(self):
+        """
+        Stop the worker if the task was cancelled.
+
+        :raises IngestionCancelledError: Raised if the task was cancelled.
+        """
+        if self.cancelled:
+            raise IngestionCancelledError("Reading the input file has been cancelled")
+
+    def report(self, progress: IngestionProgress):
+        """
+        Report progress of the task.
+
+        :param progress: The current progress of the task
+        :type progress: IngestionProgress
+        """
+        self.check_cancelled()
+        if self.on_progress is not None:
+            self.on_progress(progress)
@@ -0,0 +1,140 @@
+"""Concurrent validation of the sheets of an excel workbook."""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+from eddington import FittingData, FittingDataError
+
+from eddington_gui.consts import (
+    PROJECTED_LOAD_MIN_COLUMNS,
+    SHEET_VALIDATION_POLL_INTERVAL,
+)
+from eddington_gui.readers.column_source import ExcelColumnSource
+from eddington_gui.readers.data_cache import DataCache
+from eddington_gui.readers.excel_reader import ExcelReader
+from eddington_gui.readers.ingestion_task import IngestionTask
+
+
+def validate_sheet(
+    filepath: Union[str, Path],
+    sheet: str,
+    cache_directory: Optional[Union[str, Path]] = None,
+) -> Optional[FittingData]:
+    """
+    Check whether a sheet contains valid fitting data.
+
+    This function runs in a worker process. The sheet is parsed as when loading
+    it, and its parsed data is returned, so the main process can load it without
+    parsing the sheet again. If a cache directory is given, sheets which are
+    already cached are loaded from it, and the parsed data of valid sheets is
+    saved to it.
+
+    :param filepath: path of the excel file
+    :type filepath: Union[str, Path]
+    :param sheet: sheet to validate
+    :type sheet: str
+    :param cache_directory: Optional. Directory of the data cache.
+    :type cache_directory: Optional[Union[str, Path]]
+    :return: The parsed data if the sheet is valid, None otherwise.
+    :rtype: Optional[FittingData]
+    """
+    data_cache = None if cache_directory is None else DataCache(Path(cache_directory))
+    if data_cache is not None:
+        fitting_data = data_cache.load(filepath, sheet=sheet)
+        if fitting_data is not None:
+            return fitting_data
+    try:
+        with ExcelReader(filepath) as excel_reader:
+            column_source = ExcelColumnSource(excel_reader, sheet)
+            fitting_data = column_source.build_fitting_data(
+                all_columns=len(column_source.headers) < PROJECTED_LOAD_MIN_COLUMNS
+            )
+    except FittingDataError:
+        return None
+    if data_cache is not None:
+        data_cache.save(filepath, fitting_data, sheet=sheet)
+    return fitting_data
+
+
+async def find_first_valid_sheet(
+    filepath: Union[str, Path],
+    sheets: List[str],
+    on_validation: Optional[Callable[[str, bool], None]] = None,
+    cache_directory: Optional[Union[str, Path]] = None,
+    task: Optional[IngestionTask] = None,
+) -> Optional[Tuple[str, FittingData]]:
+    """
+    Validate all sheets concurrently in a process pool and find the first valid one.
+
+    The first valid sheet in workbook order is returned as soon as all sheets
+    before it are known to be invalid. Validations which haven't started yet are
+    then cancelled.
+
+    :param filepath: path of the excel file
+    :type filepath: Union[str, Path]
+    :param sheets: names of the sheets to validate, in workbook order
+    :type sheets: List[str]
+    :param on_validation: Optional. Callback to run whenever a sheet validation
+        is done, with the sheet name and whether it is valid.
+    :type on_validation: Optional[Callable[[str, bool], None]]
+    :param cache_directory: Optional. Directory of the data cache.
+    :type cache_directory: Optional[Union[str, Path]]
+    :param task: Optional. Task used for cancellation.
+    :type task: Optional[IngestionTask]
+    :return: The first valid sheet and its parsed data, or None if no sheet is
+        valid.
+    :rtype: Optional[Tuple[str, FittingData]]
+    """
+    if len(sheets) == 0:
+        return None
+    loop = asyncio.get_event_loop()
+    executor = ProcessPoolExecutor(max_workers=min(len(sheets), os.cpu_count() or 1))
+    futures: Dict[str, asyncio.Future] = {
+        sheet: loop.run_in_executor(
+            executor, validate_sheet, str(filepath), sheet, cache_directory
+        )
+        for sheet in sheets
+    }
+    reported: Set[str] = set()
+    try:
+        for sheet in sheets:
+            while not futures[sheet].done():
+                if task is not None:
+                    task.check_cancelled()
+                await asyncio.wait(
+                    [future for future in futures.values() if not future.done()],
+                    timeout=SHEET_VALIDATION_POLL_INTERVAL,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                _report_validations(futures, reported, on_validation)
+            _report_validations(futures, reported, on_validation)
+            if _is_valid(futures[sheet]):
+                return sheet, futures[sheet].result()
+        return None
+    finally:
+        for future in futures.values():
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _report_validations(
+    futures: Dict[str, asyncio.Future],
+    reported: Set[str],
+    on_validation: Optional[Callable[[str, bool], None]],
+):
+    for sheet, future in futures.items():
+        if sheet in reported or not future.done() or future.cancelled():
+            continue
+        reported.add(sheet)
+        if on_validation is not None:
+            on_validation(sheet, _is_valid(future))
+
+
+def _is_valid(future: asyncio.Future) -> bool:
+    return (
+        not future.cancelled()
+        and future.exception() is None  # noqa: W503
+        and future.result() is not None  # noqa: W503
+    )
@@ -0,0 +1 @@
+"""Helpers for selecting records of fitting data."""
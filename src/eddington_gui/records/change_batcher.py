@@ -0,0 +1,79 @@
+"""Coalescing of many changes into a single update."""
+import asyncio
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from eddington_gui.consts import RECORDS_CHANGE_DELAY
+
+
+class ChangeBatcher:
+    """
+    Collects changes and runs a callback once for each batch of them.
+
+    A batch ends either when no change has been made for a short delay, or when
+    the outermost :meth:`transaction` ends.
+    """
+
+    def __init__(
+        self, callback: Callable[[], None], delay: float = RECORDS_CHANGE_DELAY
+    ):
+        """
+        Constructor.
+
+        :param callback: function to run once for each batch of changes
+        :type callback: Callable[[], None]
+        :param delay: seconds without changes after which a batch ends
+        :type delay: float
+        """
+        self.callback = callback
+        self.delay = delay
+        self.__pending = False
+        self.__transactions = 0
+        self.__handle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def pending(self) -> bool:
+        """Whether there are changes which the callback hasn't run for yet."""
+        return self.__pending
+
+    def notify(self):
+        """Report a change. The callback runs once changes stop coming."""
+        self.__pending = True
+        if self.__transactions != 0:
+            return
+        self.__cancel_timer()
+        self.__handle = asyncio.get_event_loop().call_later(self.delay, self.flush)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Group changes, so the callback runs once when the transaction ends.
+
+        Transactions can be nested. The callback runs at the end of the outermost
+        one, if any change has been reported.
+        """
+        self.__transactions += 1
+        try:
+            yield
+        finally:
+            self.__transactions -= 1
+            if self.__transactions == 0:
+                self.flush()
+
+    def flush(self):
+        """Run the callback now if there are pending changes."""
+        self.__cancel_timer()
+        if not self.__pending:
+            return
+        self.__pending = False
+        self.callback()
+
+    def cancel(self):
+        """Drop pending changes without running the callback."""
+        self.__cancel_timer()
+        self.__pending = False
+
+    def __cancel_timer(self):
+        if self.__handle is not None:
+            self.__handle.cancel()
+            self.__handle = None
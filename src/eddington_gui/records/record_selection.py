@@ -0,0 +1,135 @@
+"""Selection of records of fitting data, held in a boolean array."""
+from typing import List, Optional
+
+import numpy as np
+from eddington import FittingData
+
+
+class RecordSelection:
+    """
+    Selection of the records of fitting data, held in a boolean numpy array.
+
+    Bulk operations work on the whole array at once. Every change replaces the
+    records selection of the fitting data in a single step.
+
+    The selection follows the fitting data: if its records selection is replaced
+    from outside, as when records are appended, the array is rebuilt on next use.
+    Every change increases the version of the selection.
+    """
+
+    def __init__(self, fitting_data: FittingData):
+        """
+        Constructor.
+
+        :param fitting_data: fitting data whose records are selected
+        :type fitting_data: FittingData
+        """
+        self.fitting_data = fitting_data
+        self.__records_indices: Optional[List[bool]] = None
+        self.__mask = np.ones(0, dtype=bool)
+        self.__version = 0
+        self.__sync_if_outdated()
+
+    @property
+    def mask(self) -> np.ndarray:
+        """Read-only boolean array of the selected records."""
+        self.__sync_if_outdated()
+        mask = self.__mask.view()
+        mask.flags.writeable = False
+        return mask
+
+    @property
+    def version(self) -> int:
+        """Number of times the selection has changed."""
+        self.__sync_if_outdated()
+        return self.__version
+
+    @property
+    def number_of_records(self) -> int:
+        """Number of records, selected or not."""
+        self.__sync_if_outdated()
+        return len(self.__mask)
+
+    @property
+    def count(self) -> int:
+        """Number of selected records."""
+        self.__sync_if_outdated()
+        return int(np.count_nonzero(self.__mask))
+
+    @property
+    def all_selected(self) -> bool:
+        """Whether all records are selected."""
+        self.__sync_if_outdated()
+        return bool(np.all(self.__mask))
+
+    @property
+    def any_selected(self) -> bool:
+        """Whether at least one record is selected."""
+        self.__sync_if_outdated()
+        return bool(np.any(self.__mask))
+
+    def is_selected(self, record_number: int) -> bool:
+        """
+        Check whether a record is selected.
+
+        :param record_number: number of the record, starting from 1
+        :type record_number: int
+        :return: True if the record is selected, False otherwise.
+        :rtype: bool
+        """
+        self.__sync_if_outdated()
+        return bool(self.__mask[record_number - 1])
+
+    def set_record(self, record_number: int, selected: bool) -> bool:
+        """
+        Select or unselect a single record.
+
+        :param record_number: number of the record, starting from 1
+        :type record_number: int
+        :param selected: whether the record should be selected
+        :type selected: bool
+        :return: True if the selection has changed, False otherwise.
+        :rtype: bool
+        """
+        self.__sync_if_outdated()
+        index = record_number - 1
+        if self.__mask[index] == selected:
+            return False
+        mask = self.__mask.copy()
+        mask[index] = selected
+        self.set_mask(mask)
+        return True
+
+    def select_all(self):
+        """Select all records."""
+        self.set_mask(np.ones(self.number_of_records, dtype=bool))
+
+    def unselect_all(self):
+        """Unselect all records."""
+        self.set_mask(np.zeros(self.number_of_records, dtype=bool))
+
+    def invert(self):
+        """Select all unselected records, and unselect all selected records."""
+        self.set_mask(np.logical_not(self.mask))
+
+    def set_mask(self, mask: np.ndarray):
+        """
+        Replace the whole selection, in a single update of the fitting data.
+
+        :param mask: boolean array with an item for each record
+        :type mask: np.ndarray
+        """
+        mask = np.array(mask, dtype=bool)
+        records_indices = mask.tolist()
+        self.fitting_data.records_indices = records_indices
+        self.__mask = mask
+        self.__records_indices = records_indices
+        self.__version += 1
+
+    def __sync_if_outdated(self):
+        records_indices = self.fitting_data.records_indices
+        if records_indices is self.__records_indices:
+            return
+        self.__mask = np.array(records_indices, dtype=bool)
+        self.__records_indices = records_indices
+        self.__version += 1
@@ -0,0 +1,213 @@
+"""Statistics of selected records which are updated record by record."""
+from typing import Dict, Optional
+
+import numpy as np
+from eddington import FittingData
+from eddington.statistics import Statistics
+
+from eddington_gui.records.record_selection import RecordSelection
+
+
+class FenwickTree:
+    """
+    Binary indexed tree of counts.
+
+    Supports updating a count, and finding the k-th counted index, in logarithmic
+    time.
+    """
+
+    def __init__(self, counts: np.ndarray):
+        """Build the tree out of initial counts, in linear time."""
+        self.size = len(counts)
+        # Each node holds the sum of the counts in (i - lowbit(i), i]
+        prefix_sums = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])
+        nodes = np.arange(1, self.size + 1)
+        self.__tree = [0] + (
+            prefix_sums[nodes] - prefix_sums[nodes - (nodes & -nodes)]
+        ).tolist()
+        self.__highest_power = 1 << max(self.size.bit_length() - 1, 0)
+
+    def add(self, index: int, delta: int):
+        """
+        Add delta to the count of an index.
+
+        :param index: index to update, starting from 0
+        :type index: int
+        :param delta: value to add to the count
+        :type delta: int
+        """
+        i = index + 1
+        while i <= self.size:
+            self.__tree[i] += delta
+            i += i & -i
+
+    def find(self, k: int) -> int:
+        """
+        Find the index at which the prefix sum of the counts reaches k.
+
+        :param k: prefix sum to reach, starting from 1
+        :type k: int
+        :return: index, starting from 0
+        :rtype: int
+        """
+        position = 0
+        step = self.__highest_power
+        while step > 0:
+            next_position = position + step
+            if next_position <= self.size and self.__tree[next_position] < k:
+                position = next_position
+                k -= self.__tree[next_position]
+            step >>= 1
+        return position
+
+
+class ColumnRunningStatistics:  # pylint: disable=too-many-instance-attributes
+    """
+    Statistics of the selected values of a single column.
+
+    Count, sum and sum of squares are updated in constant time whenever a value is
+    selected or unselected. Sums are kept relative to a shift value in order to
+    avoid losing precision. Minimum, maximum and median are found using a Fenwick
+    tree over the ranks of the values, in logarithmic time.
+    """
+
+    def __init__(self, values: np.ndarray, selected: np.ndarray):
+        """Constructor."""
+        self.values = values
+        order = np.argsort(values, kind="stable")
+        self.__sorted_values = values[order]
+        self.__ranks = np.empty(len(values), dtype=int)
+        self.__ranks[order] = np.arange(len(values))
+        selected_array = np.asarray(selected, dtype=bool)
+        self.__tree = FenwickTree(selected_array[order].astype(int))
+        self.count = int(np.count_nonzero(selected_array))
+        self.__shift = float(values[0]) if len(values) != 0 else 0.0
+        shifted_values = values[selected_array] - self.__shift
+        self.__sum = float(np.sum(shifted_values))
+        self.__sum_of_squares = float(np.sum(shifted_values**2))
+
+    def select(self, index: int):
+        """Add the value of a record, given by its index starting from 0."""
+        self.__update(index, 1)
+
+    def unselect(self, index: int):
+        """Remove the value of a record, given by its index starting from 0."""
+        self.__update(index, -1)
+
+    def statistics(self) -> Optional[Statistics]:
+        """
+        Statistics of the selected values.
+
+        :return: statistics, or None if no value is selected.
+        :rtype: Optional[Statistics]
+        """
+        if self.count == 0:
+            return None
+        mean = self.__sum / self.count
+        variance = max(self.__sum_of_squares / self.count - mean**2, 0.0)
+        if self.count % 2 == 1:
+            median = self.__kth_value((self.count + 1) // 2)
+        else:
+            median = (
+                self.__kth_value(self.count // 2)
+                + self.__kth_value(self.count // 2 + 1)  # noqa: W503
+            ) / 2
+        return Statistics(
+            mean=self.__shift + mean,
+            median=median,
+            variance=variance,
+            standard_deviation=float(np.sqrt(variance)),
+            maximum_value=self.__kth_value(self.count),
+            minimum_value=self.__kth_value(1),
+        )
+
+    def __update(self, index: int, delta: int):
+        value = float(self.values[index]) - self.__shift
+        self.count += delta
+        self.__sum += delta * value
+        self.__sum_of_squares += delta * value**2
+        self.__tree.add(int(self.__ranks[index]), delta)
+
+    def __kth_value(self, k: int) -> float:
+        return float(self.__sorted_values[self.__tree.find(k)])
+
+
+class RunningStatistics:
+    """
+    Statistics of all columns in fitting data, kept up to date record by record.
+
+    Selecting or unselecting a single record through this class updates the
+    records selection, and updates the statistics of the selected records without
+    recalculating them over all records. Bulk changes of the selection should be
+    followed by :meth:`reset`.
+    """
+
+    def __init__(self, record_selection: RecordSelection):
+        """Constructor."""
+        self.record_selection = record_selection
+        self.__columns: Dict[str, ColumnRunningStatistics] = {}
+        self.reset()
+
+    @property
+    def fitting_data(self) -> FittingData:
+        """Fitting data whose statistics are kept."""
+        return self.record_selection.fitting_data
+
+    def reset(self):
+        """Recalculate all statistics from the fitting data."""
+        mask = self.record_selection.mask
+        self.__columns = {
+            column: ColumnRunningStatistics(
+                self.fitting_data.column_data(column, only_selected=False), mask
+            )
+            for column in self.fitting_data.all_columns
+        }
+
+    def select_record(self, record_number: int):
+        """
+        Select a record.
+
+        :param record_number: number of the record, starting from 1
+        :type record_number: int
+        """
+        self.__set_record(record_number, True)
+
+    def unselect_record(self, record_number: int):
+        """
+        Unselect a record.
+
+        :param record_number: number of the record, starting from 1
+        :type record_number: int
+        """
+        self.__set_record(record_number, False)
+
+    def statistics(self, column: str) -> Optional[Statistics]:
+        """
+        Statistics of the selected records in a column.
+
+        :param column: name of the column
+        :type column: str
+        :return: statistics, or None if no record is selected.
+        :rtype: Optional[Statistics]
+        """
+        self.__reset_if_outdated()
+        return self.__columns[column].statistics()
+
+    def __set_record(self, record_number: int, selected: bool):
+        self.__reset_if_outdated()
+        if not self.record_selection.set_record(record_number, selected):
+            return
+        index = record_number - 1
+        for column_statistics in self.__columns.values():
+            if selected:
+                column_statistics.select(index)
+            else:
+                column_statistics.unselect(index)
+
+    def __reset_if_outdated(self):
+        if self.__columns.keys() != set(self.fitting_data.all_columns) or any(
+            column_statistics.values
+            is not self.fitting_data.column_data(column, only_selected=False)
+            for column, column_statistics in self.__columns.items()
+        ):
+            self.reset()
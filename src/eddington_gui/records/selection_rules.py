@@ -0,0 +1,299 @@
+"""Rules selecting many records of fitting data at once."""
+import ast
+import operator
+from enum import Enum
+from typing import Callable, Dict, List, NoReturn
+
+import numpy as np
+from eddington import FittingData
+
+from eddington_gui.exceptions import SelectionRuleError
+from eddington_gui.records.record_selection import RecordSelection
+
+
+class SelectionMode(Enum):
+    """How a rule mask is combined with the current records selection."""
+
+    REPLACE = "Replace selection"
+    ADD = "Add to selection"
+    INTERSECT = "Intersect with selection"
+    REMOVE = "Remove from selection"
+
+    def combine(self, selected: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        Combine a rule mask with the current selection.
+
+        :param selected: current records selection
+        :type selected: np.ndarray
+        :param mask: records matching the rule
+        :type mask: np.ndarray
+        :return: new records selection
+        :rtype: np.ndarray
+        """
+        if self == SelectionMode.ADD:
+            return np.logical_or(selected, mask)
+        if self == SelectionMode.INTERSECT:
+            return np.logical_and(selected, mask)
+        if self == SelectionMode.REMOVE:
+            return np.logical_and(selected, np.logical_not(mask))
+        return mask
+
+
+def _single_argument(function: Callable) -> Callable:
+    # Numpy functions are wrapped, so a second argument can't be used as output
+    def call(value):
+        return function(value)
+
+    return call
+
+
+class SelectionRule:  # pylint: disable=too-few-public-methods
+    """
+    Boolean expression over the columns of fitting data, such as ``x > 3``.
+
+    Conditions may be combined, as in ``x > 3 and yerr < 0.1``. The expression is
+    evaluated over whole columns at once. It may use:
+
+    * Column names, and ``x``, ``xerr``, ``y`` and ``yerr`` for the used columns.
+      Columns whose names are not valid identifiers are given by ``column("name")``.
+    * ``index`` - the number of each record, starting from 1.
+    * Numbers, arithmetic, comparisons, ``and``, ``or`` and ``not``. Arithmetic is
+      done in floating point, so huge powers overflow to infinity.
+    * The functions ``abs``, ``sqrt``, ``exp``, ``log`` and ``log10``.
+    * ``between(value, low, high)`` - whether low <= value <= high.
+    * ``every(n, start=1)`` - every n-th record, starting from record number start.
+    * ``within_sigma(value, n)`` - whether the value is at most n standard
+      deviations away from the mean of the selected records.
+    """
+
+    BINARY_OPERATORS: Dict[type, Callable] = {
+        ast.Add: np.add,
+        ast.Sub: np.subtract,
+        ast.Mult: np.multiply,
+        ast.Div: np.true_divide,
+        ast.FloorDiv: np.floor_divide,
+        ast.Mod: np.mod,
+        ast.Pow: np.power,
+        ast.BitAnd: np.logical_and,
+        ast.BitOr: np.logical_or,
+    }
+    COMPARE_OPERATORS: Dict[type, Callable] = {
+        ast.Eq: operator.eq,
+        ast.NotEq: operator.ne,
+        ast.Lt: operator.lt,
+        ast.LtE: operator.le,
+        ast.Gt: operator.gt,
+        ast.GtE: operator.ge,
+    }
+    UNARY_OPERATORS: Dict[type, Callable] = {
+        ast.Not: np.logical_not,
+        ast.Invert: np.logical_not,
+        ast.USub: np.negative,
+        ast.UAdd: np.positive,
+    }
+    FUNCTIONS: Dict[str, Callable] = {
+        "abs": _single_argument(np.abs),
+        "sqrt": _single_argument(np.sqrt),
+        "exp": _single_argument(np.exp),
+        "log": _single_argument(np.log),
+        "log10": _single_argument(np.log10),
+    }
+
+    def __init__(self, expression: str):
+        """
+        Parse the rule expression.
+
+        :param expression: boolean expression over the columns
+        :type expression: str
+        :raises SelectionRuleError: Raised when the expression cannot be parsed.
+        """
+        self.expression = expression
+        try:
+            self.__tree = ast.parse(expression.strip(), mode="eval")
+        except SyntaxError as error:
+            raise SelectionRuleError(
+                f'Invalid selection rule "{expression}": {error.msg}'
+            ) from error
+
+    def mask(self, fitting_data: FittingData) -> np.ndarray:
+        """
+        Evaluate which records match the rule.
+
+        :param fitting_data: fitting data to evaluate the rule on
+        :type fitting_data: FittingData
+        :return: boolean mask over all records
+        :rtype: np.ndarray
+        :raises SelectionRuleError: Raised when the rule cannot be evaluated, or
+            when its result is not boolean.
+        """
+        try:
+            with np.errstate(all="ignore"):
+                result = _RuleEvaluator(self, fitting_data).evaluate(self.__tree.body)
+        except (ArithmeticError, TypeError, ValueError) as error:
+            raise SelectionRuleError(
+                f'Invalid selection rule "{self.expression}": {error}'
+            ) from error
+        result = np.asarray(result)
+        if result.dtype != bool:
+            raise SelectionRuleError(
+                f'Selection rule "{self.expression}" should be a condition, '
+                "such as x > 3"
+            )
+        return np.broadcast_to(result, (fitting_data.number_of_records,)).copy()
+
+
+class _RuleEvaluator:
+    def __init__(self, rule: SelectionRule, fitting_data: FittingData):
+        self.rule = rule
+        self.fitting_data = fitting_data
+        self.index = np.arange(1, fitting_data.number_of_records + 1)
+        self.functions: Dict[str, Callable] = dict(
+            SelectionRule.FUNCTIONS,
+            column=self.column,
+            between=lambda value, low, high: (value >= low) & (value <= high),
+            every=self.every,
+            within_sigma=self.within_sigma,
+        )
+
+    def evaluate(self, node: ast.AST):
+        """Evaluate a node of the rule, over whole columns."""
+        evaluate_method = getattr(self, f"evaluate_{type(node).__name__}", None)
+        if evaluate_method is None:
+            self.fail("unsupported syntax")
+        return evaluate_method(node)
+
+    def evaluate_Constant(self, node: ast.Constant):  # pylint: disable=invalid-name
+        """Evaluate a number or a string."""
+        if not isinstance(node.value, (int, float, str)):
+            self.fail(f"unsupported value {node.value!r}")
+        return node.value
+
+    def evaluate_Name(self, node: ast.Name):  # pylint: disable=invalid-name
+        """Evaluate a column, an alias of a used column or the records index."""
+        if node.id in self.fitting_data.all_columns:
+            return self.column(node.id)
+        if node.id == "index":
+            return self.index
+        aliases = {
+            "x": self.fitting_data.x_column,
+            "xerr": self.fitting_data.xerr_column,
+            "y": self.fitting_data.y_column,
+            "yerr": self.fitting_data.yerr_column,
+        }
+        if node.id in aliases:
+            if aliases[node.id] is None:
+                self.fail(f'no column is used as "{node.id}"')
+            return self.column(aliases[node.id])
+        return self.fail(f'unknown name "{node.id}"')
+
+    def evaluate_BoolOp(self, node: ast.BoolOp):  # pylint: disable=invalid-name
+        """Evaluate "and" and "or" over whole columns."""
+        values = [self.evaluate(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            return np.logical_and.reduce(values)
+        return np.logical_or.reduce(values)
+
+    def evaluate_UnaryOp(self, node: ast.UnaryOp):  # pylint: disable=invalid-name
+        """Evaluate a negation, in floating point for numbers."""
+        unary_operator = self.operator(SelectionRule.UNARY_OPERATORS, node.op)
+        operand = self.evaluate(node.operand)
+        if isinstance(node.op, (ast.USub, ast.UAdd)):
+            operand = _number(operand)
+        return unary_operator(operand)
+
+    def evaluate_BinOp(self, node: ast.BinOp):  # pylint: disable=invalid-name
+        """Evaluate arithmetic in floating point, and "&" and "|" as "and" and "or"."""
+        binary_operator = self.operator(SelectionRule.BINARY_OPERATORS, node.op)
+        left, right = self.evaluate(node.left), self.evaluate(node.right)
+        if not isinstance(node.op, (ast.BitAnd, ast.BitOr)):
+            left, right = _number(left), _number(right)
+        return binary_operator(left, right)
+
+    def evaluate_Compare(self, node: ast.Compare):  # pylint: disable=invalid-name
+        """Evaluate a comparison, which may be chained as in 1 < x < 3."""
+        left = self.evaluate(node.left)
+        results: List[np.ndarray] = []
+        for compare_operator, comparator in zip(node.ops, node.comparators):
+            right = self.evaluate(comparator)
+            results.append(
+                self.operator(SelectionRule.COMPARE_OPERATORS, compare_operator)(
+                    left, right
+                )
+            )
+            left = right
+        return np.logical_and.reduce(results)
+
+    def evaluate_Call(self, node: ast.Call):  # pylint: disable=invalid-name
+        """Evaluate a call to one of the allowed functions."""
+        if not isinstance(node.func, ast.Name) or node.func.id not in self.functions:
+            self.fail("unknown function")
+        name = node.func.id
+        args = [self.evaluate(arg) for arg in node.args]
+        kwargs = {}
+        for keyword in node.keywords:
+            if keyword.arg is None:
+                self.fail("unsupported syntax")
+            kwargs[keyword.arg] = self.evaluate(keyword.value)
+        try:
+            return self.functions[name](*args, **kwargs)
+        except TypeError:
+            return self.fail(f"wrong arguments to {name}")
+
+    def column(self, name: str) -> np.ndarray:
+        """Values of a column, for all records."""
+        if name not in self.fitting_data.all_columns:
+            self.fail(f'unknown column "{name}"')
+        return self.fitting_data.column_data(name, only_selected=False)
+
+    def every(self, n: int, start: int = 1) -> np.ndarray:
+        """Every n-th record, starting from record number start."""
+        if n <= 0:
+            self.fail("every() expects a positive number of records")
+        return (self.index >= start) & ((self.index - start) % n == 0)
+
+    def within_sigma(self, value: np.ndarray, n_sigma: float) -> np.ndarray:
+        """Whether values are within n standard deviations of the selected mean."""
+        selected = np.asarray(self.fitting_data.records_indices, dtype=bool)
+        reference = value[selected] if np.any(selected) else value
+        return np.abs(value - np.mean(reference)) <= n_sigma * np.std(reference)
+
+    def operator(
+        self, operators: Dict[type, Callable], operator_node: ast.AST
+    ) -> Callable:
+        """Function applying an operator of the rule."""
+        if type(operator_node) not in operators:
+            self.fail("unsupported operator")
+        return operators[type(operator_node)]
+
+    def fail(self, reason: str) -> NoReturn:
+        """Stop evaluating the rule, explaining why it is invalid."""
+        raise SelectionRuleError(
+            f'Invalid selection rule "{self.rule.expression}": {reason}'
+        )
+
+
+def _number(value) -> np.ndarray:
+    return np.asarray(value, dtype=float)
+
+
+def apply_selection_rule(
+    record_selection: RecordSelection,
+    rule: SelectionRule,
+    mode: SelectionMode = SelectionMode.REPLACE,
+) -> int:
+    """
+    Update a records selection by a rule, in a single update.
+
+    :param record_selection: selection of the records
+    :type record_selection: RecordSelection
+    :param rule: selection rule
+    :type rule: SelectionRule
+    :param mode: how to combine the rule with the current selection
+    :type mode: SelectionMode
+    :return: number of selected records
+    :rtype: int
+    """
+    record_selection.set_mask(
+        mode.combine(record_selection.mask, rule.mask(record_selection.fitting_data))
+    )
+    return record_selection.count
@@ -1,4 +1,9 @@
 """Utility methods."""
+import asyncio
+import functools
+import importlib.util
+from pathlib import Path
+from typing import Union
 
 
 def value_or_none(value):
@@ -6,3 +11,30 @@ def value_or_none(value):
     if value.strip() == "":
         return None
     return value
+
+
+def to_size_string(number_of_bytes):
+    """Return a human readable representation of a size given in bytes."""
+    size, unit = float(number_of_bytes), "B"
+    for bigger_unit in ["KB", "MB", "GB"]:
+        if size < 1024:
+            break
+        size, unit = size / 1024, bigger_unit
+    if unit == "B":
+        return f"{int(size)} {unit}"
+    return f"{size:.1f} {unit}"
+
+
+async def run_in_background(func, *args, **kwargs):
+    """Run a blocking function in a worker thread without blocking the event loop."""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+def load_user_module(file_path: Union[str, Path]):
+    """Load a user module, registering the fitting functions defined in it."""
+    spec = importlib.util.spec_from_file_location("eddington.dummy", file_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f'Cannot load module from "{file_path}"')
+    dummy_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(dummy_module)
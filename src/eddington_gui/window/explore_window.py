@@ -1,27 +1,71 @@
 """Module for the explore window."""
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
 import toga
-from eddington import FigureBuilder
+from eddington import FigureBuilder, to_relevant_precision_string
 from eddington.interval import Interval
 from toga.style import Pack
 from travertino.constants import COLUMN
 
 from eddington_gui.boxes.eddington_box import EddingtonBox
 from eddington_gui.boxes.figure_box import FigureBox
+from eddington_gui.boxes.line_box import LineBox
 from eddington_gui.boxes.parameters_options_box import ParametersOptionsBox
 from eddington_gui.boxes.plot_configuration_box import PlotConfigurationBox
+from eddington_gui.boxes.progress_box import ProgressBox
 from eddington_gui.buttons.save_figure_button import SaveFigureButton
-from eddington_gui.consts import EXPLORE_WINDOW_SIZE, FontSize
+from eddington_gui.consts import (
+    EXPLORE_WINDOW_SIZE,
+    MULTI_START_RANDOM_RESTARTS,
+    MULTI_START_SHOWN_SOLUTIONS,
+    SMALL_PADDING,
+    FontSize,
+)
+from eddington_gui.fitting.fitting_function_spec import FittingFunctionSpec
+from eddington_gui.fitting.multi_start import (
+    Solution,
+    StartingPoint,
+    StartResult,
+    deduplicate_solutions,
+    fit_all_starts,
+    random_starting_points,
+)
 
 
 class ExploreWindow(toga.Window):  # pylint: disable=too-many-instance-attributes
-    """A window class for displaying optional fittings with given parameters."""
+    """
+    A window class for displaying optional fittings with given parameters.
+
+    "Fit all" fits the data from every given set of parameters, and from random
+    ones, in parallel. Fits which converged to the same parameters are merged,
+    and the best solutions are drawn along with the given parameters.
+    """
 
-    def __init__(self, data, app=None, font_size=FontSize.DEFAULT):
+    __results: List[StartResult]
+    __solutions: List[Solution]
+    __fit_all_task: Optional[asyncio.Future]
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        data,
+        app=None,
+        font_size=FontSize.DEFAULT,
+        module_paths: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ):
         """Initialize window."""
         super().__init__(size=EXPLORE_WINDOW_SIZE)
         self.app = app
         self.data = data
         self.font_size = font_size
+        self.module_paths = module_paths
+        self.timeout = timeout
+        self.__results = []
+        self.__solutions = []
+        self.__fit_all_task = None
+        self.on_close = lambda window, **kwargs: self.cancel_fit_all()
         window_width = self.size[0]
         self.parameters_options_boxes = EddingtonBox(
             children=[self.build_parameters_options_box()], style=Pack(direction=COLUMN)
@@ -32,10 +76,38 @@ def __init__(self, data, app=None, font_size=FontSize.DEFAULT):
         self.figure_box = FigureBox(
             on_draw=self.plot_configuration_box.on_draw, width=int(window_width * 0.5)
         )
+        self.random_restarts_input = toga.NumberInput(
+            min_value=0, value=MULTI_START_RANDOM_RESTARTS, style=Pack(width=60)
+        )
+        self.shown_solutions_input = toga.NumberInput(
+            min_value=0,
+            value=MULTI_START_SHOWN_SOLUTIONS,
+            on_change=lambda _: self.figure_box.draw(),
+            style=Pack(width=60),
+        )
+        self.fit_all_button = toga.Button("Fit all", on_press=self.fit_all)
+        self.progress_box = ProgressBox()
+        self.solutions_table: toga.Table = toga.Table(
+            headings=["Rank", "Model", "Chi2", "Parameters", "Starting points"],
+            accessors=["rank", "model", "chi2", "parameters", "starts"],
+            style=Pack(flex=1),
+        )
         self.controls_box = EddingtonBox(
             children=[
                 self.parameters_options_boxes,
-                toga.Box(style=Pack(flex=1)),
+                LineBox(
+                    children=[
+                        toga.Label(text="Random restarts:"),
+                        self.random_restarts_input,
+                        toga.Label(
+                            text="Show best:", style=Pack(padding_left=SMALL_PADDING)
+                        ),
+                        self.shown_solutions_input,
+                        self.fit_all_button,
+                    ]
+                ),
+                self.progress_box,
+                self.solutions_table,
                 self.plot_configuration_box,
                 EddingtonBox(
                     children=[
@@ -89,9 +161,114 @@ def additional_plot_instructions(
                     func=parameters_options_box.fitting_function,
                     label=label,
                 )
+        for rank, solution in enumerate(self.shown_solutions, start=1):
+            plot_added = True
+            figure_builder.add_plot(
+                interval=interval.intersect(self.data.x_domain),
+                a=solution.a,
+                func=solution.spec.load(),
+                label=f"Best {rank}: {solution.spec.title}",
+            )
         if plot_added:
             figure_builder.add_legend()
 
+    @property
+    def solutions(self) -> List[Solution]:
+        """Distinct solutions found by "Fit all", sorted by chi2."""
+        return self.__solutions
+
+    @property
+    def shown_solutions(self) -> List[Solution]:
+        """The best solutions, which are drawn."""
+        shown = self.shown_solutions_input.value
+        return self.__solutions[: 0 if shown is None else int(shown)]
+
+    def starting_points(self) -> List[StartingPoint]:
+        """Given parameters of all chosen fitting functions, and random ones."""
+        restarts = self.random_restarts_input.value
+        starts: List[StartingPoint] = []
+        for parameters_options_box in self.parameters_options_boxes.children[:-1]:
+            fitting_function = parameters_options_box.fitting_function
+            spec = FittingFunctionSpec.from_function(fitting_function)
+            a0_values = parameters_options_box.a0_values
+            starts.extend(
+                StartingPoint(spec=spec, label=label or f"Guess {i}", a0=a0)
+                for i, (label, a0) in enumerate(a0_values, start=1)
+            )
+            starts.extend(
+                random_starting_points(
+                    spec,
+                    a0_values=[a0 for _, a0 in a0_values],
+                    number_of_parameters=fitting_function.n,
+                    count=0 if restarts is None else int(restarts),
+                )
+            )
+        return starts
+
+    async def fit_all(self, widget):  # pylint: disable=unused-argument
+        """Fit the data from all starting points and rank the solutions."""
+        if self.__fit_all_task is not None:
+            return
+        starts = self.starting_points()
+        if len(starts) == 0:
+            self.info_dialog(
+                title="Fit all",
+                message="Choose a fitting function, with parameters or random restarts",
+            )
+            return
+        self.__results = []
+        self.__solutions = []
+        self.update_solutions()
+        self.fit_all_button.enabled = False
+        self.progress_box.start(
+            text=f"Fitting from {len(starts)} starting points...",
+            on_cancel=self.cancel_fit_all,
+        )
+        self.__fit_all_task = asyncio.ensure_future(
+            fit_all_starts(
+                self.data,
+                starts,
+                module_paths=self.module_paths,
+                timeout=self.timeout,
+                on_result=lambda result: self.add_result(result, len(starts)),
+            )
+        )
+        try:
+            await self.__fit_all_task
+        except asyncio.CancelledError:
+            pass
+        except BrokenProcessPool as error:
+            self.error_dialog(title="Fit all error", message=str(error))
+        finally:
+            self.__fit_all_task = None
+            self.fit_all_button.enabled = True
+            self.progress_box.stop()
+
+    def add_result(self, result: StartResult, number_of_starts: int):
+        """Add the result of a finished fit, and merge it into the solutions."""
+        self.__results.append(result)
+        self.__solutions = deduplicate_solutions(self.__results)
+        self.progress_box.update(
+            f"Fitted {len(self.__results)} of {number_of_starts} starting points",
+            value=len(self.__results),
+            max_value=number_of_starts,
+        )
+        self.update_solutions()
+
+    def cancel_fit_all(self):
+        """Cancel the running fits, if there are any."""
+        if self.__fit_all_task is not None:
+            self.__fit_all_task.cancel()
+        return True
+
+    def update_solutions(self):
+        """Show the solutions in the table, and draw the best ones."""
+        self.solutions_table.data = [
+            _solution_row(rank, solution)
+            for rank, solution in enumerate(self.__solutions, start=1)
+        ]
+        self.figure_box.draw()
+
     def refresh(self, widget):  # pylint: disable=unused-argument
         """Refresh drawing in figure box."""
         self.figure_box.draw()
@@ -100,3 +277,16 @@ def refresh(self, widget):  # pylint: disable=unused-argument
     def build_parameters_options_box(cls):
         """Build new options box."""
         return ParametersOptionsBox()
+
+
+def _solution_row(rank: int, solution: Solution) -> dict:
+    return {
+        "rank": rank,
+        "model": solution.spec.title,
+        "chi2": to_relevant_precision_string(solution.chi2),
+        "parameters": ", ".join(
+            to_relevant_precision_string(value) for value in solution.a
+        ),
+        "starts": ", ".join(solution.labels),
+        "solution": solution,
+    }
@@ -0,0 +1,190 @@
+"""Window for ranking fitting functions by how well they fit the data."""
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional
+
+import toga
+from eddington import FittingData, to_relevant_precision_string
+from toga.style import Pack
+from toga.style.pack import COLUMN
+
+from eddington_gui.boxes.eddington_box import EddingtonBox
+from eddington_gui.boxes.line_box import LineBox
+from eddington_gui.boxes.progress_box import ProgressBox
+from eddington_gui.consts import (
+    MAX_POLYNOMIAL_DEGREE,
+    MODEL_SEARCH_MAX_DEGREE,
+    MODEL_SEARCH_WINDOW_SIZE,
+    SMALL_PADDING,
+    FontSize,
+)
+from eddington_gui.fitting.fitting_function_spec import FittingFunctionSpec
+from eddington_gui.fitting.model_search import (
+    RANKINGS,
+    ModelScore,
+    model_search_specs,
+    rank_models,
+    search_models,
+)
+
+_ACCESSORS = ["model", "parameters", "chi2_reduced", "aic", "bic", "status"]
+
+
+class ModelSearchWindow(toga.Window):  # pylint: disable=too-many-instance-attributes
+    """
+    Window fitting every registered fitting function to the data.
+
+    Polynomials up to a chosen degree are fitted as well. The fits run in
+    parallel, in separate processes, and the leaderboard is updated whenever a
+    fit is done.
+    """
+
+    __max_degree_input: toga.NumberInput
+    __ranking_selection: toga.Selection
+    __search_button: toga.Button
+    __table: toga.Table
+    __progress_box: ProgressBox
+    __scores: List[ModelScore]
+    __search: Optional[asyncio.Future]
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        data: FittingData,
+        on_load: Callable[[FittingFunctionSpec], None],
+        module_paths: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        font_size: FontSize = FontSize.DEFAULT,
+    ):
+        """Initialize window."""
+        super().__init__(title="Find Best Model", size=MODEL_SEARCH_WINDOW_SIZE)
+        self.data = data
+        self.on_load = on_load
+        self.module_paths = module_paths
+        self.timeout = timeout
+        self.__scores = []
+        self.__search = None
+        self.on_close = lambda window, **kwargs: self.cancel_search()
+
+        self.__max_degree_input = toga.NumberInput(
+            min_value=1,
+            max_value=MAX_POLYNOMIAL_DEGREE,
+            value=MODEL_SEARCH_MAX_DEGREE,
+        )
+        self.__ranking_selection = toga.Selection(
+            items=list(RANKINGS.keys()), on_select=lambda _: self.update_table()
+        )
+        self.__search_button = toga.Button(text="Search", on_press=self.search)
+        self.__progress_box = ProgressBox()
+        self.__table = toga.Table(
+            headings=["Model", "Parameters", "Reduced chi2", "AIC", "BIC", "Status"],
+            accessors=_ACCESSORS,
+            style=Pack(flex=1),
+        )
+        main_box = EddingtonBox(
+            children=[
+                LineBox(
+                    children=[
+                        toga.Label(text="Polynomials up to degree:"),
+                        self.__max_degree_input,
+                        toga.Label(
+                            text="Sort by:", style=Pack(padding_left=SMALL_PADDING)
+                        ),
+                        self.__ranking_selection,
+                        toga.Box(style=Pack(flex=1)),
+                        self.__search_button,
+                    ]
+                ),
+                self.__progress_box,
+                self.__table,
+                LineBox(
+                    children=[
+                        toga.Box(style=Pack(flex=1)),
+                        toga.Button(text="Load model", on_press=self.load_model),
+                    ]
+                ),
+            ],
+            style=Pack(direction=COLUMN),
+        )
+        main_box.set_font_size(font_size)
+        self.content = main_box
+
+    @property
+    def scores(self) -> List[ModelScore]:
+        """Scores of the fits done so far, sorted by the chosen ranking."""
+        return rank_models(self.__scores, self.__ranking_selection.value)
+
+    async def search(self, widget):  # pylint: disable=unused-argument
+        """Fit all fitting functions to the data and rank them."""
+        if self.__search is not None:
+            return
+        specs = model_search_specs(int(self.__max_degree_input.value))
+        self.__scores = []
+        self.update_table()
+        self.__search_button.enabled = False
+        self.__progress_box.start(
+            text=f"Fitting {len(specs)} models...", on_cancel=self.cancel_search
+        )
+        self.__search = asyncio.ensure_future(
+            search_models(
+                self.data,
+                specs,
+                module_paths=self.module_paths,
+                timeout=self.timeout,
+                on_score=lambda score: self.add_score(score, len(specs)),
+            )
+        )
+        try:
+            await self.__search
+        except asyncio.CancelledError:
+            pass
+        except BrokenProcessPool as error:
+            self.error_dialog(title="Model search error", message=str(error))
+        finally:
+            self.__search = None
+            self.__search_button.enabled = True
+            self.__progress_box.stop()
+
+    def add_score(self, score: ModelScore, number_of_models: int):
+        """Add the score of a finished fit to the leaderboard."""
+        self.__scores.append(score)
+        self.__progress_box.update(
+            f"Fitted {len(self.__scores)} of {number_of_models} models",
+            value=len(self.__scores),
+            max_value=number_of_models,
+        )
+        self.update_table()
+
+    def cancel_search(self):
+        """Cancel the running search, if there is one."""
+        if self.__search is not None:
+            self.__search.cancel()
+        return True
+
+    def update_table(self):
+        """Show the scores in the leaderboard, sorted by the chosen ranking."""
+        self.__table.data = [_score_row(score) for score in self.scores]
+
+    def load_model(self, widget):  # pylint: disable=unused-argument
+        """Load the selected model in the main window."""
+        row = self.__table.selection
+        if row is None:
+            self.info_dialog(title="Load model", message="No model has been selected")
+            return
+        self.on_load(row.score.spec)
+
+
+def _score_row(score: ModelScore) -> dict:
+    def to_string(value: Optional[float]) -> str:
+        return "" if value is None else to_relevant_precision_string(value)
+
+    return {
+        "model": score.spec.title,
+        "parameters": (
+            "" if score.fitting_result is None else score.number_of_parameters
+        ),
+        "chi2_reduced": to_string(score.chi2_reduced),
+        "aic": to_string(score.aic),
+        "bic": to_string(score.bic),
+        "status": "OK" if score.error is None else score.error,
+        "score": score,
+    }
@@ -1,51 +1,105 @@
 """Window for choosing record to use in fit data."""
+import functools
 import itertools
-from typing import Callable, Dict, List, Tuple
+import math
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 
+import numpy as np
 import toga
-from eddington import FittingData, to_relevant_precision_string
+from eddington import EddingtonException, FittingData, to_relevant_precision_string
 from eddington.statistics import Statistics
 from toga.style import Pack
-from toga.style.pack import COLUMN
+from toga.style.pack import COLUMN, HIDDEN, VISIBLE
 from travertino.constants import BOLD
 
 from eddington_gui.boxes.line_box import LineBox
 from eddington_gui.consts import (
     COLUMN_WIDTH,
+    INFLUENCE_UNSELECTED_RECORDS,
     LINE_HEIGHT,
     RECORD_WINDOW_SIZE,
+    RECORDS_PAGE_SIZE,
     SMALL_PADDING,
     TITLES_LINE_HEIGHT,
     FontSize,
 )
+from eddington_gui.fitting.influence import INFLUENCE_COLUMNS, Influence
+from eddington_gui.records.change_batcher import ChangeBatcher
+from eddington_gui.records.record_selection import RecordSelection
+from eddington_gui.records.running_statistics import RunningStatistics
+from eddington_gui.records.selection_rules import (
+    SelectionMode,
+    SelectionRule,
+    apply_selection_rule,
+)
 
 
 class RecordsChoiceWindow(toga.Window):  # pylint: disable=too-many-instance-attributes
-    """Window for choosing which records to consider when using fit data."""
+    """
+    Window for choosing which records to consider when using fit data.
+
+    Records are shown page by page. A fixed number of rows is created once, and
+    moving between pages only updates their values from the fitting data, so
+    opening the window takes the same time no matter how many records there are.
+
+    The influence of each selected record on the fit can be shown in extra
+    columns. Records can be sorted by their influence, so the most influential
+    ones are shown first and can be unselected together.
+    """
 
     __fitting_data: FittingData
+    __record_selection: RecordSelection
+    __running_statistics: RunningStatistics
+    __changes: ChangeBatcher
     __save_action: Callable
     __all_checkbox: toga.Switch
     __selected_records_label: toga.Label
+    __page_label: toga.Label
+    __rule_input: toga.TextInput
+    __rule_mode_selection: toga.Selection
     __checkboxes: List[toga.Switch]
+    __cells_labels: Dict[str, List[toga.Label]]
     __statistics_labels: Dict[Tuple[str, str], toga.Label]
+    __influence_labels: Dict[str, List[toga.Label]]
+    __influence_values: Dict[str, np.ndarray]
+    __influence_label: toga.Label
+    __exact_influence_switch: toga.Switch
+    __sort_selection: toga.Selection
+    __unselect_count_input: toga.NumberInput
+    __order: Optional[np.ndarray]
+    __page_indices: np.ndarray
     __update_on_check: bool
+    __page: int
+    closed: bool = False
 
     def __init__(
         self,
-        fitting_data: FittingData,
+        record_selection: RecordSelection,
         font_size: FontSize,
         on_change: Callable[[], None],
+        on_analyze_influence: Optional[
+            Callable[[bool], Awaitable[Optional[Influence]]]
+        ] = None,
     ):
         """Initialize window."""
         super().__init__(title="Choose Records", size=RECORD_WINDOW_SIZE)
+        fitting_data = record_selection.fitting_data
         self.__fitting_data = fitting_data
+        self.__record_selection = record_selection
+        self.__running_statistics = RunningStatistics(record_selection)
         self.on_change = on_change
+        self.on_analyze_influence = on_analyze_influence
+        self.__influence_values = {}
+        self.__order = None
+        self.__page_indices = np.arange(0)
+        self.__changes = ChangeBatcher(self.update)
+        self.on_close = lambda window, **kwargs: self.__on_close()
         main_box = toga.Box(style=Pack(direction=COLUMN))
         data_box = toga.Box()
         statistics_box = toga.Box()
         font_size_value = font_size.get_font_size()
         self.__update_on_check = True
+        self.__page = 0
         self.__statistics_labels = {
             (column, parameter): toga.Label(
                 text=to_relevant_precision_string(
@@ -62,14 +116,51 @@ def __init__(
         self.__checkboxes = [
             toga.Switch(
                 text="",
-                value=fitting_data.is_selected(i),
-                on_change=self.select_records,
+                on_change=functools.partial(self.select_record, row),
                 style=Pack(
                     height=LINE_HEIGHT, width=COLUMN_WIDTH, font_size=font_size_value
                 ),
             )
-            for i in range(1, fitting_data.number_of_records + 1)
+            for row in range(RECORDS_PAGE_SIZE)
         ]
+        self.__cells_labels = {
+            header: [
+                toga.Label(
+                    text="",
+                    style=Pack(
+                        height=LINE_HEIGHT,
+                        width=COLUMN_WIDTH,
+                        font_size=font_size_value,
+                    ),
+                )
+                for _ in range(RECORDS_PAGE_SIZE)
+            ]
+            for header in fitting_data.all_columns
+        }
+        self.__influence_labels = {
+            header: [
+                toga.Label(
+                    text="",
+                    style=Pack(
+                        height=LINE_HEIGHT,
+                        width=COLUMN_WIDTH,
+                        font_size=font_size_value,
+                    ),
+                )
+                for _ in range(RECORDS_PAGE_SIZE)
+            ]
+            for header in INFLUENCE_COLUMNS
+        }
+        self.__influence_label = toga.Label(
+            text="", style=Pack(font_size=font_size_value, flex=1)
+        )
+        self.__exact_influence_switch = toga.Switch(text="Exact refits", value=False)
+        self.__sort_selection = toga.Selection(
+            items=["Record"] + INFLUENCE_COLUMNS, on_select=self.sort_records
+        )
+        self.__unselect_count_input = toga.NumberInput(
+            min_value=1, value=INFLUENCE_UNSELECTED_RECORDS, style=Pack(width=60)
+        )
         self.__all_checkbox = toga.Switch(
             text="",
             value=self.are_all_selected(),
@@ -82,6 +173,20 @@ def __init__(
                 font_size=font_size_value, width=COLUMN_WIDTH, height=TITLES_LINE_HEIGHT
             ),
         )
+        self.__page_label = toga.Label(
+            text="",
+            style=Pack(
+                font_size=font_size_value,
+                padding_left=SMALL_PADDING,
+                padding_right=SMALL_PADDING,
+            ),
+        )
+        self.__rule_input = toga.TextInput(
+            placeholder="e.g. x > 3 and yerr < 0.1", style=Pack(flex=1)
+        )
+        self.__rule_mode_selection = toga.Selection(
+            items=[mode.value for mode in SelectionMode]
+        )
         data_box.add(
             toga.Box(
                 style=Pack(
@@ -102,7 +207,10 @@ def __init__(
                 ],
             )
         )
-        for header, column in fitting_data.data.items():
+        for header, labels in itertools.chain(
+            self.__cells_labels.items(),
+            self.__influence_labels.items() if on_analyze_influence else [],
+        ):
             data_box.add(
                 toga.Box(
                     style=Pack(
@@ -121,20 +229,57 @@ def __init__(
                                 font_weight=BOLD,
                             ),
                         ),
-                        *[
-                            toga.Label(
-                                text=to_relevant_precision_string(element),
-                                style=Pack(
-                                    height=LINE_HEIGHT,
-                                    width=COLUMN_WIDTH,
-                                    font_size=font_size_value,
-                                ),
-                            )
-                            for element in column
-                        ],
+                        *labels,
                     ],
                 )
             )
+        main_box.add(
+            LineBox(
+                children=[
+                    toga.Label(text="Rule:", style=Pack(font_size=font_size_value)),
+                    self.__rule_input,
+                    self.__rule_mode_selection,
+                    toga.Button(text="Apply", on_press=self.apply_rule),
+                ]
+            )
+        )
+        if on_analyze_influence is not None:
+            main_box.add(
+                LineBox(
+                    children=[
+                        toga.Button(
+                            text="Analyze influence", on_press=self.analyze_influence
+                        ),
+                        self.__exact_influence_switch,
+                        self.__influence_label,
+                        toga.Label(
+                            text="Sort by:", style=Pack(font_size=font_size_value)
+                        ),
+                        self.__sort_selection,
+                        toga.Button(text="Unselect top", on_press=self.unselect_top),
+                        self.__unselect_count_input,
+                    ]
+                )
+            )
+        main_box.add(
+            LineBox(
+                children=[
+                    toga.Button(text="First", on_press=lambda _: self.show_page(0)),
+                    toga.Button(
+                        text="Previous",
+                        on_press=lambda _: self.show_page(self.page - 1),
+                    ),
+                    self.__page_label,
+                    toga.Button(
+                        text="Next", on_press=lambda _: self.show_page(self.page + 1)
+                    ),
+                    toga.Button(
+                        text="Last",
+                        on_press=lambda _: self.show_page(self.number_of_pages - 1),
+                    ),
+                ]
+            )
+        )
         main_box.add(data_box)
         main_box.add(toga.Divider())
         statistics_box.add(
@@ -159,7 +304,7 @@ def __init__(
                 ],
             )
         )
-        for header, column in fitting_data.data.items():
+        for header in fitting_data.all_columns:
             statistics_box.add(
                 toga.Box(
                     style=Pack(
@@ -177,42 +322,194 @@ def __init__(
         main_box.add(statistics_box)
         main_box.add(
             LineBox(
-                children=[toga.Button(text="Close", on_press=lambda _: self.close())],
+                children=[toga.Button(text="Close", on_press=self.close_window)],
             )
         )
         scroller = toga.ScrollContainer(content=main_box)
         self.content = scroller
 
+        self.show_page(0)
         self.update()
 
-    def select_records(self, widget):  # pylint: disable=unused-argument
-        """Set selected records to fitting data."""
+    @property
+    def page(self) -> int:
+        """Index of the shown page, starting from 0."""
+        return self.__page
+
+    @property
+    def number_of_pages(self) -> int:
+        """Number of pages needed for showing all records."""
+        return max(
+            1, math.ceil(self.__fitting_data.number_of_records / RECORDS_PAGE_SIZE)
+        )
+
+    def show_page(self, page: int):
+        """
+        Show the records of the given page.
+
+        :param page: index of the page, starting from 0. Clipped to the existing pages.
+        :type page: int
+        """
+        self.__page = min(max(page, 0), self.number_of_pages - 1)
+        first_record = self.__page * RECORDS_PAGE_SIZE
+        last_record = min(
+            first_record + RECORDS_PAGE_SIZE, self.__fitting_data.number_of_records
+        )
+        self.__page_label.text = (
+            f"Records {first_record + 1}-{last_record} of "
+            f"{self.__fitting_data.number_of_records}"
+        )
+        if (
+            self.__order is not None
+            and len(self.__order) != self.__fitting_data.number_of_records  # noqa: W503
+        ):
+            self.__order = self.__sorted_order()
+        self.__page_indices = (
+            np.arange(first_record, last_record)
+            if self.__order is None
+            else self.__order[first_record:last_record]
+        )
+        selected = self.__record_selection.mask[self.__page_indices]
+        columns = {
+            header: np.asarray(
+                self.__fitting_data.column_data(header, only_selected=False)
+            )[self.__page_indices]
+            for header in self.__cells_labels
+        }
+        columns.update(
+            (header, values[self.__page_indices])
+            for header, values in self.__influence_columns().items()
+        )
+        self.__update_on_check = False
+        for row, checkbox in enumerate(self.__checkboxes):
+            is_shown = row < len(self.__page_indices)
+            self.__set_row_widget(
+                checkbox, is_shown, value=is_shown and bool(selected[row])
+            )
+            for header, labels in itertools.chain(
+                self.__cells_labels.items(), self.__influence_labels.items()
+            ):
+                value = columns[header][row] if is_shown else math.nan
+                self.__set_row_widget(
+                    labels[row],
+                    is_shown,
+                    text=to_relevant_precision_string(value)
+                    if math.isfinite(value)
+                    else "",
+                )
+        self.__update_on_check = True
+
+    def select_record(self, row: int, widget: toga.Switch):
+        """
+        Select/Deselect the record shown in the given row of the page.
+
+        :param row: index of the row in the page
+        :type row: int
+        :param widget: switch of the row
+        :type widget: toga.Switch
+        """
         if not self.__update_on_check:
             return
-        for i in range(self.__fitting_data.number_of_records):
-            if self.__checkboxes[i].value:
-                self.__fitting_data.select_record(i + 1)
-            else:
-                self.__fitting_data.unselect_record(i + 1)
+        if row >= len(self.__page_indices):
+            return
+        record = int(self.__page_indices[row]) + 1
+        if widget.value:
+            self.__running_statistics.select_record(record)
+        else:
+            self.__running_statistics.unselect_record(record)
+        self.__update_on_check = False
         self.__all_checkbox.value = self.are_all_selected()
-        self.update()
+        self.__update_on_check = True
+        self.__changes.notify()
 
     def select_all(self, widget):  # pylint: disable=unused-argument
         """Select/Deselect all records to fitting data."""
-        self.__update_on_check = False
-        if self.__all_checkbox.value:
-            for checkbox in self.__checkboxes:
-                checkbox.value = True
-            self.__fitting_data.select_all_records()
-        elif self.are_all_selected():
-            for checkbox in self.__checkboxes:
-                checkbox.value = False
-            self.__fitting_data.unselect_all_records()
-        self.__update_on_check = True
-        self.update()
+        if not self.__update_on_check:
+            return
+        with self.__changes.transaction():
+            if self.__all_checkbox.value:
+                self.__record_selection.select_all()
+            elif self.are_all_selected():
+                self.__record_selection.unselect_all()
+            self.__running_statistics.reset()
+            self.show_page(self.__page)
+            self.__changes.notify()
+
+    def apply_rule(self, widget):  # pylint: disable=unused-argument
+        """
+        Select records by the rule written by the user.
+
+        The rule is evaluated over all records at once, and the selection is
+        updated in a single step, followed by a single update of the statistics.
+        """
+        with self.__changes.transaction():
+            try:
+                apply_selection_rule(
+                    self.__record_selection,
+                    SelectionRule(self.__rule_input.value),
+                    SelectionMode(self.__rule_mode_selection.value),
+                )
+            except EddingtonException as error:
+                self.error_dialog(title="Selection rule error", message=str(error))
+                return
+            self.__running_statistics.reset()
+            self.__update_on_check = False
+            self.__all_checkbox.value = self.are_all_selected()
+            self.__update_on_check = True
+            self.show_page(self.__page)
+            self.__changes.notify()
+
+    async def analyze_influence(self, widget):
+        """Show the influence of each selected record on the fit."""
+        # The analysis fits the current selection, so pending changes apply first
+        self.__changes.flush()
+        exact = self.__exact_influence_switch.value
+        influence = await self.on_analyze_influence(exact)
+        if influence is None:
+            return
+        self.__influence_values = influence.values_by_record(
+            self.__fitting_data.number_of_records
+        )
+        self.__influence_label.text = (
+            f"Influence on the fit of {len(influence.records)} records"
+            + (" (exact refits)" if influence.exact else "")
+        )
+        self.sort_records(widget)
+
+    def sort_records(self, widget):  # pylint: disable=unused-argument
+        """Show the records sorted by the chosen column, from the highest."""
+        self.__order = self.__sorted_order()
+        self.show_page(0)
+
+    def unselect_top(self, widget):  # pylint: disable=unused-argument
+        """Unselect the selected records with the highest chosen influence."""
+        values = self.__influence_columns().get(self.__sort_selection.value)
+        if values is None or np.all(np.isnan(values)):
+            self.info_dialog(
+                title="Unselect top records",
+                message="Analyze the influence and sort the records by it first",
+            )
+            return
+        mask = np.array(self.__record_selection.mask)
+        candidates = np.flatnonzero(mask & np.isfinite(values))
+        count = int(self.__unselect_count_input.value or 0)
+        top = candidates[np.argsort(-values[candidates], kind="stable")[:count]]
+        mask[top] = False
+        with self.__changes.transaction():
+            self.__record_selection.set_mask(mask)
+            self.__running_statistics.reset()
+            self.__update_on_check = False
+            self.__all_checkbox.value = self.are_all_selected()
+            self.__update_on_check = True
+            self.show_page(self.__page)
+            self.__changes.notify()
 
     def update(self):
-        """Update all needed fields after setting/unsetting records."""
+        """
+        Update all needed fields after setting/unsetting records.
+
+        Changes are batched, so this runs once for many toggled records.
+        """
         self.update_selected_label()
         self.update_statistics()
         self.on_change()
@@ -220,7 +517,7 @@ def update(self):
     def update_selected_label(self):
         """Update number of selected records label."""
         self.__selected_records_label.text = (
-            f"{len(self.__fitting_data.records)} selected records"
+            f"{self.__record_selection.count} selected records"
         )
 
     def update_statistics(self):
@@ -228,10 +525,76 @@ def update_statistics(self):
         for header in self.__fitting_data.all_columns:
             for parameter in Statistics.parameters():
                 text = to_relevant_precision_string(
-                    getattr(self.__fitting_data.statistics(header), parameter, 0)
+                    getattr(self.__running_statistics.statistics(header), parameter, 0)
                 )
                 self.__statistics_labels[(header, parameter)].text = text
 
     def are_all_selected(self):
         """Informs whether all records are selected."""
-        return all(checkbox.value for checkbox in self.__checkboxes)
+        return self.__record_selection.all_selected
+
+    def set_record_selection(self, record_selection: RecordSelection) -> bool:
+        """
+        Show another selection of records with the same columns.
+
+        Used when the fitting data is replaced, as when records are appended to it.
+        Pending changes are applied to the previous selection first.
+
+        :param record_selection: the new selection of records
+        :type record_selection: RecordSelection
+        :return: True if the selection is shown, False if its data has other
+            columns, in which case the window should be closed instead.
+        :rtype: bool
+        """
+        fitting_data = record_selection.fitting_data
+        if fitting_data.all_columns != self.__fitting_data.all_columns:
+            return False
+        self.__changes.flush()
+        self.__fitting_data = fitting_data
+        self.__record_selection = record_selection
+        self.__running_statistics = RunningStatistics(record_selection)
+        self.__update_on_check = False
+        self.__all_checkbox.value = self.are_all_selected()
+        self.__update_on_check = True
+        self.show_page(self.__page)
+        self.update_selected_label()
+        self.update_statistics()
+        return True
+
+    def close_window(self, widget):  # pylint: disable=unused-argument
+        """Apply pending changes and close the window."""
+        self.__changes.flush()
+        self.closed = True
+        self.close()
+
+    def __influence_columns(self) -> Dict[str, np.ndarray]:
+        # Records appended after the analysis have no influence values
+        number_of_records = self.__fitting_data.number_of_records
+        columns = {}
+        for header in INFLUENCE_COLUMNS:
+            column = np.full(number_of_records, fill_value=np.nan)
+            values = self.__influence_values.get(header, column)[:number_of_records]
+            column[: len(values)] = values
+            columns[header] = column
+        return columns
+
+    def __sorted_order(self) -> Optional[np.ndarray]:
+        values = self.__influence_columns().get(self.__sort_selection.value)
+        if values is None:
+            return None
+        return np.argsort(-np.nan_to_num(values, nan=-np.inf), kind="stable")
+
+    def __on_close(self) -> bool:
+        self.__changes.flush()
+        self.closed = True
+        return True
+
+    @classmethod
+    def __set_row_widget(cls, widget: toga.Widget, is_shown: bool, **values):
+        # Changing a widget refreshes the layout, so unchanged values are not set
+        visibility = VISIBLE if is_shown else HIDDEN
+        if widget.style.visibility != visibility:
+            widget.style.visibility = visibility
+        for attribute, value in values.items():
+            if getattr(widget, attribute) != value:
+                setattr(widget, attribute, value)